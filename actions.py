@@ -0,0 +1,91 @@
+from collections import Counter, namedtuple
+from typing import Dict, List, Tuple
+
+# ==========================================
+# ACTION TRACKER
+# Which commands can be used right now, for the `commands` verb, bots and
+# learning agents.
+#
+# Each game lists its puzzle actions as Rules: a command, the room it
+# works in (None for anywhere), the items it needs and the flag values
+# it needs. The tracker keeps a count of unmet requirements per rule and
+# adjusts it only for the rules that mention an item or flag when that
+# item or flag changes, so asking for the current actions never re-checks
+# the inventory. Moving, taking and talking come from the current room.
+# ==========================================
+
+Rule = namedtuple("Rule", "room command items flags")
+
+
+def rule(room, command, items=(), **flags) -> Rule:
+    return Rule(room, command, frozenset(items), flags)
+
+
+class Tracker:
+    def __init__(self, game, rules):
+        self.game = game
+        self.rules: List[Rule] = list(rules)
+        self.by_room: Dict[str, List[int]] = {}
+        self.by_item: Dict[str, List[int]] = {}
+        self.by_flag: Dict[str, List[int]] = {}
+        for i, r in enumerate(self.rules):
+            self.by_room.setdefault(r.room, []).append(i)
+            for item in r.items:
+                self.by_item.setdefault(item, []).append(i)
+            for flag in r.flags:
+                self.by_flag.setdefault(flag, []).append(i)
+
+        self.held = Counter(game.inventory)
+        self.missing = [
+            sum(item not in self.held for item in r.items)
+            + sum(game.flags.get(f) != want for f, want in r.flags.items())
+            for r in self.rules
+        ]
+
+    # ---- kept up to date by the game ----
+
+    def gained(self, item: str) -> None:
+        self.held[item] += 1
+        if self.held[item] == 1:
+            for i in self.by_item.get(item, ()):
+                self.missing[i] -= 1
+
+    def lost(self, item: str) -> None:
+        if not self.held[item]:
+            return
+        self.held[item] -= 1
+        if not self.held[item]:
+            del self.held[item]
+            for i in self.by_item.get(item, ()):
+                self.missing[i] += 1
+
+    def flag_changed(self, flag: str, old, new) -> None:
+        for i in self.by_flag.get(flag, ()):
+            want = self.rules[i].flags[flag]
+            self.missing[i] += (old == want) - (new == want)
+
+    # ---- queries ----
+
+    def here(self, anywhere: bool = True) -> List[Tuple[str, bool]]:
+        """(command, available) for every puzzle action of the current room, in rule order."""
+        found = self.by_room.get(self.game.current.name, [])
+        if anywhere:
+            found = sorted(found + self.by_room.get(None, []))
+        return [(self.rules[i].command, not self.missing[i]) for i in found]
+
+    def valid_actions(self) -> List[str]:
+        """Commands that would do something here and now."""
+        room = self.game.current
+        found = [f"go {d}" for d in room.exits if d not in room.locked_exits]
+        found += [f"take {i}" for i in room.items]
+        found += [f"talk {n}" for n in getattr(room, "npcs", ())]
+        found += [f"talk {c}" for c in getattr(room, "characters", ())]
+        found += [cmd for cmd, ok in self.here() if ok]
+        return found
+
+    def locked_actions(self) -> List[str]:
+        """Commands that are visible here but not possible yet (not counting ones usable anywhere)."""
+        room = self.game.current
+        found = [f"go {d}" for d in room.locked_exits]
+        found += [cmd for cmd, ok in self.here(anywhere=False) if not ok]
+        return found
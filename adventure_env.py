@@ -0,0 +1,171 @@
+import pickle
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from games import EXTRA_NOUNS, PARSER_GAMES, VERBS, quiet
+from statespace import all_npcs
+
+# ==========================================
+# PARSER GAME AGENT ENVIRONMENT
+# Batched reset()/step() over Hearthlight Hollow, Vault of Silent Stars or
+# Clockwork Sanctum sessions, so agents never have to read printed text:
+#
+#   env = AdventureEnv("vault", 64)
+#   obs, mask = env.reset()
+#   obs, reward, done, mask, info = env.step(actions)
+#
+# An observation is a fixed-size vector: one-hot current room, inventory
+# bitmask, flags, then Game.metrics (Hearthlight only). An action is an
+# index into env.commands, every verb paired with every noun it can take;
+# the mask comes from the game's action tracker (actions.py), so it is
+# only the handful of commands that would do something right now.
+# Rewards are metric gains plus a bonus or penalty for the ending reached.
+# ==========================================
+
+DIRECTIONS = ["north", "south", "east", "west", "up", "down"]
+NOUN_VERBS = ["take", "use", "talk", "unlock", "read"]
+BARE_VERBS = ["rest"]   # verbs that change state without a noun
+
+ENDING_REWARDS = {
+    "hearthlight": {"FESTIVAL": 1.0, "GATHERING": 0.8, "STEADY HEARTH": 0.6},
+    "vault": {"RESTORATION": 1.0, "ESCAPE": 0.8, "UNMAKING": 0.3, "CATASTROPHE": -1.0},
+    "clockwork": {"ESCAPE": 1.0},
+}
+METRIC_WEIGHT = 0.1
+
+
+def default_reward(name: str, game, metrics_before: Dict[str, int], ending: Optional[str]) -> float:
+    gain = sum(game.metrics[k] - v for k, v in metrics_before.items())
+    return METRIC_WEIGHT * gain + (ENDING_REWARDS[name].get(ending, 0.0) if ending else 0.0)
+
+
+class AdventureEnv:
+    def __init__(self, name: str, n: int, max_steps: int = 200,
+                 reward: Callable[[str, object, Dict[str, int], Optional[str]], float] = default_reward):
+        self.name = name
+        self.n = n
+        self.max_steps = max_steps
+        self.reward_fn = reward
+
+        template = PARSER_GAMES[name].Game()
+        self._fresh = pickle.dumps(template)
+
+        self.room_names = list(template.rooms)
+        items = {i for r in template.rooms.values() for i in r.items} | set(EXTRA_NOUNS[name])
+        self.item_names = sorted(items)
+        self.flag_names = list(template.flags)
+        self.metric_names = list(getattr(template, "metrics", {}))
+
+        nouns = self.item_names + all_npcs(template)
+        verbs = VERBS[name]
+        self.commands: List[str] = [f"go {d}" for d in DIRECTIONS]
+        self.commands += [f"{v} {x}" for v in NOUN_VERBS if v in verbs for x in nouns]
+        self.commands += [v for v in BARE_VERBS if v in verbs]
+        self.index = {c: i for i, c in enumerate(self.commands)}
+        self._always = [self.index[v] for v in BARE_VERBS if v in self.index]
+
+        self._room_at = {r: i for i, r in enumerate(self.room_names)}
+        self._item_at = {it: len(self.room_names) + i for i, it in enumerate(self.item_names)}
+        self._flags_at = len(self.room_names) + len(self.item_names)
+        self._metrics_at = self._flags_at + len(self.flag_names)
+        self.obs_size = self._metrics_at + len(self.metric_names)
+
+        self.games: List[object] = [None] * n
+        self.steps = np.zeros(n, dtype=np.int32)
+        self.obs = np.zeros((n, self.obs_size), dtype=np.float32)
+        self.mask = np.zeros((n, len(self.commands)), dtype=bool)
+
+    # ---- internals ----
+
+    def _start(self, i: int) -> None:
+        self.games[i] = pickle.loads(self._fresh)
+        self.steps[i] = 0
+        self._observe(i)
+
+    def _observe(self, i: int) -> None:
+        g = self.games[i]
+        row = self.obs[i]
+        row[:] = 0
+        row[self._room_at[g.current.name]] = 1
+        for it in g.inventory:
+            at = self._item_at.get(it)
+            if at is not None:
+                row[at] = 1
+        row[self._flags_at:self._metrics_at] = [bool(g.flags[f]) for f in self.flag_names]
+        if self.metric_names:
+            row[self._metrics_at:] = [g.metrics[m] for m in self.metric_names]
+
+        mask = self.mask[i]
+        mask[:] = False
+        for cmd in g.actions.valid_actions():
+            at = self.index.get(cmd)
+            if at is not None:
+                mask[at] = True
+        mask[self._always] = True
+
+    # ---- API ----
+
+    def reset(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Start n fresh sessions. Returns (obs, mask); the arrays are reused by step()."""
+        for i in range(self.n):
+            self._start(i)
+        return self.obs, self.mask
+
+    def step(self, actions) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, Dict[str, list]]:
+        """Run one command per session. Finished sessions restart; info["endings"] says how they ended."""
+        reward = np.zeros(self.n, dtype=np.float32)
+        done = np.zeros(self.n, dtype=bool)
+        endings: List[Optional[str]] = [None] * self.n
+
+        with quiet():
+            for i, a in enumerate(np.asarray(actions)):
+                g = self.games[i]
+                before = dict(getattr(g, "metrics", {}))
+                try:
+                    g.command(self.commands[a])
+                except SystemExit:
+                    pass
+                self.steps[i] += 1
+
+                reward[i] = self.reward_fn(self.name, g, before, g.ending)
+                if g.ending is not None or self.steps[i] >= self.max_steps:
+                    done[i] = True
+                    endings[i] = g.ending
+                    self._start(i)
+                else:
+                    self._observe(i)
+
+        return self.obs, reward, done, self.mask, {"endings": endings}
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+    from collections import Counter
+
+    from last_rep_env import random_policy
+
+    ap = argparse.ArgumentParser(description="Play random agents through a parser game in batches.")
+    ap.add_argument("game", choices=sorted(PARSER_GAMES))
+    ap.add_argument("--envs", type=int, default=64)
+    ap.add_argument("--steps", type=int, default=2000)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    env = AdventureEnv(args.game, args.envs)
+    rng = np.random.default_rng(args.seed)
+    obs, mask = env.reset()
+    seen: Counter = Counter()
+    total = 0.0
+    t = time.perf_counter()
+    for _ in range(args.steps):
+        obs, reward, done, mask, info = env.step(random_policy(mask, rng))
+        total += float(reward.sum())
+        seen.update(e or "(cut off)" for e, d in zip(info["endings"], done) if d)
+    elapsed = time.perf_counter() - t
+
+    print(f"{len(env.commands)} actions, {env.obs_size} features")
+    print(f"{args.envs * args.steps / elapsed:,.0f} env steps/sec, total reward {total:.1f}")
+    for ending, count in seen.most_common():
+        print(f"  {count:6d}  {ending}")
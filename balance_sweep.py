@@ -0,0 +1,182 @@
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import random
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import last_rep_last_lap
+from last_rep_last_lap import GameState, make_scenes, tuned
+
+# ==========================================
+# LAST REP, LAST LAP — BALANCE SWEEP
+# Plays many seasons under different BALANCE values and reports the
+# ending distribution for each parameter set.
+#
+#   python balance_sweep.py --grid scandal_chance=0.1,0.22,0.4 \
+#                           --grid train_hard.injury=6,10
+#   python balance_sweep.py --sample 20 --range weekly_cost=5:30
+#
+# Seasons are played by a seeded random player, so a parameter set always
+# gives the same result; results are cached in a JSON file keyed by the
+# overrides, the season count, the seed and the source of the game and
+# this file (which hold the default table and the player), and only new
+# points are played. Points run across a process pool.
+# ==========================================
+
+Point = Dict[str, Any]
+
+
+def play(params: Dict[str, Any], seasons: int, seed: int) -> Counter:
+    scenes = make_scenes()
+    endings: Counter = Counter()
+    for i in range(seasons):
+        gs = GameState(seed=seed * 1_000_003 + i, params=params)
+        player = random.Random(i)
+        for _ in range(100):
+            if gs.ended:
+                break
+            choices = scenes[gs.current_scene_id].choices
+            choices[player.randrange(len(choices))].apply_fn(gs)
+        endings[gs.ending_title or "(unfinished)"] += 1
+    return endings
+
+
+def evaluate(job: Tuple[Point, int, int]) -> Dict[str, int]:
+    point, seasons, seed = job
+    return dict(play(tuned(point), seasons, seed))
+
+
+def cache_key(point: Point, seasons: int, seed: int) -> str:
+    return json.dumps([point, seasons, seed, source_key()], sort_keys=True)
+
+
+_SOURCE_KEY = None
+
+
+def source_key() -> str:
+    """Changes whenever the game (BALANCE included) or the sweep's player does."""
+    global _SOURCE_KEY
+    if _SOURCE_KEY is None:
+        h = hashlib.sha1()
+        for path in (last_rep_last_lap.__file__, __file__):
+            with open(path, "rb") as f:
+                h.update(f.read())
+        _SOURCE_KEY = h.hexdigest()[:12]
+    return _SOURCE_KEY
+
+
+def load_cache(path: Optional[str]) -> Dict[str, Dict[str, int]]:
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_cache(path: Optional[str], cache: Dict[str, Dict[str, int]]) -> None:
+    if not path:
+        return
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(cache, f)
+    os.replace(tmp, path)
+
+
+def sweep(points: List[Point], seasons: int = 2000, seed: int = 0,
+          workers: Optional[int] = None, cache_path: Optional[str] = None
+          ) -> Iterator[Tuple[Point, Dict[str, int], bool]]:
+    """(point, ending counts, came from cache) for every point, in order."""
+    cache = load_cache(cache_path)
+    keys = [cache_key(p, seasons, seed) for p in points]
+    todo = {k: p for k, p in zip(keys, points) if k not in cache}   # also drops repeats
+    if todo:
+        jobs = [(p, seasons, seed) for p in todo.values()]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for k, result in zip(todo, pool.map(evaluate, jobs)):
+                cache[k] = result
+        save_cache(cache_path, cache)
+    for p, k in zip(points, keys):
+        yield p, cache[k], k not in todo
+
+
+# --------------------------
+# Parameter sets
+# --------------------------
+
+def parse_value(text: str):
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def grid(specs: List[str]) -> List[Point]:
+    """Every combination of "key=v1,v2,..." specs."""
+    keys, values = [], []
+    for spec in specs:
+        key, _, vals = spec.partition("=")
+        keys.append(key)
+        values.append([parse_value(v) for v in vals.split(",")])
+    return [dict(zip(keys, combo)) for combo in itertools.product(*values)]
+
+
+def sample(specs: List[str], n: int, seed: int = 0) -> List[Point]:
+    """n random points from "key=lo:hi" ranges (integers if both ends are)."""
+    rng = random.Random(seed)
+    ranges = []
+    for spec in specs:
+        key, _, span = spec.partition("=")
+        lo, hi = (parse_value(v) for v in span.split(":"))
+        ranges.append((key, lo, hi))
+    points = []
+    for _ in range(n):
+        point = {}
+        for key, lo, hi in ranges:
+            if isinstance(lo, int) and isinstance(hi, int):
+                point[key] = rng.randint(lo, hi)
+            else:
+                point[key] = round(rng.uniform(lo, hi), 4)
+        points.append(point)
+    return points
+
+
+def print_results(results, top: int = 4) -> None:
+    for point, endings, cached in results:
+        total = sum(endings.values())
+        label = ", ".join(f"{k}={v}" for k, v in point.items()) or "(defaults)"
+        shares = sorted(endings.items(), key=lambda kv: -kv[1])[:top]
+        summary = "  ".join(f"{t.replace('ENDING: ', '')} {100 * c / total:.1f}%" for t, c in shares)
+        print(f"{label:40s} {'*' if cached else ' '} {summary}")
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Ending distributions across Last Rep, Last Lap balance values.")
+    ap.add_argument("--grid", action="append", default=[], metavar="KEY=V1,V2", help="values to try for a parameter")
+    ap.add_argument("--range", action="append", default=[], metavar="KEY=LO:HI", help="range to sample a parameter from")
+    ap.add_argument("--sample", type=int, default=0, help="number of random points to draw from the ranges")
+    ap.add_argument("--seasons", type=int, default=2000, help="seasons played per point")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--workers", type=int)
+    ap.add_argument("--cache", default=".balance_cache.json", help="results cache ('' to disable)")
+    args = ap.parse_args(argv)
+
+    points = grid(args.grid) if args.grid else [{}]
+    if args.sample:
+        points = [dict(g, **s) for g in points for s in sample(args.range, args.sample, args.seed)]
+    for p in points:
+        try:
+            tuned(p)   # reject unknown parameters before starting any work
+        except KeyError as e:
+            ap.error(e.args[0])
+
+    print_results(sweep(points, args.seasons, args.seed, args.workers, args.cache or None))
+    print("(* = from cache)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
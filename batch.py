@@ -0,0 +1,129 @@
+import argparse
+import contextlib
+import io
+import os
+import sys
+import traceback
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Optional, TextIO
+
+from games import PARSER_GAMES
+
+# ==========================================
+# SCRIPTED BATCH DRIVER
+# Runs parser games against command scripts with no terminal attached.
+#
+#   python batch.py vault walk1.txt walk2.txt   one command per line
+#   python batch.py clockwork < scripts.txt     scripts separated by blank lines
+# ==========================================
+
+
+@dataclass
+class SessionResult:
+    game: str
+    ending: Optional[str]   # game.ending, "QUIT" for quit/exit, None if the script ran out
+    commands: int           # commands actually executed
+    output: str
+    error: str = ""         # traceback if the game raised
+
+
+def run_session(game: str, commands: Iterable[str]) -> SessionResult:
+    """Play one session of game, feeding it commands until they run out or the game exits."""
+    g = PARSER_GAMES[game].Game()
+    buf = io.StringIO()
+    ending = None
+    error = ""
+    n = 0
+    with contextlib.redirect_stdout(buf):
+        try:
+            g.current.describe()
+            for cmd in commands:
+                n += 1
+                g.handle(cmd.strip().lower())
+        except SystemExit:
+            ending = g.ending or "QUIT"
+        except Exception:
+            error = traceback.format_exc()
+    return SessionResult(game, ending, n, buf.getvalue(), error)
+
+
+def _run_script(args) -> SessionResult:
+    return run_session(*args)
+
+
+def run_many(game: str, scripts: Iterable[List[str]], workers: Optional[int] = None,
+             window: int = 256) -> Iterator[SessionResult]:
+    """Run scripts across a process pool, yielding results in input order.
+
+    At most window scripts are in flight, so scripts can come from an
+    unbounded stream.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for script in scripts:
+            pending.append(pool.submit(_run_script, (game, list(script))))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+# --------------------------
+# Script sources
+# --------------------------
+
+def read_script_file(path: str) -> List[str]:
+    with open(path, encoding="utf-8") as f:
+        return [line.rstrip("\n") for line in f if line.strip()]
+
+
+def read_scripts(stream: TextIO) -> Iterator[List[str]]:
+    """Blank-line separated scripts, one command per line."""
+    script: List[str] = []
+    for line in stream:
+        if line.strip():
+            script.append(line.rstrip("\n"))
+        elif script:
+            yield script
+            script = []
+    if script:
+        yield script
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Run command scripts through a parser game.")
+    ap.add_argument("game", choices=sorted(PARSER_GAMES))
+    ap.add_argument("scripts", nargs="*", help="script files (default: read stdin)")
+    ap.add_argument("--workers", type=int, help="process pool size (default: CPU count)")
+    ap.add_argument("--output-dir", help="write each session's captured output here")
+    args = ap.parse_args(argv)
+
+    if args.scripts and args.scripts != ["-"]:
+        names = args.scripts
+        scripts = (read_script_file(p) for p in names)
+    else:
+        names = None
+        scripts = read_scripts(sys.stdin)
+
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    errors = 0
+    for i, result in enumerate(run_many(args.game, scripts, args.workers)):
+        name = names[i] if names else f"script-{i + 1}"
+        status = "ERROR" if result.error else (result.ending or "-")
+        print(f"{name}\t{status}\t{result.commands}")
+        if result.error:
+            errors += 1
+            print(result.error, file=sys.stderr)
+        if args.output_dir:
+            path = os.path.join(args.output_dir, f"{i + 1:06d}.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(result.output)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,347 @@
+import argparse
+import gc
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+import last_rep_last_lap as lastrep
+from worldgen import GeneratedGame
+from games import PARSER_GAMES, WALKTHROUGHS, quiet
+
+# ==========================================
+# BENCHMARK SUITE
+#   python bench.py                  run everything, print a table
+#   python bench.py --out run.json   also save results
+#   python bench.py --compare old.json
+#   python bench.py --scaling 1000,10000,100000
+# ==========================================
+
+
+class FakeScreen:
+    """Just enough of a curses window for render_screen."""
+
+    def __init__(self, h: int = 40, w: int = 100):
+        self.h, self.w = h, w
+
+    def getmaxyx(self):
+        return self.h, self.w
+
+    def addstr(self, y, x, s):
+        pass
+
+    def erase(self):
+        pass
+
+    def refresh(self):
+        pass
+
+
+def percentile(sorted_vals: List[float], p: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    i = min(len(sorted_vals) - 1, int(round(p / 100.0 * (len(sorted_vals) - 1))))
+    return sorted_vals[i]
+
+
+def summarize(latencies: List[float], elapsed: float, sessions: int) -> Dict[str, float]:
+    lat = sorted(latencies)
+    return {
+        "ops": len(lat),
+        "sessions": sessions,
+        "ops_per_sec": len(lat) / elapsed if elapsed else 0.0,
+        "sessions_per_sec": sessions / elapsed if elapsed else 0.0,
+        "p50_us": percentile(lat, 50) * 1e6,
+        "p99_us": percentile(lat, 99) * 1e6,
+    }
+
+
+def memory_per_session(make: Callable[[], object], n: int = 50) -> float:
+    """Average bytes retained by one session built with make()."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    keep = [make() for _ in range(n)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del keep
+    return (after - before) / n
+
+
+# --------------------------
+# Parser games
+# --------------------------
+
+def play_script(mod, commands: List[str], latencies: List[float]):
+    game = mod.Game()
+    clock = time.perf_counter
+    try:
+        for cmd in commands:
+            t = clock()
+            game.handle(cmd)
+            latencies.append(clock() - t)
+    except SystemExit:
+        latencies.append(clock() - t)
+    return game
+
+
+def bench_parser_game(name: str, sessions: int) -> Dict[str, float]:
+    mod = PARSER_GAMES[name]
+    commands = WALKTHROUGHS[name]
+    latencies: List[float] = []
+    with quiet():
+        start = time.perf_counter()
+        for _ in range(sessions):
+            play_script(mod, commands, latencies)
+        elapsed = time.perf_counter() - start
+
+        result = summarize(latencies, elapsed, sessions)
+        result["bytes_per_session"] = memory_per_session(
+            lambda: play_script(mod, commands, []))
+    return result
+
+
+def bench_construction(name: str, n: int) -> Dict[str, float]:
+    mod = PARSER_GAMES[name]
+    latencies = []
+    clock = time.perf_counter
+    start = clock()
+    for _ in range(n):
+        t = clock()
+        mod.Game()
+        latencies.append(clock() - t)
+    result = summarize(latencies, clock() - start, n)
+    result["bytes_per_session"] = memory_per_session(mod.Game)
+    return result
+
+
+# --------------------------
+# Last Rep, Last Lap
+# --------------------------
+
+def play_season(seed: int, latencies: List[float]) -> lastrep.GameState:
+    scenes = lastrep.make_scenes()
+    gs = lastrep.GameState(seed=seed)
+    policy = random.Random(seed ^ 0x5EA5)
+    clock = time.perf_counter
+    while not gs.ended:
+        scene = scenes[gs.current_scene_id]
+        choice = policy.choice(scene.choices)
+        t = clock()
+        choice.apply_fn(gs)
+        latencies.append(clock() - t)
+    return gs
+
+
+def bench_seasons(seasons: int) -> Dict[str, float]:
+    latencies: List[float] = []
+    endings: Dict[str, int] = {}
+    start = time.perf_counter()
+    for seed in range(seasons):
+        gs = play_season(seed, latencies)
+        endings[gs.ending_title] = endings.get(gs.ending_title, 0) + 1
+    result = summarize(latencies, time.perf_counter() - start, seasons)
+    result["bytes_per_session"] = memory_per_session(lambda: play_season(0, []))
+    result["endings"] = endings
+    return result
+
+
+def bench_state(ops: int) -> Dict[str, float]:
+    """The per-choice bookkeeping every season pays: a stat delta plus a log line."""
+    gs = lastrep.GameState(seed=0)
+    delta = lastrep.BALANCE["train_smart"]
+    latencies = []
+    clock = time.perf_counter
+    start = clock()
+    for i in range(ops):
+        t = clock()
+        lastrep.apply_delta(gs, **delta)
+        gs.log("Clean work. The kind that lasts.")
+        latencies.append(clock() - t)
+        if i % 8 == 7:
+            gs.stats.stamina = gs.stats.injury = 50
+    result = summarize(latencies, clock() - start, 0)
+    result["bytes_per_session"] = memory_per_session(lambda: lastrep.GameState(seed=0), n=500)
+    return result
+
+
+def bench_render(frames: int) -> Dict[str, float]:
+    scenes = lastrep.make_scenes()
+    gs = lastrep.GameState(seed=0)
+    for i in range(6):
+        gs.log(f"Benchmark message {i}")
+    screen = FakeScreen()
+    order = list(scenes.values())
+    latencies = []
+    clock = time.perf_counter
+    start = clock()
+    for i in range(frames):
+        scene = order[i % len(order)]
+        t = clock()
+        lastrep.render_screen(screen, gs, scene)
+        latencies.append(clock() - t)
+    return summarize(latencies, clock() - start, 0)
+
+
+# --------------------------
+# Generated worlds
+# --------------------------
+
+def time_ops(fn, args: List, clock=time.perf_counter) -> float:
+    """Mean seconds per call of fn over args."""
+    with quiet():
+        start = clock()
+        for a in args:
+            fn(a)
+        return (clock() - start) / max(1, len(args))
+
+
+def bench_world(size: int, ops: int = 20000, seed: int = 0) -> Dict[str, float]:
+    clock = time.perf_counter
+    t = clock()
+    game = GeneratedGame(size=size, seed=seed)
+    build = clock() - t
+
+    rng = random.Random(seed)
+    rooms = list(game.rooms.values())
+    sample = [rng.choice(rooms) for _ in range(ops)]
+
+    def walk(_):
+        d = rng.choice(list(game.current.exits))
+        game.move(d)
+
+    # Half real puzzles (which then open), half misses. The goal is left
+    # out since it ends the game.
+    solvable = [k for k, v in game.puzzles.items() if v is not None]
+    attempts = [rng.choice(solvable) if solvable and i % 2 else (r.name, "dusty tablet")
+                for i, r in enumerate(sample)]
+
+    def lookup(attempt):
+        room, item = attempt
+        game.current = game.rooms[room]
+        game.inventory = [item]
+        game.use(item)
+
+    result = {
+        "rooms": size,
+        "build_us_per_room": build / size * 1e6,
+        "describe_us": time_ops(lambda r: r.describe(), sample) * 1e6,
+        "move_us": time_ops(walk, range(ops)) * 1e6,
+        "puzzle_lookup_us": time_ops(lookup, attempts) * 1e6,
+    }
+    game.current = rooms[0]
+    t = clock()
+    game.routes.route(rooms[0], rooms[-1])
+    result["first_route_us_per_room"] = (clock() - t) / size * 1e6
+
+    del game, rooms, sample
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    game = GeneratedGame(size=size, seed=seed)
+    result["bytes_per_room"] = (tracemalloc.get_traced_memory()[0] - before) / size
+    tracemalloc.stop()
+    return result
+
+
+def run_scaling(sizes: List[int]) -> Dict[str, Dict[str, float]]:
+    results = {}
+    for size in sizes:
+        results[f"world.{size}"] = bench_world(size)
+    return results
+
+
+def print_scaling(results) -> None:
+    keys = ["build_us_per_room", "bytes_per_room", "describe_us", "move_us",
+            "puzzle_lookup_us", "first_route_us_per_room"]
+    print(f"{'rooms':>9}" + "".join(f"{k:>26}" for k in keys))
+    prev = None
+    for r in results.values():
+        cells = []
+        for k in keys:
+            cell = f"{r[k]:.2f}"
+            # Per-room and per-op costs should stay flat; flag anything that
+            # grows more than half as fast as the world does.
+            if prev and prev[k] > 0:
+                growth = r[k] / prev[k]
+                if growth > 1 + 0.5 * (r["rooms"] / prev["rooms"] - 1):
+                    cell += " (!)"
+            cells.append(f"{cell:>26}")
+        print(f"{r['rooms']:>9}" + "".join(cells))
+        prev = r
+
+
+# --------------------------
+# Runner
+# --------------------------
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def run_all(scale: float = 1.0) -> Dict[str, Dict[str, float]]:
+    n = lambda base: max(1, int(base * scale))
+    results = {}
+    for name in PARSER_GAMES:
+        results[f"{name}.playthrough"] = bench_parser_game(name, n(500))
+        results[f"{name}.construct"] = bench_construction(name, n(2000))
+    results["lastrep.season"] = bench_seasons(n(2000))
+    results["lastrep.state"] = bench_state(n(200000))
+    results["lastrep.render"] = bench_render(n(5000))
+    return results
+
+
+def print_table(results, baseline=None) -> None:
+    print(f"{'benchmark':<26}{'ops/s':>12}{'sess/s':>10}{'p50 us':>9}{'p99 us':>9}{'KiB/sess':>10}")
+    for name, r in results.items():
+        line = (f"{name:<26}{r['ops_per_sec']:>12.0f}{r['sessions_per_sec']:>10.0f}"
+                f"{r['p50_us']:>9.1f}{r['p99_us']:>9.1f}"
+                f"{r.get('bytes_per_session', 0) / 1024:>10.1f}")
+        old = (baseline or {}).get(name)
+        if old and old["ops_per_sec"]:
+            line += f"   x{r['ops_per_sec'] / old['ops_per_sec']:.2f} vs baseline"
+        print(line)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark the text adventures.")
+    ap.add_argument("--out", help="write results as JSON to this path")
+    ap.add_argument("--compare", help="JSON file from an earlier run to compare against")
+    ap.add_argument("--scale", type=float, default=1.0, help="multiply iteration counts")
+    ap.add_argument("--scaling", metavar="SIZES",
+                    help="comma-separated generated world sizes to benchmark instead")
+    args = ap.parse_args(argv)
+
+    if args.scaling:
+        results = run_scaling([int(n) for n in args.scaling.split(",")])
+        print_scaling(results)
+    else:
+        results = run_all(args.scale)
+        baseline = None
+        if args.compare:
+            with open(args.compare, encoding="utf-8") as f:
+                baseline = json.load(f)["results"]
+        print_table(results, baseline)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({
+                "commit": git_commit(),
+                "time": time.time(),
+                "python": sys.version.split()[0],
+                "platform": platform.platform(),
+                "results": results,
+            }, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
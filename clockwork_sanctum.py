@@ -1,9 +1,48 @@
 import sys
+from functools import lru_cache
+
+import commands
+import completion
+import nouns
+from actions import Tracker, rule
+from locator import INVENTORY, Locator
+from routes import RouteIndex
 
 # ================================
 # CLOCKWORK SANCTUM — TEXT ADVENTURE (FIXED)
 # ================================
 
+@lru_cache(maxsize=4096)
+def render_room(name, desc, items, characters, exits):
+    """A room's description. Shared by every room (and session) in the same state."""
+    out = ["\n" + name.upper(), "-" * len(name), desc]
+
+    if items:
+        out.append("\nYou see here:")
+        out += [f" - {i}" for i in items]
+
+    if characters:
+        out.append("\nSomeone is here:")
+        out += [f" - {c}" for c in characters]
+
+    if exits:
+        out.append("\nExits:")
+        out += [f" - {e}" for e in exits]
+    return "\n".join(out)
+
+
+# Puzzle actions shown by `commands` (see actions.py).
+ACTIONS = [
+    rule("Generator Hall", "use wrench", {"wrench"}, generator_on=False),
+    rule("Clock Tower", "use copper coil", {"copper coil"}, tower_fixed=False),
+    rule("Clock Tower", "unlock vault", {"brass key"}, tower_fixed=True),
+    rule("Vault Antechamber", "use power crystal", {"power crystal"}, vault_open=False),
+    rule("Forgotten Shrine", "unlock exit", spoken_to_automaton=True),
+    rule("Exit Chamber", "use energy cell", {"energy cell"}),
+    rule(None, "read star chart", {"star chart"}),
+]
+
+
 class Room:
     def __init__(self, name, desc):
         self.name = name
@@ -12,26 +51,17 @@ class Room:
         self.items = []          # list[str]
         self.locked_exits = {}   # direction -> Room (blocked)
         self.characters = {}     # name -> description
+        self._text = None        # cached render_room() output
 
-    def describe(self):
-        print("\n" + self.name.upper())
-        print("-" * len(self.name))
-        print(self.desc)
-
-        if self.items:
-            print("\nYou see here:")
-            for i in self.items:
-                print(" -", i)
-
-        if self.characters:
-            print("\nSomeone is here:")
-            for c in self.characters:
-                print(" -", c)
+    def touch(self):
+        """Call after changing items, characters or exits."""
+        self._text = None
 
-        if self.exits:
-            print("\nExits:")
-            for e in self.exits:
-                print(" -", e)
+    def describe(self, file=None):
+        if self._text is None:
+            self._text = render_room(self.name, self.desc, tuple(self.items),
+                                     tuple(self.characters), tuple(self.exits))
+        print(self._text, file=file)
 
 
 class Game:
@@ -46,7 +76,12 @@ class Game:
             "vault_open": False,
             "spoken_to_automaton": False
         }
+        self.ending = None  # set just before the game exits
+        self.failed = False  # set by fail() while a command runs
         self.create_world()
+        self.routes = RouteIndex(self.rooms)
+        self.locator = Locator(self)
+        self.actions = Tracker(self, ACTIONS)
 
     def create_world(self):
         atrium = Room("Atrium",
@@ -142,6 +177,7 @@ class Game:
     # ================= COMMAND HANDLING =================
 
     def play(self):
+        completion.install(self)
         print("\nTHE CLOCKWORK SANCTUM\n")
         print("You awaken inside an abandoned time-machine complex buried beneath the world.")
         print("Type 'help' for commands.\n")
@@ -152,25 +188,48 @@ class Game:
             cmd = input("\n> ").strip().lower()
             self.handle(cmd)
 
-    def handle(self, cmd):
+    def handle(self, line):
+        """Run one or more `;`-separated commands (see commands.py)."""
+        return commands.run_line(self, line)
+
+    def fail(self, msg):
+        print(msg)
+        self.failed = True
+
+    def command(self, cmd):
         words = cmd.split()
         if not words:
             return
 
         verb = words[0]
 
+        if verb in ("take", "get", "use", "talk"):
+            noun = self.resolve(verb, " ".join(words[1:]))
+            if noun is None:
+                return
+            words = [verb] + noun.split()
+
         if verb in ("quit", "exit"):
             sys.exit()
 
         elif verb == "help":
             self.show_help()
 
+        elif verb == "commands":
+            self.show_commands()
+
         elif verb in ("go", "move"):
             if len(words) < 2:
-                print("Go where?")
+                self.fail("Go where?")
             else:
                 self.move(words[1])
 
+        elif verb == "travel":
+            if len(words) < 2:
+                self.fail("Travel where?")
+            else:
+                self.travel(" ".join(words[1:]))
+
         elif verb in ("look", "examine"):
             if len(words) == 1:
                 self.current.describe()
@@ -179,60 +238,109 @@ class Game:
 
         elif verb in ("take", "get"):
             if len(words) < 2:
-                print("Take what?")
+                self.fail("Take what?")
             else:
                 self.take(" ".join(words[1:]))
 
         elif verb == "inventory":
             self.show_inventory()
 
+        elif verb == "where":
+            if len(words) < 2:
+                self.fail("Where is what?")
+            else:
+                self.where(" ".join(words[1:]))
+
         elif verb == "use":
             if len(words) < 2:
-                print("Use what?")
+                self.fail("Use what?")
             else:
                 self.use(" ".join(words[1:]))
 
         elif verb == "unlock":
             if len(words) < 2:
-                print("Unlock what?")
+                self.fail("Unlock what?")
             else:
                 self.unlock(" ".join(words[1:]))
 
         elif verb == "talk":
             if len(words) < 2:
-                print("Talk to whom?")
+                self.fail("Talk to whom?")
             else:
                 self.talk(" ".join(words[1:]))
 
         elif verb == "read":
             if len(words) < 2:
-                print("Read what?")
+                self.fail("Read what?")
             else:
                 self.read(" ".join(words[1:]))
 
         else:
-            print("I don't understand that.")
+            self.fail("I don't understand that.")
+
+    def resolve(self, verb, noun):
+        """Expand a partial or misspelled noun. None means the player was asked to pick."""
+        if verb in ("take", "get"):
+            pool = self.current.items
+        elif verb == "use":
+            pool = self.inventory
+        else:
+            pool = list(self.current.characters)
+        found = nouns.resolve(noun, pool)
+        if len(found) > 1:
+            self.fail(f"Which do you mean: {nouns.either(found)}?")
+            return None
+        return found[0] if found else noun
 
     # ================= MECHANICS =================
 
     def move(self, direction):
         if direction in self.current.locked_exits:
-            print("That way is locked.")
+            self.fail("That way is locked.")
             return
 
         if direction in self.current.exits:
             self.current = self.current.exits[direction]
             self.current.describe()
         else:
-            print("You can't go that way.")
+            self.fail("You can't go that way.")
+
+    def travel(self, dest):
+        room = self.routes.find(dest)
+        if room is None:
+            self.fail("You don't know of any such room.")
+            return
+        if room is self.current:
+            print("You're already there.")
+            return
+
+        path = self.routes.route(self.current, room)
+        if path is None:
+            self.fail("You can't find an open way there.")
+            return
+
+        for d in path:
+            self.current = self.current.exits[d]
+        print(f"You make your way {', '.join(path)}.")
+        self.current.describe()
 
     def take(self, item):
         if item in self.current.items:
             self.current.items.remove(item)
+            self.current.touch()
             self.inventory.append(item)
+            self.actions.gained(item)
+            self.locator.move(item, self.current.name, INVENTORY)
             print("Taken.")
         else:
-            print("You don't see that here.")
+            self.fail("You don't see that here.")
+
+    def where(self, thing):
+        places = self.locator.where(thing)
+        if not places:
+            print("Nothing in the Sanctum matches that.")
+        for p in places:
+            print("You are carrying it." if p == INVENTORY else f"It is in the {p}.")
 
     def examine(self, target):
         if target in self.inventory:
@@ -244,6 +352,13 @@ class Game:
         else:
             print("You see nothing special.")
 
+    def show_commands(self):
+        print("Things you could do:")
+        for a in self.actions.valid_actions():
+            print(" -", a)
+        for a in self.actions.locked_actions():
+            print(" -", f"{a} (locked)")
+
     def show_inventory(self):
         if not self.inventory:
             print("You are carrying nothing.")
@@ -252,18 +367,30 @@ class Game:
             for i in self.inventory:
                 print(" -", i)
 
+    def _set_flag(self, flag, value=True):
+        old = self.flags[flag]
+        self.flags[flag] = value
+        self.actions.flag_changed(flag, old, value)
+
     def _unlock_direction(self, room, direction, room_obj=None):
         """Remove a lock barrier on a direction and (optionally) add the exit."""
+        redirected = (room_obj is not None and direction not in room.locked_exits
+                      and room.exits.get(direction, room_obj) is not room_obj)
         if direction in room.locked_exits:
             del room.locked_exits[direction]
         if room_obj is not None:
             room.exits[direction] = room_obj
+        room.touch()
+        if redirected:
+            self.routes.clear()
+        else:
+            self.routes.exit_opened(room, direction)
 
     # ================= PUZZLES =================
 
     def use(self, item):
         if item not in self.inventory:
-            print("You don't have that.")
+            self.fail("You don't have that.")
             return
 
         room = self.current.name
@@ -271,19 +398,19 @@ class Game:
         if item == "wrench" and room == "Generator Hall":
             print("You tighten several valves and strike the ignition plate.")
             print("The generator roars to life.")
-            self.flags["generator_on"] = True
+            self._set_flag("generator_on")
             return
 
         if item == "copper coil" and room == "Clock Tower":
             print("You fit the coil into the pendulum housing. Sparks leap.")
             print("A deep, steady ticking returns, like a heartbeat.")
-            self.flags["tower_fixed"] = True
+            self._set_flag("tower_fixed")
             return
 
         if item == "power crystal" and room == "Vault Antechamber":
             print("The sealed door drinks in the crystal's light.")
             print("With a resonant sigh, the northern door slides open.")
-            self.flags["vault_open"] = True
+            self._set_flag("vault_open")
             self._unlock_direction(self.current, "north", self.rooms["Inner Sanctum"])
             return
 
@@ -292,16 +419,16 @@ class Game:
             self.win()
             return
 
-        print("That doesn't seem to work here.")
+        self.fail("That doesn't seem to work here.")
 
     def unlock(self, target):
         # Unlock the vault from the Clock Tower
         if target == "vault" and self.current.name == "Clock Tower":
             if "brass key" not in self.inventory:
-                print("You need a key.")
+                self.fail("You need a key.")
                 return
             if not self.flags["tower_fixed"]:
-                print("The mechanism resists. The tower feels... incomplete.")
+                self.fail("The mechanism resists. The tower feels... incomplete.")
                 return
 
             print("You unlock the vault door. It grinds open.")
@@ -311,19 +438,19 @@ class Game:
         # Reveal/unlock the hidden exit at the Shrine
         if target == "exit" and self.current.name == "Forgotten Shrine":
             if not self.flags["spoken_to_automaton"]:
-                print("You feel along the wall, but find no seam to work with.")
+                self.fail("You feel along the wall, but find no seam to work with.")
                 return
             print("Hidden mechanisms click. A passage reveals itself to the east.")
             self._unlock_direction(self.current, "east", self.rooms["Exit Chamber"])
             return
 
-        print("You can't unlock that yet.")
+        self.fail("You can't unlock that yet.")
 
     def talk(self, target):
         if target == "automaton" and self.current.name == "Forgotten Shrine":
             print("\nThe automaton's eyes brighten.")
             print("\"The engine sleeps. The tower must sing again. The vault requires starlight.\"")
-            self.flags["spoken_to_automaton"] = True
+            self._set_flag("spoken_to_automaton")
             return
 
         print("No response.")
@@ -334,11 +461,12 @@ class Game:
             print("It feels like a clue from an older version of this place.")
             return
 
-        print("You can't read that.")
+        self.fail("You can't read that.")
 
     # ================= ENDING =================
 
     def win(self):
+        self.ending = "ESCAPE"
         print("\nThe portal stabilizes, swirling with impossible light.")
         print("You step forward as the Sanctum collapses behind you.")
         print("\nYOU ESCAPE THE CLOCKWORK SANCTUM.")
@@ -349,13 +477,16 @@ class Game:
         print("""
 Commands:
  go <direction>
+ travel <room>
  take <item>
  use <item>
  unlock <thing>
  talk <character>
  read <item>
  examine <thing>
+ where <thing>
  inventory
+ commands
  help
  quit
 """)
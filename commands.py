@@ -0,0 +1,41 @@
+import io
+import sys
+
+# ==========================================
+# COMMAND LINES
+# Lets a parser game take several commands on one line:
+#     take kettle; go south; use kettle
+# They run in order and the line stops at the first command that fails
+# (the game calls its fail() for that) or ends the game.
+#
+# Everything the commands print is collected and written to the real
+# stdout once per line, rather than once per print() call, which is what
+# scripted and remote players spend most of their time on.
+# ==========================================
+
+SEPARATOR = ";"
+
+
+def split(line: str):
+    """The non-empty commands on line."""
+    for cmd in line.split(SEPARATOR):
+        cmd = cmd.strip()
+        if cmd:
+            yield cmd
+
+
+def run_line(game, line: str) -> bool:
+    """Run each command on line through game.command. False if one of them failed."""
+    out = io.StringIO()
+    real = sys.stdout
+    sys.stdout = out
+    try:
+        for cmd in split(line):
+            game.failed = False
+            game.command(cmd)
+            if game.failed:
+                return False
+        return True
+    finally:
+        sys.stdout = real
+        real.write(out.getvalue())
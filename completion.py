@@ -0,0 +1,195 @@
+from collections import Counter
+from typing import Dict, Iterable, List
+
+import commands
+
+try:
+    import readline
+except ImportError:   # Windows without pyreadline: completion just stays off
+    readline = None
+
+# ==========================================
+# COMMAND COMPLETION
+# Tab completion for the parser games: verbs, directions, items in the
+# room and in the inventory, and NPCs present.
+#
+# Words live in prefix tries. Verbs and the usual compass directions are
+# inserted once. Exits, room items, inventory and NPCs each have a trie
+# that is diffed against the current room after a command has run, so a
+# keystroke only walks the typed prefix and never looks at the rest of
+# the world.
+# `Completer.complete(line)` is the same lookup without readline, for
+# clients that aren't a terminal.
+# ==========================================
+
+DIRECTIONS = ["north", "south", "east", "west", "up", "down"]
+
+# Which of the visible word sets each verb completes from; other verbs get all of them.
+SOURCES = {
+    "go": ("ways",),
+    "move": ("ways",),
+    "take": ("items",),
+    "get": ("items",),
+    "use": ("carried",),
+    "talk": ("people",),
+}
+ALL_THINGS = ("items", "carried", "people")
+
+_END = ""   # key marking "a word ends here" (its value is how many times it was inserted)
+
+
+class Trie:
+    def __init__(self, words: Iterable[str] = ()):
+        self.root: Dict[str, dict] = {}
+        for w in words:
+            self.insert(w)
+
+    def insert(self, word: str) -> None:
+        node = self.root
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[_END] = node.get(_END, 0) + 1
+
+    def remove(self, word: str) -> None:
+        path = [self.root]
+        for ch in word:
+            node = path[-1].get(ch)
+            if node is None:
+                return
+            path.append(node)
+        end = path[-1]
+        if not end.get(_END):
+            return
+        end[_END] -= 1
+        if end[_END]:
+            return
+        del end[_END]
+        # prune branches that no longer lead to a word
+        for i in range(len(word) - 1, -1, -1):
+            if path[i + 1]:
+                break
+            del path[i][word[i]]
+
+    def __contains__(self, word: str) -> bool:
+        node = self.root
+        for ch in word:
+            node = node.get(ch)
+            if node is None:
+                return False
+        return bool(node.get(_END))
+
+    def complete(self, prefix: str) -> List[str]:
+        """Every word starting with prefix, sorted."""
+        node = self.root
+        for ch in prefix:
+            node = node.get(ch)
+            if node is None:
+                return []
+        found = []
+        stack = [(prefix, node)]
+        while stack:
+            word, node = stack.pop()
+            for ch, child in node.items():
+                if ch == _END:
+                    found.append(word)
+                else:
+                    stack.append((word + ch, child))
+        found.sort()
+        return found
+
+
+def verbs_for(game) -> List[str]:
+    """The verb list games.py keeps for game's engine (generated worlds use Vault's)."""
+    from games import PARSER_GAMES, VERBS   # games imports the game modules
+
+    for cls in type(game).__mro__:
+        for name, module in PARSER_GAMES.items():
+            if cls.__module__ == module.__name__:
+                return VERBS[name]
+    return []
+
+
+class Completer:
+    def __init__(self, game, verbs: Iterable[str]):
+        self.game = game
+        self.verbs = Trie(list(verbs) + ["quit"])
+        self.tries = {"ways": Trie(DIRECTIONS), "items": Trie(), "carried": Trie(), "people": Trie()}
+        self._seen = {name: Counter() for name in self.tries}
+        self.stale = True
+        self._matches: List[str] = []
+
+    def _visible(self) -> Dict[str, Counter]:
+        room = self.game.current
+        people = Counter(getattr(room, "npcs", ()))
+        people.update(getattr(room, "characters", ()))
+        return {
+            "ways": Counter(d for d in room.exits if d not in DIRECTIONS),
+            "items": Counter(room.items),
+            "carried": Counter(self.game.inventory),
+            "people": people,
+        }
+
+    def refresh(self) -> None:
+        """Bring the dynamic tries up to date with what the player can see now."""
+        for name, now in self._visible().items():
+            trie, before = self.tries[name], self._seen[name]
+            for w, n in (before - now).items():
+                for _ in range(n):
+                    trie.remove(w)
+            for w, n in (now - before).items():
+                for _ in range(n):
+                    trie.insert(w)
+            self._seen[name] = now
+        self.stale = False
+
+    def complete(self, line: str) -> List[str]:
+        """Full command lines that line could be completed to."""
+        if self.stale:
+            self.refresh()
+        # only the last of several `;`-separated commands is being typed
+        done, bar, line = line.rpartition(commands.SEPARATOR)
+        done = done + bar + " " if bar else ""
+        head, sep, rest = line.lstrip().partition(" ")
+        if not sep:
+            return [f"{done}{v} " for v in self.verbs.complete(head)]
+        rest = rest.lstrip()
+        found = set()
+        for name in SOURCES.get(head, ALL_THINGS):
+            found.update(self.tries[name].complete(rest))
+        return [f"{done}{head} {w}" for w in sorted(found)]
+
+    def _readline_hook(self, text, state):
+        if state == 0:
+            self._matches = self.complete(readline.get_line_buffer()[:readline.get_endidx()])
+        return self._matches[state] if state < len(self._matches) else None
+
+
+def install(game, verbs: Iterable[str] = None) -> Completer:
+    """Attach a Completer to game (as game.completer) and to readline if there is one."""
+    from games import wrap   # games imports the game modules, which import this one
+    completer = Completer(game, verbs_for(game) if verbs is None else verbs)
+    handle = game.handle
+
+    def handle_and_mark(cmd):
+        try:
+            return handle(cmd)
+        finally:
+            completer.stale = True
+
+    wrap(game, "handle", handle_and_mark, "completion")
+    game.completer = completer
+
+    if readline is not None:
+        # Items have spaces in their names, so complete the whole line at once.
+        readline.set_completer_delims("")
+        readline.set_completer(completer._readline_hook)
+        readline.parse_and_bind("tab: complete")
+    return completer
+
+
+def uninstall(game) -> None:
+    from games import unwrap
+    unwrap(game, "handle", "completion")
+    completer = game.__dict__.pop("completer", None)
+    if readline is not None and completer is not None and readline.get_completer() == completer._readline_hook:
+        readline.set_completer(None)
@@ -0,0 +1,220 @@
+import argparse
+import os
+import random
+import sys
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+from games import EXTRA_NOUNS, PARSER_GAMES, VERBS, quiet
+from statespace import StateSpace, all_npcs
+
+# ==========================================
+# COVERAGE-GUIDED COMMAND FUZZER
+# Mutates command sequences for a parser game, keeps the ones that reach
+# new branches of command/use/talk/unlock, and reports crashes and
+# softlocks (states from which no ending can be reached any more), each
+# shrunk to a short reproducer.
+#
+#   python fuzz.py clockwork --workers 4 --rounds 20
+# ==========================================
+
+TRACED = ("command", "use", "talk", "unlock")
+
+Arc = Tuple[str, int, int]          # (function, from line, to line)
+Failure = Tuple[str, str]           # (kind, detail)
+
+
+def vocabulary(name: str) -> Tuple[List[str], List[str]]:
+    """(verbs, nouns) for name: everything a player could plausibly type."""
+    game = PARSER_GAMES[name].Game()
+    nouns = set(EXTRA_NOUNS[name]) | set(all_npcs(game))
+    nouns.update(n.lower() for n in game.rooms)
+    for r in game.rooms.values():
+        nouns.update(r.exits)
+        nouns.update(r.locked_exits)
+        nouns.update(r.items)
+    return list(VERBS[name]), sorted(nouns)
+
+
+# --------------------------
+# Execution
+# --------------------------
+
+class Tracer:
+    def __init__(self, mod):
+        self.codes = {getattr(mod.Game, f).__code__: f
+                      for f in TRACED if hasattr(mod.Game, f)}
+        self.arcs: Set[Arc] = set()
+
+    def __call__(self, frame, event, arg):
+        name = self.codes.get(frame.f_code)
+        if name is None:
+            return None
+        last = [frame.f_lineno]
+
+        def local(frame, event, arg):
+            if event == "line":
+                self.arcs.add((name, last[0], frame.f_lineno))
+                last[0] = frame.f_lineno
+            return local
+        return local
+
+
+def run_sequence(name: str, commands: List[str], space: Optional[StateSpace] = None,
+                 tracer: Optional[Tracer] = None) -> Optional[Failure]:
+    """Play commands on a fresh game; return a failure or None."""
+    game = PARSER_GAMES[name].Game()
+    if tracer is not None:
+        sys.settrace(tracer)
+    try:
+        with quiet():
+            for cmd in commands:
+                game.handle(cmd)
+    except SystemExit:
+        return None
+    except Exception as e:
+        frame = traceback.extract_tb(e.__traceback__)[-1]
+        return ("exception", f"{type(e).__name__} at {frame.name}:{frame.lineno}")
+    finally:
+        if tracer is not None:
+            sys.settrace(None)
+
+    if space is not None and space.start in space.live and space.is_dead(game):
+        return ("softlock", f"stuck in {game.current.name}")
+    return None
+
+
+def minimize(name: str, commands: List[str], failure: Failure,
+             space: Optional[StateSpace]) -> List[str]:
+    """Delta-debugging: drop chunks of commands while the same failure still happens."""
+    seq = list(commands)
+    chunk = max(1, len(seq) // 2)
+    while chunk >= 1:
+        i = 0
+        shrunk = False
+        while i < len(seq):
+            trial = seq[:i] + seq[i + chunk:]
+            if run_sequence(name, trial, space) == failure:
+                seq = trial
+                shrunk = True
+            else:
+                i += chunk
+        if not shrunk:
+            chunk //= 2
+    return seq
+
+
+# --------------------------
+# Workers
+# --------------------------
+
+_space: Optional[StateSpace] = None
+
+
+def _init_worker(space: Optional[StateSpace]) -> None:
+    global _space
+    _space = space
+
+
+def mutate(rng: random.Random, parent: List[str], verbs: List[str], nouns: List[str],
+           corpus: List[List[str]]) -> List[str]:
+    seq = list(parent)
+    op = rng.random()
+    if op < 0.6 or not seq:
+        for _ in range(rng.randint(1, 5)):
+            seq.append(f"{rng.choice(verbs)} {rng.choice(nouns)}")
+    elif op < 0.75:
+        seq.insert(rng.randrange(len(seq) + 1), f"{rng.choice(verbs)} {rng.choice(nouns)}")
+    elif op < 0.9:
+        del seq[rng.randrange(len(seq))]
+    else:
+        other = rng.choice(corpus)
+        seq = seq[:rng.randint(0, len(seq))] + other[rng.randint(0, len(other)):]
+    return seq[:200]
+
+
+def fuzz_batch(name: str, seed: int, iterations: int, corpus: List[List[str]],
+               covered: FrozenSet[Arc]):
+    """One worker's share of a round. Returns (new corpus entries, arcs, failures)."""
+    rng = random.Random(seed)
+    verbs, nouns = vocabulary(name)
+    tracer = Tracer(PARSER_GAMES[name])
+    seen = set(covered)
+    corpus = list(corpus)
+    found: List[List[str]] = []
+    failures: Dict[Failure, List[str]] = {}
+
+    for _ in range(iterations):
+        # Favour recent finds: they sit nearest the uncovered frontier.
+        parent = corpus[min(len(corpus) - 1, int(len(corpus) * rng.random() ** 0.3))]
+        child = mutate(rng, parent, verbs, nouns, corpus)
+
+        tracer.arcs = set()
+        failure = run_sequence(name, child, _space, tracer)
+        if failure is not None:
+            if failure not in failures or len(child) < len(failures[failure]):
+                failures[failure] = child
+            continue
+        if not tracer.arcs <= seen:
+            seen |= tracer.arcs
+            corpus.append(child)
+            found.append(child)
+
+    return found, seen - covered, failures
+
+
+def fuzz(name: str, workers: Optional[int] = None, rounds: int = 10,
+         iterations: int = 2000, seed: int = 0, softlocks: bool = True):
+    """Run the fuzzer. Returns (covered arcs, corpus, {failure: reproducer}, state space)."""
+    space = StateSpace(name) if softlocks else None
+    covered: Set[Arc] = set()
+    corpus: List[List[str]] = [[]]
+    failures: Dict[Failure, List[str]] = {}
+    workers = workers or os.cpu_count() or 1
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(space,)) as pool:
+        for r in range(rounds):
+            jobs = [pool.submit(fuzz_batch, name, seed * 100003 + r * workers + i,
+                                iterations, corpus, frozenset(covered))
+                    for i in range(workers)]
+            for job in jobs:
+                found, arcs, fails = job.result()
+                covered |= arcs
+                corpus.extend(found)
+                for f, seq in fails.items():
+                    if f not in failures or len(seq) < len(failures[f]):
+                        failures[f] = seq
+
+    reproducers = {f: minimize(name, seq, f, space) for f, seq in failures.items()}
+    return covered, corpus, reproducers, space
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Fuzz a parser game with command sequences.")
+    ap.add_argument("game", choices=sorted(PARSER_GAMES))
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--rounds", type=int, default=10)
+    ap.add_argument("--iterations", type=int, default=2000, help="sequences per worker per round")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--no-softlocks", action="store_true", help="skip the state-space search")
+    args = ap.parse_args(argv)
+
+    covered, corpus, reproducers, space = fuzz(args.game, args.workers, args.rounds,
+                                               args.iterations, args.seed,
+                                               not args.no_softlocks)
+
+    print(f"{len(covered)} arcs covered, corpus of {len(corpus)} sequences.")
+    if space is not None:
+        print(f"{len(space.edges)} reachable states, {len(space.dead())} with no ending reachable.")
+        if space.start not in space.live:
+            print("No ending is reachable from the starting state.")
+    for (kind, detail), seq in sorted(reproducers.items()):
+        print(f"\n{kind.upper()}: {detail}")
+        print("  " + "; ".join(seq))
+    return 1 if reproducers else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
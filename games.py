@@ -0,0 +1,170 @@
+import contextlib
+import sys
+
+import clockwork_sanctum
+import hearthlight_hollow
+import vault_of_silent_stars
+
+# ==========================================
+# PARSER GAME REGISTRY
+# Shared by the benchmark, batch and fuzzing tools, and by the hooks
+# (instrument, transcript, spectate, softlock) that wrap a running game.
+# ==========================================
+
+PARSER_GAMES = {
+    "hearthlight": hearthlight_hollow,
+    "vault": vault_of_silent_stars,
+    "clockwork": clockwork_sanctum,
+}
+
+
+# Verbs each game's handle() understands (quit/exit left out on purpose).
+VERBS = {
+    "hearthlight": ["look", "inventory", "journal", "status", "commands",
+                    "go", "travel", "where", "take", "talk", "use", "rest"],
+    "vault": ["look", "inventory", "help", "commands", "go", "travel", "where", "take", "use", "talk"],
+    "clockwork": ["help", "commands", "go", "move", "travel", "look", "examine", "take", "get",
+                  "inventory", "where", "use", "unlock", "talk", "read"],
+}
+
+# Nouns that never sit in a room at startup: gifts, fixtures and unlock targets.
+EXTRA_NOUNS = {
+    "hearthlight": ["brass medallion", "honey roll", "hearth", "oven"],
+    "vault": [],
+    "clockwork": ["vault", "exit"],
+}
+
+# State-changing commands that don't come from a room's exits, items or
+# the player's inventory.
+EXTRA_COMMANDS = {
+    "hearthlight": ["use hearth"],
+    "vault": [],
+    "clockwork": ["unlock vault", "unlock exit"],
+}
+
+
+def game_name(game) -> str:
+    """The PARSER_GAMES name for game, or its module's name."""
+    module = type(game).__module__
+    return next((k for k, m in PARSER_GAMES.items() if m.__name__ == module), module)
+
+
+class NullWriter:
+    def write(self, s):
+        return len(s)
+
+    def flush(self):
+        pass
+
+
+def quiet():
+    """Context manager that throws away everything a game prints."""
+    return contextlib.redirect_stdout(NullWriter())
+
+
+class Tee:
+    """Stands in for sys.stdout, keeping a copy of everything written."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.parts = []
+
+    def write(self, s):
+        self.parts.append(s)
+        return self.stream.write(s)
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+_UNSET = object()
+
+
+def wrap(game, name: str, wrapper, owner: str):
+    """Install wrapper as game.<name> on this instance only.
+
+    Whatever the instance had there before (possibly another hook's
+    wrapper) is kept, so unwrap() can put exactly that back.
+    """
+    wrapper.owner = owner
+    wrapper.replaced = game.__dict__.get(name, _UNSET)
+    setattr(game, name, wrapper)
+    return wrapper
+
+
+def unwrap(game, name: str, owner: str) -> None:
+    """Take owner's wrapper off game.<name>. A no-op if it isn't there.
+
+    Wrappers stack, and each one calls the one it replaced, so only the
+    most recently installed can come off: ValueError otherwise.
+    """
+    f = game.__dict__.get(name, _UNSET)
+    if getattr(f, "owner", None) == owner:
+        if f.replaced is _UNSET:
+            del game.__dict__[name]
+        else:
+            game.__dict__[name] = f.replaced
+        return
+    while f is not _UNSET and hasattr(f, "replaced"):
+        f = f.replaced
+        if getattr(f, "owner", None) == owner:
+            raise ValueError(f"{name} was wrapped again after {owner}; unwrap that first")
+
+
+def wrap_output(game, owner: str, report):
+    """Wrap game.handle so that report(line, output, ending) follows every line.
+
+    output is everything the line printed. ending is None, or the game's
+    ending ("QUIT" if it has none) when the line ended the game.
+    """
+    handle = game.handle
+
+    def teed_handle(line):
+        tee = Tee(sys.stdout)
+        sys.stdout = tee
+        ending = None
+        try:
+            return handle(line)
+        except SystemExit:
+            ending = game.ending or "QUIT"
+            raise
+        finally:
+            sys.stdout = tee.stream
+            report(line, "".join(tee.parts), ending)
+
+    return wrap(game, "handle", teed_handle, owner)
+
+
+def script(text):
+    return [c.strip() for c in text.split(";") if c.strip()]
+
+
+# Scripted playthroughs, one command per step.
+#
+# Hearthlight Hollow currently has no reachable ending (the windmill loft
+# is sealed from outside and nothing leads to the Town Hall), so its
+# script tours every reachable puzzle instead.
+WALKTHROUGHS = {
+    "hearthlight": script(
+        "take kettle; go west; take glow-caps; take kindling; talk forager; go east;"
+        "go north; take dry wick; go south; go south; use kettle; talk ferrier;"
+        "go east; go west; go west; talk caretaker; go east; go north; go east;"
+        "go up; take oil flask; take matches; go east; talk clockmaker; go west;"
+        "go down; use matches; talk baker; rest; status; journal; inventory; commands"
+    ),
+    "vault": script(
+        "go west; take resonant rod; go north; take void lens; go north; use void lens;"
+        "go south; go south; go east; go north; take star shard; go south; go south;"
+        "go south; use resonant rod; go north; use star shard"
+    ),
+    # Skips the Inner Sanctum: it has no way back out.
+    "clockwork": script(
+        "take brass key; go east; take wrench; go north; take energy cell; go east;"
+        "take power crystal; go west; go south; go west; go north; go west; use wrench;"
+        "go north; go down; take copper coil; go east; talk automaton; unlock exit;"
+        "go west; go up; go south; go east; go north; take star chart; read star chart;"
+        "go north; go east; use copper coil; unlock vault; go north; use power crystal;"
+        "go south; go west; go south; go south; go west; go north; go down; go east;"
+        "go east; use energy cell"
+    ),
+}
@@ -1,4 +1,12 @@
 import sys
+from functools import lru_cache
+
+import commands
+import completion
+import nouns
+from actions import Tracker, rule
+from locator import INVENTORY, Locator
+from routes import RouteIndex
 
 # ==========================
 # HEARTHLIGHT HOLLOW — A COZY TEXT ADVENTURE
@@ -8,6 +16,33 @@ LOCKED = "[LOCKED]"
 
 def dim(t): return f"{LOCKED} {t}"
 
+# Puzzle actions shown by `commands` (see actions.py).
+ACTIONS=[
+    rule("Windmill Loft","use oil flask",{"oil flask"},windmill=False),
+    rule("River Dock","use kettle",{"kettle","glow-caps","dry wick"},docklit=False),
+    rule("Bakery","use oven",{"matches","bellows","kindling"},oven=False),
+    rule("Hearth Chamber","use hearth"),
+]
+
+@lru_cache(maxsize=4096)
+def render_room(name,desc,items,npcs,exits,locked):
+    """A room's description. Shared by every room (and session) in the same state."""
+    out=[f"\n{name.upper()}","-"*len(name),desc]
+
+    if items:
+        out.append("\nYou notice:")
+        out+=[f" - {i}" for i in items]
+
+    if npcs:
+        out.append("\nHere:")
+        out+=[f" - {n}" for n in npcs]
+
+    if exits or locked:
+        out.append("\nPaths:")
+        out+=[f" - {e}" for e in exits]
+        out+=[f" - {dim(e)}" for e in locked]
+    return "\n".join(out)
+
 # ---------- Room ----------
 
 class Room:
@@ -18,24 +53,17 @@ class Room:
         self.locked_exits={}
         self.items=[]
         self.npcs=[]
+        self._text=None   # cached render_room() output
 
-    def describe(self):
-        print(f"\n{self.name.upper()}")
-        print("-"*len(self.name))
-        print(self.desc)
-
-        if self.items:
-            print("\nYou notice:")
-            for i in self.items: print(" -",i)
+    def touch(self):
+        """Call after changing items, npcs, exits or locked_exits."""
+        self._text=None
 
-        if self.npcs:
-            print("\nHere:")
-            for n in self.npcs: print(" -",n)
-
-        if self.exits or self.locked_exits:
-            print("\nPaths:")
-            for e in self.exits: print(" -",e)
-            for e in self.locked_exits: print(" -",dim(e))
+    def describe(self,file=None):
+        if self._text is None:
+            self._text=render_room(self.name,self.desc,tuple(self.items),tuple(self.npcs),
+                                   tuple(self.exits),tuple(self.locked_exits))
+        print(self._text,file=file)
 
 # ---------- Game ----------
 
@@ -53,8 +81,13 @@ class Game:
         }
 
         self.metrics={"Warmth":0,"Glow":0,"Care":0,"Order":0,"Rest":0}
+        self.ending=None   # set just before the game exits
+        self.failed=False  # set by fail() while a command runs
 
         self.build_world()
+        self.routes=RouteIndex(self.rooms)
+        self.locator=Locator(self)
+        self.actions=Tracker(self,ACTIONS)
 
     # ---------- World ----------
 
@@ -129,6 +162,7 @@ class Game:
     # ---------- Loop ----------
 
     def play(self):
+        completion.install(self)
         print("\n🍵 THE HEARTHLIGHT HOLLOW 🍵\n")
         self.current.describe()
         while True:
@@ -136,10 +170,23 @@ class Game:
 
     # ---------- Command Handling ----------
 
-    def handle(self,cmd):
+    def handle(self,line):
+        """Run one or more `;`-separated commands (see commands.py)."""
+        return commands.run_line(self,line)
+
+    def fail(self,msg):
+        print(msg)
+        self.failed=True
+
+    def command(self,cmd):
         if not cmd: return
         w=cmd.split(); v=w[0]
 
+        if v in("take","talk","use"):
+            noun=self.resolve(v," ".join(w[1:]))
+            if noun is None: return
+            w=[v]+noun.split()
+
         if v in("quit","exit"): sys.exit()
         elif v=="look": self.current.describe()
         elif v=="inventory": self.show_inventory()
@@ -147,11 +194,22 @@ class Game:
         elif v=="status": self.show_status()
         elif v=="commands": self.show_commands()
         elif v=="go": self.move(w[1] if len(w)>1 else "")
+        elif v=="travel": self.travel(" ".join(w[1:]))
+        elif v=="where": self.where(" ".join(w[1:]))
         elif v=="take": self.take(" ".join(w[1:]))
         elif v=="talk": self.talk(" ".join(w[1:]))
         elif v=="use": self.use(" ".join(w[1:]))
         elif v=="rest": self.rest()
-        else: print("You pause, unsure how to do that.")
+        else: self.fail("You pause, unsure how to do that.")
+
+    def resolve(self,verb,noun):
+        """Expand a partial or misspelled noun. None means the player was asked to pick."""
+        pool={"take":self.current.items,"use":self.inventory,"talk":self.current.npcs}[verb]
+        found=nouns.resolve(noun,pool)
+        if len(found)>1:
+            self.fail(f"Which do you mean: {nouns.either(found)}?")
+            return None
+        return found[0] if found else noun
 
     # ---------- UI ----------
 
@@ -181,39 +239,78 @@ class Game:
         for n in self.current.npcs: print("TALK",n)
 
         # contextual puzzle hints
-        if self.current.name=="Windmill Loft":
-            print("USE oil flask" if "oil flask" in self.inventory else dim("USE oil flask"))
-        if self.current.name=="River Dock":
-            cond={"kettle","glow-caps","dry wick"}.issubset(self.inventory)
-            print("USE kettle" if cond else dim("USE kettle"))
-        if self.current.name=="Bakery":
-            cond={"matches","bellows","kindling"}.issubset(self.inventory)
-            print("USE oven" if cond else dim("USE oven"))
-        if self.current.name=="Hearth Chamber":
-            print("USE hearth")
-
-        print("LOOK\nREST")
+        for cmd,ok in self.actions.here():
+            verb,noun=cmd.split(" ",1)
+            label=f"{verb.upper()} {noun}"
+            print(label if ok else dim(label))
+
+        print("LOOK\nREST\nTRAVEL <place>\nWHERE <thing>")
 
     # ---------- Movement ----------
 
     def move(self,d):
         if d in self.current.locked_exits:
-            print("That way is closed for now.")
+            self.fail("That way is closed for now.")
             return
         if d in self.current.exits:
             self.current=self.current.exits[d]
             self.current.describe()
         else:
-            print("You can't go that way.")
+            self.fail("You can't go that way.")
+
+    def travel(self,dest):
+        room=self.routes.find(dest)
+        if room is None:
+            self.fail("You don't know a place by that name.")
+            return
+        if room is self.current:
+            print("You're already here.")
+            return
+        path=self.routes.route(self.current,room)
+        if path is None:
+            self.fail("No open path leads there yet.")
+            return
+        for d in path: self.current=self.current.exits[d]
+        print(f"You wander {', '.join(path)}.")
+        self.current.describe()
+
+    def _unlock_direction(self,room,direction,room_obj=None):
+        """Remove a lock barrier on a direction and (optionally) add the exit."""
+        redirected=(room_obj is not None and direction not in room.locked_exits
+                    and room.exits.get(direction,room_obj) is not room_obj)
+        room.locked_exits.pop(direction,None)
+        if room_obj is not None: room.exits[direction]=room_obj
+        room.touch()
+        if redirected: self.routes.clear()
+        else: self.routes.exit_opened(room,direction)
 
     # ---------- Basic ----------
 
     def take(self,item):
         if item in self.current.items:
             self.current.items.remove(item)
+            self.current.touch()
             self.inventory.append(item)
+            self.actions.gained(item)
+            self.locator.move(item,self.current.name,INVENTORY)
             print("You pick it up gently.")
-        else: print("You don't see that.")
+        else: self.fail("You don't see that.")
+
+    def receive(self,item):
+        self.inventory.append(item)
+        self.actions.gained(item)
+        self.locator.add(item,INVENTORY)
+
+    def _set_flag(self,flag,value=True):
+        old=self.flags[flag]
+        self.flags[flag]=value
+        self.actions.flag_changed(flag,old,value)
+
+    def where(self,thing):
+        places=self.locator.where(thing)
+        if not places: print("No one in the village has seen that.")
+        for p in places:
+            print("It's in your pockets." if p==INVENTORY else f"You'd find it at the {p}.")
 
     def rest(self):
         print("You sit quietly and breathe.")
@@ -234,7 +331,7 @@ class Game:
         elif npc=="clockmaker":
             if self.flags["windmill"] and "brass medallion" not in self.inventory:
                 print("The clockmaker gifts you a brass medallion.")
-                self.inventory.append("brass medallion")
+                self.receive("brass medallion")
             else:
                 print("“Rhythm comes before precision.”")
 
@@ -248,7 +345,7 @@ class Game:
         elif npc=="caretaker":
             if self.flags["docklit"] and "bellows" not in self.inventory:
                 print("The caretaker hands you bellows.")
-                self.inventory.append("bellows")
+                self.receive("bellows")
             else:
                 print("“Plants like warm villages.”")
 
@@ -266,42 +363,42 @@ class Game:
     def use(self,item):
         r=self.current.name
 
-        if item not in self.inventory and item!="hearth":
-            print("You don't have that.")
+        if item not in self.inventory and item not in("hearth","oven"):
+            self.fail("You don't have that.")
             return
 
         if item=="oil flask" and r=="Windmill Loft" and not self.flags["windmill"]:
             print("The sails begin turning.")
-            self.flags["windmill"]=True
+            self._set_flag("windmill")
             self.metrics["Order"]+=2
-            self.rooms["Lantern Fields"].locked_exits.pop("north",None)
+            self._unlock_direction(self.rooms["Lantern Fields"],"north")
             return
 
         if r=="River Dock" and item=="kettle" and not self.flags["docklit"]:
             if {"glow-caps","dry wick"}.issubset(self.inventory):
                 print("Lanterns blaze across the water.")
-                self.flags["docklit"]=True
+                self._set_flag("docklit")
                 self.metrics["Glow"]+=3
-                self.rooms["River Dock"].locked_exits.pop("east",None)
+                self._unlock_direction(self.rooms["River Dock"],"east")
             else:
-                print("The lantern lacks fuel and wick.")
+                self.fail("The lantern lacks fuel and wick.")
             return
 
-        if r=="Bakery" and item in ("matches","bellows","kindling"):
+        if r=="Bakery" and item in ("matches","bellows","kindling","oven"):
             if not self.flags["oven"] and {"matches","bellows","kindling"}.issubset(self.inventory):
                 print("The oven glows warmly. The baker gifts you a honey roll.")
-                self.inventory.append("honey roll")
-                self.flags["oven"]=True
+                self.receive("honey roll")
+                self._set_flag("oven")
                 self.metrics["Warmth"]+=3
             else:
-                print("The oven needs more tending.")
+                self.fail("The oven needs more tending.")
             return
 
         if r=="Hearth Chamber" and item=="hearth":
             self.final_ritual()
             return
 
-        print("That doesn’t belong here.")
+        self.fail("That doesn’t belong here.")
 
     # ---------- Final ----------
 
@@ -309,7 +406,7 @@ class Game:
         need={"brass medallion","honey roll","bellows","kettle"}
         if need.issubset(self.inventory):
             print("The mayor opens the stair.")
-            self.rooms["Town Hall"].locked_exits.pop("down",None)
+            self._unlock_direction(self.rooms["Town Hall"],"down")
         else:
             print("“The hearth wants patience.”")
 
@@ -319,7 +416,7 @@ class Game:
             print("\nThe hearth flares. Lanterns bloom outward.\n")
             self.endgame()
         else:
-            print("The hearth waits gently.")
+            self.fail("The hearth waits gently.")
 
     # ---------- Ending ----------
 
@@ -327,10 +424,13 @@ class Game:
         score=sum(self.metrics.values())
 
         if score>=15:
+            self.ending="FESTIVAL"
             print("Music rises. You ascend to the balcony and watch the valley glow.")
         elif score>=8:
+            self.ending="GATHERING"
             print("Villagers gather with scarves and mugs.")
         else:
+            self.ending="STEADY HEARTH"
             print("The hearth glows steady and sure.")
 
         print("\n🌙 THANK YOU FOR PLAYING 🌙\n")
@@ -0,0 +1,199 @@
+import json
+import os
+import sys
+import time
+from bisect import bisect_left
+from typing import Dict, Optional
+
+from games import unwrap, wrap
+
+# ==========================================
+# COMMAND INSTRUMENTATION
+# Per-verb call counts, latency histograms and output volume for
+# each parser game command and run_game (Last Rep, Last Lap).
+#
+# Nothing here is wired in by default: an uninstrumented game runs the
+# exact same code it always did.
+# ==========================================
+
+# Histogram bucket upper bounds, in microseconds. Anything slower lands
+# in the final overflow bucket.
+BUCKETS_US = (1, 2, 5, 10, 20, 50, 100, 200, 500,
+              1000, 2000, 5000, 10000, 20000, 50000, 100000)
+
+PHASES = ("parse", "logic", "output")
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_US) + 1)
+        self.n = 0
+        self.total = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.counts[bisect_left(BUCKETS_US, seconds * 1e6)] += 1
+        self.n += 1
+        self.total += seconds
+
+    def percentile(self, p: float) -> float:
+        """Upper bound (µs) of the bucket holding the p-th percentile."""
+        if not self.n:
+            return 0.0
+        rank = p / 100.0 * self.n
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank and c:
+                return float(BUCKETS_US[i]) if i < len(BUCKETS_US) else float("inf")
+        return float("inf")
+
+    def as_dict(self) -> dict:
+        return {
+            "n": self.n,
+            "mean_us": (self.total / self.n * 1e6) if self.n else 0.0,
+            "p50_us": self.percentile(50),
+            "p99_us": self.percentile(99),
+            "buckets_us": list(BUCKETS_US),
+            "counts": list(self.counts),
+        }
+
+
+class VerbStats:
+    def __init__(self):
+        self.calls = 0
+        self.output_bytes = 0
+        self.phases = {p: Histogram() for p in PHASES}
+
+
+class CommandStats:
+    """In-process stats store. Optionally dumps itself to dump_path every dump_every seconds."""
+
+    def __init__(self, dump_path: Optional[str] = None, dump_every: float = 60.0):
+        self.verbs: Dict[str, VerbStats] = {}
+        self.dump_path = dump_path
+        self.dump_every = dump_every
+        self._last_dump = time.monotonic()
+
+    def record(self, verb: str, parse: float, logic: float, output: float, nbytes: int) -> None:
+        vs = self.verbs.get(verb)
+        if vs is None:
+            vs = self.verbs[verb] = VerbStats()
+        vs.calls += 1
+        vs.output_bytes += nbytes
+        vs.phases["parse"].add(parse)
+        vs.phases["logic"].add(logic)
+        vs.phases["output"].add(output)
+
+        if self.dump_path and time.monotonic() - self._last_dump >= self.dump_every:
+            self.dump()
+
+    def snapshot(self) -> dict:
+        return {
+            verb: {
+                "calls": vs.calls,
+                "output_bytes": vs.output_bytes,
+                **{p: h.as_dict() for p, h in vs.phases.items()},
+            }
+            for verb, vs in sorted(self.verbs.items())
+        }
+
+    def dump(self, path: Optional[str] = None) -> None:
+        path = path or self.dump_path
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"time": time.time(), "verbs": self.snapshot()}, f, indent=2)
+        os.replace(tmp, path)
+        self._last_dump = time.monotonic()
+
+    def wrap_screen(self, stdscr):
+        return CountingScreen(stdscr)
+
+
+# --------------------------
+# Output counting
+# --------------------------
+
+class CountingWriter:
+    """Stands in for sys.stdout, timing and counting everything written through it."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.bytes = 0
+        self.seconds = 0.0
+
+    def write(self, s: str) -> int:
+        t = time.perf_counter()
+        n = self.stream.write(s)
+        self.seconds += time.perf_counter() - t
+        self.bytes += len(s.encode("utf-8"))
+        return n
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+class CountingScreen:
+    """Curses window proxy that counts the bytes drawn with addstr."""
+
+    def __init__(self, stdscr):
+        self.stdscr = stdscr
+        self.bytes = 0
+
+    def addstr(self, *args) -> None:
+        self.bytes += len(args[-1].encode("utf-8"))
+        self.stdscr.addstr(*args)
+
+    def take_bytes(self) -> int:
+        n, self.bytes = self.bytes, 0
+        return n
+
+    def __getattr__(self, name):
+        return getattr(self.stdscr, name)
+
+
+# --------------------------
+# Parser games
+# --------------------------
+
+def instrument(game, stats: CommandStats):
+    """Route each command through stats. Only this instance is affected.
+
+    A `;`-separated line is recorded command by command. parse is the time
+    spent resolving the command's noun (game.resolve), logic the rest of
+    the command and output the time spent printing. commands.run_line
+    writes each line to the terminal in one go afterwards, and that write
+    is not counted against any verb.
+    """
+    command = game.command
+    resolve = game.resolve
+    parse = [0.0]
+
+    def timed_resolve(verb, noun):
+        t = time.perf_counter()
+        try:
+            return resolve(verb, noun)
+        finally:
+            parse[0] += time.perf_counter() - t
+
+    def timed_command(cmd):
+        words = cmd.split(None, 1)
+        verb = words[0] if words else ""
+        parse[0] = 0.0
+        out = CountingWriter(sys.stdout)
+        sys.stdout = out
+        t0 = time.perf_counter()
+        try:
+            return command(cmd)
+        finally:
+            total = time.perf_counter() - t0
+            sys.stdout = out.stream
+            stats.record(verb, parse[0], total - parse[0] - out.seconds, out.seconds, out.bytes)
+
+    wrap(game, "resolve", timed_resolve, "instrument")
+    wrap(game, "command", timed_command, "instrument")
+    return game
+
+
+def uninstrument(game) -> None:
+    unwrap(game, "command", "instrument")
+    unwrap(game, "resolve", "instrument")
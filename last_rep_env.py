@@ -0,0 +1,150 @@
+import random
+from dataclasses import fields
+from operator import attrgetter
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from last_rep_last_lap import GameState, Stats, make_scenes
+
+# ==========================================
+# LAST REP, LAST LAP — BATCHED TRAINING ENVIRONMENT
+# reset()/step() over N seasons at once, gym-style, without curses:
+#
+#   env = VectorEnv(256, seed=0)
+#   obs, mask = env.reset()
+#   obs, reward, done, mask, info = env.step(actions)
+#
+# An observation is a season's Stats fields followed by a one-hot of the
+# current scene. Actions index the scene's numbered choices (action 0 is
+# key "1"); mask marks the ones that exist. Finished seasons are restarted
+# on the spot and their ending titles reported in info["endings"].
+#
+# Scenes are built once and shared by every season (their callbacks only
+# touch the GameState they are given), and observations, rewards and
+# masks are written straight into preallocated arrays.
+# ==========================================
+
+STAT_FIELDS = [f.name for f in fields(Stats)]
+SCENE_IDS = list(make_scenes())
+N_ACTIONS = max(len(s.choices) for s in make_scenes().values())
+OBS_SIZE = len(STAT_FIELDS) + len(SCENE_IDS)
+
+_read_stats = attrgetter(*STAT_FIELDS)
+_SCENE_INDEX = {sid: i for i, sid in enumerate(SCENE_IDS)}
+
+# Default reward for reaching each ending; anything else (including a
+# season cut off by max_steps) scores 0.
+ENDING_REWARDS = {
+    "ENDING: THE BIG LEAP": 1.0,
+    "ENDING: WORKING PRO": 0.7,
+    "ENDING: THE MENTOR'S LINEAGE": 0.6,
+    "ENDING: CULT FAVORITE": 0.5,
+    "ENDING: WALK AWAY HEALTHY": 0.2,
+    "ENDING: RESET SEASON": 0.1,
+    "ENDING: QUIET EXIT": -0.5,
+    "ENDING: TOO MUCH TOO SOON": -0.7,
+    "ENDING: HEADLINE SEASON": -0.8,
+    "ENDING: CAREER HALTED": -1.0,
+}
+
+
+def ending_reward(title: str) -> float:
+    return ENDING_REWARDS.get(title, 0.0)
+
+
+class VectorEnv:
+    def __init__(self, n: int, seed: Optional[int] = None,
+                 reward: Callable[[str], float] = ending_reward, max_steps: int = 100):
+        self.n = n
+        self.reward_fn = reward
+        self.max_steps = max_steps
+        self.scenes = make_scenes()
+        self._seeds = random.Random(seed)
+
+        self.states: List[GameState] = [None] * n
+        self.steps = np.zeros(n, dtype=np.int32)
+        self.obs = np.zeros((n, OBS_SIZE), dtype=np.float32)
+        self.mask = np.zeros((n, N_ACTIONS), dtype=bool)
+        self._masks = {sid: np.arange(N_ACTIONS) < len(s.choices) for sid, s in self.scenes.items()}
+
+    # ---- internals ----
+
+    def _start(self, i: int) -> None:
+        self.states[i] = GameState(seed=self._seeds.randrange(2 ** 32))
+        self.steps[i] = 0
+        self._observe(i)
+
+    def _observe(self, i: int) -> None:
+        gs = self.states[i]
+        row = self.obs[i]
+        row[:len(STAT_FIELDS)] = _read_stats(gs.stats)
+        row[len(STAT_FIELDS):] = 0
+        row[len(STAT_FIELDS) + _SCENE_INDEX[gs.current_scene_id]] = 1
+        self.mask[i] = self._masks[gs.current_scene_id]
+
+    # ---- API ----
+
+    def reset(self, seed: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Start n fresh seasons. Returns (obs, mask); the arrays are reused by step()."""
+        if seed is not None:
+            self._seeds.seed(seed)
+        for i in range(self.n):
+            self._start(i)
+        return self.obs, self.mask
+
+    def step(self, actions) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, Dict[str, list]]:
+        """Apply one action per season. Masked-out actions do nothing."""
+        reward = np.zeros(self.n, dtype=np.float32)
+        done = np.zeros(self.n, dtype=bool)
+        endings: List[Optional[str]] = [None] * self.n
+
+        for i, a in enumerate(np.asarray(actions)):
+            gs = self.states[i]
+            choices = self.scenes[gs.current_scene_id].choices
+            if 0 <= a < len(choices):
+                choices[a].apply_fn(gs)
+            self.steps[i] += 1
+
+            if gs.ended or self.steps[i] >= self.max_steps:
+                done[i] = True
+                endings[i] = gs.ending_title
+                reward[i] = self.reward_fn(gs.ending_title)
+                self._start(i)
+            else:
+                self._observe(i)
+
+        return self.obs, reward, done, self.mask, {"endings": endings}
+
+
+def random_policy(mask: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """A uniformly random valid action per row of mask."""
+    scores = rng.random(mask.shape)
+    scores[~mask] = -1.0
+    return scores.argmax(axis=1)
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+    from collections import Counter
+
+    ap = argparse.ArgumentParser(description="Play random agents through Last Rep, Last Lap in batches.")
+    ap.add_argument("--envs", type=int, default=256)
+    ap.add_argument("--steps", type=int, default=2000)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    env = VectorEnv(args.envs, seed=args.seed)
+    rng = np.random.default_rng(args.seed)
+    obs, mask = env.reset()
+    seen: Counter = Counter()
+    t = time.perf_counter()
+    for _ in range(args.steps):
+        obs, reward, done, mask, info = env.step(random_policy(mask, rng))
+        seen.update(e for e in info["endings"] if e is not None)
+    elapsed = time.perf_counter() - t
+
+    print(f"{args.envs * args.steps / elapsed:,.0f} env steps/sec, {sum(seen.values())} seasons")
+    for title, count in seen.most_common():
+        print(f"  {count:6d}  {title or '(cut off)'}")
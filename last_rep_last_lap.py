@@ -1,14 +1,144 @@
-import curses
+import argparse
+import copy
+import json
+import os
 import random
-from dataclasses import dataclass, field
-from typing import Dict, List, Callable
+import time
+from dataclasses import asdict, dataclass, field, fields
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Callable, Optional, Tuple
+
+try:
+    import curses
+except ImportError:   # only run_game needs it; replays and training envs run headless
+    curses = None
 
 
 # ==========================
 # LAST REP, LAST LAP (ASCII GAME)
 # ==========================
 
-@dataclass
+# --------------------------
+# Balance
+# Every tunable number in the season. A GameState reads them from its
+# params (this table unless another is passed), so balance_sweep.py can
+# play seasons under different values side by side.
+# --------------------------
+
+BALANCE: Dict[str, Any] = {
+    # stat changes per choice
+    "train_hard": {"stamina": -18, "injury": +10, "confidence": +6, "reputation": +2, "agent_interest": +1},
+    "train_smart": {"stamina": -12, "injury": +5, "confidence": +4, "reputation": +1, "mentor_trust": +1},
+    "recovery_day": {"stamina": +16, "injury": -10, "confidence": +1},
+    "take_extra_shift": {"stamina": -8, "injury": +2, "confidence": -1, "cash": +80},
+    "study_tape": {"confidence": +3, "reputation": +1, "tape_study": +2},
+    "risky_supplement": {"stamina": -10, "injury": +8, "confidence": +10, "reputation": +4},
+    "visit_physio": {"stamina": +8, "injury": -18, "confidence": +2, "cash": -40},
+    "meet_mentor": {"confidence": +2, "mentor_trust": +2},
+    "good_deal": {"confidence": +4, "reputation": +6, "cash": +220},
+    "bad_deal": {"confidence": +2, "reputation": +3, "injury": +6, "cash": +160},
+    "decline_deal": {"confidence": +1, "reputation": +1, "mentor_trust": +1},
+    "broke": {"confidence": -2, "injury": +2},
+    "breathe": {"confidence": +3, "stamina": +2},
+    "recovery_sleep": 2,   # sleep debt a recovery day clears (never below 0)
+
+    # weekly upkeep
+    "weekly_cost": 15,
+    "sleep_debt_below_stamina": 35,
+    "sleep_debt_step": 1,
+    "confidence_drift_above": 52,   # confidence drifts 1 a week back into this band
+    "confidence_drift_below": 48,
+    "flare_base": 0.02,
+    "flare_injury_divisor": 200.0,
+    "flare_per_sleep_debt": 0.03,
+    "flare_min_injury": 35,
+
+    # chances
+    "scandal_chance": 0.22,
+    "headline_scandal_chance": 0.65,
+    "gym_chance": 0.55,
+
+    # routing and endings
+    "good_offer_reputation": 35,
+    "good_offer_interest": 2,
+    "clinic_injury": 45,
+    "locker_stamina": 30,
+    "locker_injury": 55,
+    "halt_injury": 90,
+    "quit_confidence": 10,
+    "quit_reputation": 20,
+
+    # showcase
+    "stamina_divisor": 10,
+    "confidence_divisor": 10,
+    "reputation_divisor": 10,
+    "tape_divisor": 3,
+    "injury_divisor": 12,
+    "luck": 2,
+    "big_leap_score": 18,
+    "big_leap_max_injury": 70,
+    "pro_score": 14,
+    "pro_max_injury": 80,
+    "placing_score": 10,
+    "lineage_trust": 3,
+    "too_soon_injury": 75,
+}
+
+
+def tuned(overrides: Dict[str, Any], base: Dict[str, Any] = BALANCE) -> Dict[str, Any]:
+    """A copy of base with dotted keys replaced, e.g. {"train_hard.injury": 8, "weekly_cost": 20}."""
+    table = copy.deepcopy(base)
+    for key, value in overrides.items():
+        *path, last = key.split(".")
+        target = table
+        for part in path:
+            target = target.get(part) if isinstance(target, dict) else None
+        if not isinstance(target, dict) or last not in target:
+            raise KeyError(f"unknown balance parameter {key!r}")
+        target[last] = value
+    return table
+
+
+# --------------------------
+# State
+# One GameState per season. Both dataclasses are slotted, and the
+# message log is a fixed ring of the last LOG_LINES lines, so a season
+# stays small however long it runs and logging never copies.
+# --------------------------
+
+LOG_LINES = 6
+
+
+class RingLog:
+    """The last `size` messages, oldest first when iterated."""
+    __slots__ = ("lines", "count")
+
+    def __init__(self, size: int = LOG_LINES) -> None:
+        self.lines: List[Optional[str]] = [None] * size
+        self.count = 0   # messages ever logged
+
+    def append(self, msg: str) -> None:
+        self.lines[self.count % len(self.lines)] = msg
+        self.count += 1
+
+    def __len__(self) -> int:
+        return min(self.count, len(self.lines))
+
+    def __iter__(self) -> Iterator[str]:
+        size = len(self.lines)
+        if self.count <= size:
+            return iter(self.lines[:self.count])
+        at = self.count % size
+        return iter(self.lines[at:] + self.lines[:at])
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, RingLog) and list(self) == list(other)
+
+    def __repr__(self) -> str:
+        return f"RingLog({list(self)!r})"
+
+
+@dataclass(slots=True)
 class Stats:
     week: int = 1
     stamina: int = 70        # 0-100
@@ -44,22 +174,26 @@ class Scene:
     on_enter: Callable[["GameState"], None] = lambda gs: None
 
 
-@dataclass
+@dataclass(slots=True)
 class GameState:
     stats: Stats = field(default_factory=Stats)
     rng: random.Random = field(default_factory=lambda: random.Random())
     current_scene_id: str = "intro"
-    message_log: List[str] = field(default_factory=list)
+    message_log: RingLog = field(default_factory=RingLog)
     ended: bool = False
     ending_title: str = ""
     ending_lines: List[str] = field(default_factory=list)
     flags: Dict[str, bool] = field(default_factory=dict)
     inventory: List[str] = field(default_factory=list)  # currently unused, but future-proof
+    seed: Optional[int] = None  # when set, rng is seeded from it so the season can be replayed
+    params: Dict[str, Any] = field(default_factory=lambda: BALANCE)  # shared, never modified
+
+    def __post_init__(self) -> None:
+        if self.seed is not None:
+            self.rng.seed(self.seed)
 
     def log(self, msg: str) -> None:
         self.message_log.append(msg)
-        if len(self.message_log) > 6:
-            self.message_log = self.message_log[-6:]
 
 
 # --------------------------
@@ -70,16 +204,40 @@ def clamp(n: int, low: int, high: int) -> int:
     return max(low, min(high, n))
 
 
+CLAMPED = ("stamina", "injury", "confidence", "reputation")   # kept within 0-100
+_STAT_NAMES = frozenset(f.name for f in fields(Stats))
+
+
+@lru_cache(maxsize=4096)   # bounded: a balance sweep can produce any number of distinct deltas
+def compile_delta(items: Tuple[Tuple[str, int], ...]) -> Callable[[Stats], None]:
+    """A function adding one delta to a Stats, built once per distinct delta.
+
+    Only the fields the delta touches are written, and only the clamped
+    ones among them are clamped: every other write to those four keeps
+    them in range already. Unknown keys are ignored.
+    """
+    lines = ["def apply(s):"]
+    for k, v in items:
+        if k not in _STAT_NAMES:
+            continue
+        if k in CLAMPED:
+            lines.append(f"    s.{k} = max(0, min(100, s.{k} + {v!r}))")
+        else:
+            lines.append(f"    s.{k} += {v!r}")
+    lines.append("    pass")
+    namespace: Dict[str, Any] = {}
+    exec("\n".join(lines), namespace)
+    return namespace["apply"]
+
+
 def apply_delta(gs: GameState, **kwargs: int) -> None:
-    s = gs.stats
-    for k, v in kwargs.items():
-        if hasattr(s, k):
-            setattr(s, k, getattr(s, k) + v)
+    compile_delta(tuple(kwargs.items()))(gs.stats)
+
 
-    s.stamina = clamp(s.stamina, 0, 100)
-    s.injury = clamp(s.injury, 0, 100)
-    s.confidence = clamp(s.confidence, 0, 100)
-    s.reputation = clamp(s.reputation, 0, 100)
+def new_season(seed: Optional[int] = None, params: Optional[Dict[str, Any]] = None) -> GameState:
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    return GameState(seed=seed, params=BALANCE if params is None else params)
 
 
 def end_game(gs: GameState, title: str, lines: List[str]) -> None:
@@ -90,26 +248,27 @@ def end_game(gs: GameState, title: str, lines: List[str]) -> None:
 
 def fatigue_tick(gs: GameState) -> None:
     s = gs.stats
+    p = gs.params
 
-    if s.stamina < 35:
-        s.sleep_debt += 1
+    if s.stamina < p["sleep_debt_below_stamina"]:
+        s.sleep_debt += p["sleep_debt_step"]
     else:
-        s.sleep_debt = max(0, s.sleep_debt - 1)
+        s.sleep_debt = max(0, s.sleep_debt - p["sleep_debt_step"])
 
-    flare_chance = 0.02 + (s.injury / 200.0) + (s.sleep_debt * 0.03)
-    if (not s.injury_flag) and gs.rng.random() < flare_chance and s.injury >= 35:
+    flare_chance = p["flare_base"] + (s.injury / p["flare_injury_divisor"]) + (s.sleep_debt * p["flare_per_sleep_debt"])
+    if (not s.injury_flag) and gs.rng.random() < flare_chance and s.injury >= p["flare_min_injury"]:
         s.injury_flag = True
         gs.log("A sharp ache returns. You feel a limit approaching.")
 
-    if s.confidence > 52:
+    if s.confidence > p["confidence_drift_above"]:
         s.confidence -= 1
-    elif s.confidence < 48:
+    elif s.confidence < p["confidence_drift_below"]:
         s.confidence += 1
 
-    s.cash -= 15
+    s.cash -= p["weekly_cost"]
 
     if s.cash < 0:
-        apply_delta(gs, confidence=-2, injury=+2)
+        apply_delta(gs, **p["broke"])
         gs.log("Bills press in. Stress tightens your body.")
 
 
@@ -120,8 +279,9 @@ def advance_week(gs: GameState) -> None:
 
 def check_for_endings(gs: GameState) -> None:
     s = gs.stats
+    p = gs.params
 
-    if s.injury >= 90:
+    if s.injury >= p["halt_injury"]:
         end_game(gs, "ENDING: CAREER HALTED",
                  [
                      "The pain stops being a warning and becomes a wall.",
@@ -131,7 +291,7 @@ def check_for_endings(gs: GameState) -> None:
                  ])
         return
 
-    if s.confidence <= 10 and s.reputation < 20:
+    if s.confidence <= p["quit_confidence"] and s.reputation < p["quit_reputation"]:
         end_game(gs, "ENDING: QUIET EXIT",
                  [
                      "You keep showing up, but something in you stops believing.",
@@ -245,63 +405,62 @@ def make_scenes() -> Dict[str, Scene]:
             return
 
         s = gs.stats
+        p = gs.params
         if s.week == 3:
             gs.current_scene_id = "mentor"
             return
         if s.week == 5:
             gs.current_scene_id = "agent"
             return
-        if s.week == 8 and (s.injury_flag or s.injury >= 45):
+        if s.week == 8 and (s.injury_flag or s.injury >= p["clinic_injury"]):
             gs.current_scene_id = "clinic"
             return
         if s.week >= 10:
             gs.current_scene_id = "showcase"
             return
 
-        if s.stamina < 30 or s.injury >= 55:
+        if s.stamina < p["locker_stamina"] or s.injury >= p["locker_injury"]:
             gs.current_scene_id = "locker"
         else:
-            gs.current_scene_id = "gym" if gs.rng.random() < 0.55 else "track"
+            gs.current_scene_id = "gym" if gs.rng.random() < p["gym_chance"] else "track"
+
+    def goto(scene_id: str) -> Callable[[GameState], None]:
+        """A choice that only changes scene (season_reach.py follows .target)."""
+        def go(gs: GameState) -> None:
+            gs.current_scene_id = scene_id
+        go.target = scene_id
+        return go
+
+    def weekly(delta: str, message: str) -> Callable[[GameState], None]:
+        """A choice whose whole effect is params[delta], then a week passing
+        (season_reach.py reads .delta)."""
+        def choose(gs: GameState) -> None:
+            apply_delta(gs, **gs.params[delta])
+            gs.log(message)
+            advance_week(gs)
+            route_week(gs)
+        choose.__name__ = choose.__qualname__ = delta
+        choose.delta = delta
+        return choose
 
     # Choice effects
-    def train_hard(gs: GameState) -> None:
-        apply_delta(gs, stamina=-18, injury=+10, confidence=+6, reputation=+2)
-        gs.stats.agent_interest += 1
-        gs.log("You push past the comfortable line. It shows.")
-        advance_week(gs)
-        route_week(gs)
-
-    def train_smart(gs: GameState) -> None:
-        apply_delta(gs, stamina=-12, injury=+5, confidence=+4, reputation=+1)
-        gs.stats.mentor_trust += 1
-        gs.log("Clean work. The kind that lasts.")
-        advance_week(gs)
-        route_week(gs)
+    train_hard = weekly("train_hard", "You push past the comfortable line. It shows.")
+    train_smart = weekly("train_smart", "Clean work. The kind that lasts.")
+    take_extra_shift = weekly("take_extra_shift", "You work late. The money helps. The body notices.")
+    study_tape = weekly("study_tape", "You watch yourself like a scientist watches weather.")
+    meet_mentor = weekly("meet_mentor", "Your coach says one sentence that rearranges your week.")
+    decline_deal = weekly("decline_deal", "You walk away from noise, not from the dream.")
 
     def recovery_day(gs: GameState) -> None:
-        apply_delta(gs, stamina=+16, injury=-10, confidence=+1)
-        gs.stats.sleep_debt = max(0, gs.stats.sleep_debt - 2)
+        apply_delta(gs, **gs.params["recovery_day"])
+        gs.stats.sleep_debt = max(0, gs.stats.sleep_debt - gs.params["recovery_sleep"])
         gs.log("You recover on purpose. It feels like strategy.")
         advance_week(gs)
         route_week(gs)
 
-    def take_extra_shift(gs: GameState) -> None:
-        apply_delta(gs, stamina=-8, injury=+2, confidence=-1)
-        gs.stats.cash += 80
-        gs.log("You work late. The money helps. The body notices.")
-        advance_week(gs)
-        route_week(gs)
-
-    def study_tape(gs: GameState) -> None:
-        apply_delta(gs, confidence=+3, reputation=+1)
-        gs.stats.tape_study += 2
-        gs.log("You watch yourself like a scientist watches weather.")
-        advance_week(gs)
-        route_week(gs)
-
     def risky_supplement(gs: GameState) -> None:
-        apply_delta(gs, stamina=-10, injury=+8, confidence=+10, reputation=+4)
-        if gs.rng.random() < 0.22:
+        apply_delta(gs, **gs.params["risky_supplement"])
+        if gs.rng.random() < gs.params["scandal_chance"]:
             gs.stats.scandal_flag = True
         else:
             gs.log("It hits fast. Too fast. You tell yourself it's fine.")
@@ -309,23 +468,16 @@ def make_scenes() -> Dict[str, Scene]:
         route_week(gs)
 
     def visit_physio(gs: GameState) -> None:
-        apply_delta(gs, stamina=+8, injury=-18, confidence=+2)
-        gs.stats.cash -= 40
+        apply_delta(gs, **gs.params["visit_physio"])
         gs.stats.injury_flag = False
         gs.log("Hands, heat, ice. A map back to functional.")
         advance_week(gs)
         route_week(gs)
 
-    def meet_mentor(gs: GameState) -> None:
-        apply_delta(gs, confidence=+2)
-        gs.stats.mentor_trust += 2
-        gs.log("Your coach says one sentence that rearranges your week.")
-        advance_week(gs)
-        route_week(gs)
-
     def meet_agent(gs: GameState) -> None:
         s = gs.stats
-        gs.flags["agent_offer_good"] = (s.reputation >= 35 and s.agent_interest >= 2)
+        gs.flags["agent_offer_good"] = (s.reputation >= gs.params["good_offer_reputation"]
+                                        and s.agent_interest >= gs.params["good_offer_interest"])
         gs.log("An agent studies you like a market that might become a home.")
         advance_week(gs)
         route_week(gs)
@@ -334,40 +486,32 @@ def make_scenes() -> Dict[str, Scene]:
         s = gs.stats
         if gs.flags.get("agent_offer_good", False):
             s.signed_good_deal = True
-            s.cash += 220
-            apply_delta(gs, confidence=+4, reputation=+6)
+            apply_delta(gs, **gs.params["good_deal"])
             gs.log("The contract is fair. You feel seen, not used.")
         else:
             s.signed_bad_deal = True
-            s.cash += 160
-            apply_delta(gs, confidence=+2, reputation=+3, injury=+6)
+            apply_delta(gs, **gs.params["bad_deal"])
             gs.log("Fast money, hidden pressure.")
         advance_week(gs)
         route_week(gs)
 
-    def decline_deal(gs: GameState) -> None:
-        apply_delta(gs, confidence=+1, reputation=+1)
-        gs.stats.mentor_trust += 1
-        gs.log("You walk away from noise, not from the dream.")
-        advance_week(gs)
-        route_week(gs)
-
     def resolve_showcase(gs: GameState) -> None:
         s = gs.stats
+        p = gs.params
         performance = 0
-        performance += int(s.stamina / 10)
-        performance += int(s.confidence / 10)
-        performance += int(s.reputation / 10)
-        performance += int(s.tape_study / 3)
-        performance -= int(s.injury / 12)
+        performance += int(s.stamina / p["stamina_divisor"])
+        performance += int(s.confidence / p["confidence_divisor"])
+        performance += int(s.reputation / p["reputation_divisor"])
+        performance += int(s.tape_study / p["tape_divisor"])
+        performance -= int(s.injury / p["injury_divisor"])
         performance -= s.sleep_debt
-        performance += gs.rng.randint(-2, 2)
+        performance += gs.rng.randint(-p["luck"], p["luck"])
 
         if s.scandal_flag:
             check_for_endings(gs)
             return
 
-        if performance >= 18 and s.injury < 70:
+        if performance >= p["big_leap_score"] and s.injury < p["big_leap_max_injury"]:
             end_game(gs, "ENDING: THE BIG LEAP",
                      [
                          "The arena feels small once you start moving.",
@@ -378,7 +522,7 @@ def make_scenes() -> Dict[str, Scene]:
                      ])
             return
 
-        if performance >= 14 and s.injury < 80:
+        if performance >= p["pro_score"] and s.injury < p["pro_max_injury"]:
             end_game(gs, "ENDING: WORKING PRO",
                      [
                          "You place well. Not mythical, but real.",
@@ -388,8 +532,8 @@ def make_scenes() -> Dict[str, Scene]:
                      ])
             return
 
-        if performance >= 10:
-            if s.mentor_trust >= 3:
+        if performance >= p["placing_score"]:
+            if s.mentor_trust >= p["lineage_trust"]:
                 end_game(gs, "ENDING: THE MENTOR'S LINEAGE",
                          [
                              "You don't win the night, but you win someone's attention.",
@@ -407,7 +551,7 @@ def make_scenes() -> Dict[str, Scene]:
                          ])
             return
 
-        if s.injury >= 75:
+        if s.injury >= p["too_soon_injury"]:
             end_game(gs, "ENDING: TOO MUCH TOO SOON",
                      [
                          "You try to force a body into a story it can't hold.",
@@ -425,6 +569,23 @@ def make_scenes() -> Dict[str, Scene]:
                      "This ending is a beginning if you let it be."
                  ])
 
+    def withdraw(gs: GameState) -> None:
+        end_game(gs, "ENDING: WALK AWAY HEALTHY", [
+            "You withdraw before the moment becomes damage.",
+            "You choose a future with knees that still work.",
+            "",
+            "Some people call it fear.",
+            "You call it wisdom."
+        ])
+
+    def chase_headlines(gs: GameState) -> None:
+        gs.stats.scandal_flag = gs.rng.random() < gs.params["headline_scandal_chance"]
+        resolve_showcase(gs)
+
+    def breathe_then_compete(gs: GameState) -> None:
+        apply_delta(gs, **gs.params["breathe"])
+        resolve_showcase(gs)
+
     # Scenes
     scenes["intro"] = Scene(
         "intro", "The First Week", ART_LOCKER,
@@ -436,10 +597,10 @@ def make_scenes() -> Dict[str, Scene]:
             "Right now, you only have today."
         ],
         [
-            Choice("1", "Go train in the gym (strength day).", lambda gs: setattr(gs, "current_scene_id", "gym")),
-            Choice("2", "Go to the track (speed day).", lambda gs: setattr(gs, "current_scene_id", "track")),
-            Choice("3", "Grab a meal and plan the week (diner).", lambda gs: setattr(gs, "current_scene_id", "diner")),
-            Choice("4", "Sleep. Seriously. (recovery)", lambda gs: setattr(gs, "current_scene_id", "rest_scene")),
+            Choice("1", "Go train in the gym (strength day).", goto("gym")),
+            Choice("2", "Go to the track (speed day).", goto("track")),
+            Choice("3", "Grab a meal and plan the week (diner).", goto("diner")),
+            Choice("4", "Sleep. Seriously. (recovery)", goto("rest_scene")),
         ]
     )
 
@@ -499,9 +660,9 @@ def make_scenes() -> Dict[str, Scene]:
             "You wake up with a quieter mind."
         ],
         [
-            Choice("1", "Return to the gym.", lambda gs: setattr(gs, "current_scene_id", "gym")),
-            Choice("2", "Return to the track.", lambda gs: setattr(gs, "current_scene_id", "track")),
-            Choice("3", "Get food and plan (diner).", lambda gs: setattr(gs, "current_scene_id", "diner")),
+            Choice("1", "Return to the gym.", goto("gym")),
+            Choice("2", "Return to the track.", goto("track")),
+            Choice("3", "Get food and plan (diner).", goto("diner")),
             Choice("4", "Take it as a full recovery week.", recovery_day),
         ]
     )
@@ -579,15 +740,9 @@ def make_scenes() -> Dict[str, Scene]:
         ],
         [
             Choice("1", "Compete. (commit to your season)", resolve_showcase),
-            Choice("2", "Withdraw to protect your body.", lambda gs: end_game(gs, "ENDING: WALK AWAY HEALTHY", [
-                "You withdraw before the moment becomes damage.",
-                "You choose a future with knees that still work.",
-                "",
-                "Some people call it fear.",
-                "You call it wisdom."
-            ])),
-            Choice("3", "Chase headlines: risky shortcut now.", lambda gs: (setattr(gs.stats, "scandal_flag", gs.rng.random() < 0.65), resolve_showcase(gs))),
-            Choice("4", "Breathe, then compete.", lambda gs: (apply_delta(gs, confidence=+3, stamina=+2), resolve_showcase(gs))),
+            Choice("2", "Withdraw to protect your body.", withdraw),
+            Choice("3", "Chase headlines: risky shortcut now.", chase_headlines),
+            Choice("4", "Breathe, then compete.", breathe_then_compete),
         ]
     )
 
@@ -669,7 +824,7 @@ def render_screen(stdscr, gs: GameState, scene: Scene) -> None:
     safe_addstr(stdscr, log_y, 0, "-" * (w - 1))
     safe_addstr(stdscr, log_y + 1, 0, "Recent:")
     ly = log_y + 2
-    for msg in gs.message_log[-3:]:
+    for msg in list(gs.message_log)[-3:]:
         if ly >= h - 1:
             break
         safe_addstr(stdscr, ly, 0, f"• {msg}")
@@ -692,52 +847,197 @@ def render_ending(stdscr, gs: GameState) -> None:
     stdscr.refresh()
 
 
-def run_game(stdscr) -> None:
+# --------------------------
+# Keys
+# --------------------------
+
+def look_again(gs: GameState) -> None:
+    gs.log("You take it in again. The details sharpen.")
+
+
+def check_inventory(gs: GameState) -> None:
+    inv = ", ".join(gs.inventory) if gs.inventory else "(nothing)"
+    gs.log(f"Inventory: {inv}")
+
+
+# Available in every scene, alongside the scene's own numbered choices.
+GLOBAL_CHOICES = [
+    Choice("l", "look", look_again),
+    Choice("i", "inventory", check_inventory),
+]
+
+
+def choice_for_key(scene: Scene, key: int) -> Optional[Choice]:
+    for ch in GLOBAL_CHOICES:
+        if key in (ord(ch.key), ord(ch.key.upper())):
+            return ch
+    for ch in scene.choices:
+        if key == ord(ch.key):
+            return ch
+    return None
+
+
+# --------------------------
+# Recordings
+# --------------------------
+
+@dataclass
+class SeasonRecording:
+    """Seed plus every accepted keypress; enough to replay a season exactly."""
+    seed: int
+    keys: str
+    ending: str = ""
+    stats: Dict[str, object] = field(default_factory=dict)
+
+    def to_json(self) -> str:
+        return json.dumps({"v": 1, "seed": self.seed, "keys": self.keys,
+                           "ending": self.ending, "stats": self.stats},
+                          separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, text: str) -> "SeasonRecording":
+        d = json.loads(text)
+        return cls(d["seed"], d["keys"], d.get("ending", ""), d.get("stats", {}))
+
+
+def save_recording(directory: str, gs: GameState, keys: List[str]) -> str:
+    rec = SeasonRecording(gs.seed, "".join(keys), gs.ending_title, asdict(gs.stats))
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"season-{gs.seed}-{int(time.time() * 1000)}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(rec.to_json() + "\n")
+    return path
+
+
+def run_game(stdscr, stats=None, seed: Optional[int] = None,
+             record_dir: Optional[str] = None, same_seed: bool = False,
+             on_season_end: Optional[Callable[[GameState, List[str]], None]] = None,
+             transcript=None, spectators=None) -> None:
+    """Curses main loop.
+
+    Pass an instrument.CommandStats as stats to time each keypress, seed to
+    fix the first season's rng, and record_dir to save a replayable
+    recording of every season played. same_seed replays seed on every
+    restart, and on_season_end(gs, keys) is called when a season ends.
+    Pass a transcript.Recorder as transcript to record every choice and
+    the log lines it added, and a spectate.Broadcast as spectators to
+    send every screen drawn to its watchers.
+    """
     curses.curs_set(0)
     stdscr.nodelay(False)
     stdscr.keypad(True)
 
+    if stats is not None:
+        stdscr = stats.wrap_screen(stdscr)
+    if spectators is not None:
+        import spectate
+        stdscr = spectate.ScreenTee(stdscr, spectators)
+
+    def render(draw, *args) -> None:
+        # Draws, and if a choice is waiting for its render time, records it.
+        nonlocal pending
+        if pending is None:
+            draw(stdscr, *args)
+            return
+        t = time.perf_counter()
+        draw(stdscr, *args)
+        stats.record(*pending, time.perf_counter() - t, stdscr.take_bytes())
+        pending = None
+
     scenes = make_scenes()
-    gs = GameState()
+    gs = new_season(seed)
+    keys: List[str] = []
+    pending = None  # (verb, parse, logic) waiting for its render time
+    session = transcript.session("lastrep", gs.seed) if transcript is not None else None
 
     while True:
         if gs.ended:
-            render_ending(stdscr, gs)
+            render(render_ending, gs)
             key = stdscr.getch()
             if key in (ord('q'), ord('Q')):
+                if spectators is not None:
+                    spectators.end()
                 return
             if key in (ord('r'), ord('R')):
                 scenes = make_scenes()
-                gs = GameState()
+                gs = new_season(seed if same_seed else None)
+                keys = []
+                if transcript is not None:
+                    session = transcript.session("lastrep", gs.seed)
             continue
 
         scene = scenes[gs.current_scene_id]
-        render_screen(stdscr, gs, scene)
+        render(render_screen, gs, scene)
 
         key = stdscr.getch()
         if key in (ord('q'), ord('Q')):
+            if record_dir and keys:
+                save_recording(record_dir, gs, keys)
+            if session is not None:
+                session.end("QUIT")
+            if spectators is not None:
+                spectators.end()
             return
-        if key in (ord('l'), ord('L')):
-            gs.log("You take it in again. The details sharpen.")
-            continue
-        if key in (ord('i'), ord('I')):
-            inv = ", ".join(gs.inventory) if gs.inventory else "(nothing)"
-            gs.log(f"Inventory: {inv}")
-            continue
 
-        chosen = None
-        for ch in scene.choices:
-            if key == ord(ch.key):
-                chosen = ch
-                break
+        t0 = time.perf_counter() if stats is not None else 0.0
+        chosen = choice_for_key(scene, key)
         if chosen is None:
             continue
 
+        t1 = time.perf_counter() if stats is not None else 0.0
+        logged = gs.message_log.count
         chosen.apply_fn(gs)
+        if stats is not None:
+            pending = (f"{scene.scene_id}:{chosen.key}", t1 - t0, time.perf_counter() - t1)
+        if session is not None:
+            new = gs.message_log.count - logged
+            session.command(f"{scene.scene_id}:{chosen.key}", "\n".join(list(gs.message_log)[-new:] if new else ()))
+
+        keys.append(chosen.key)
+        if gs.ended:
+            if record_dir:
+                save_recording(record_dir, gs, keys)
+            if on_season_end is not None:
+                on_season_end(gs, keys)
+            if session is not None:
+                session.end(gs.ending_title)
 
 
 def main() -> None:
-    curses.wrapper(run_game)
+    ap = argparse.ArgumentParser(description="Last Rep, Last Lap")
+    ap.add_argument("--seed", type=int, help="seed the first season")
+    ap.add_argument("--record", metavar="DIR", help="save a replayable recording of each season")
+    ap.add_argument("--daily", action="store_true", help="play today's shared season (see leaderboard.py)")
+    ap.add_argument("--player", help="with --daily, submit finished seasons to the leaderboard as this name")
+    ap.add_argument("--transcript", metavar="DIR", help="record every choice to compressed transcript files")
+    args = ap.parse_args()
+    if args.daily and args.seed is not None:
+        ap.error("--daily plays the day's shared seed; leave out --seed")
+    if args.player and not args.daily:
+        ap.error("--player needs --daily")
+    recorder = None
+    if args.transcript:
+        import transcript
+        recorder = transcript.Recorder(args.transcript)
+    if not args.daily:
+        curses.wrapper(run_game, seed=args.seed, record_dir=args.record, transcript=recorder)
+        return
+
+    import leaderboard
+    day = leaderboard.today()
+    board = leaderboard.Leaderboard() if args.player else None
+
+    def submit(gs: GameState, keys: List[str]) -> None:
+        if board is not None:
+            board.submit(args.player, SeasonRecording(gs.seed, "".join(keys)), day)
+
+    curses.wrapper(run_game, seed=leaderboard.daily_seed(day), record_dir=args.record,
+                   same_seed=True, on_season_end=submit, transcript=recorder)
+    if board is not None:
+        mine = board.best(args.player, day)
+        if mine is not None:
+            print(f"Daily season {day}: best {mine.score}, rank {mine.rank} of {board.players(day)}")
+        board.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,222 @@
+import argparse
+import datetime
+import hashlib
+import json
+import sqlite3
+import sys
+import time
+from dataclasses import asdict
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+from last_rep_last_lap import GameState, SeasonRecording
+from season_replay import load_recording, replay
+
+# ==========================================
+# LAST REP, LAST LAP — DAILY CHALLENGE LEADERBOARD
+# Everyone playing on the same day gets the same season seed
+# (daily_seed), and finished seasons are ranked by ending, then stats.
+#
+#   python last_rep_last_lap.py --daily --player sam
+#   python leaderboard.py                    # today's top 10
+#   python leaderboard.py --player sam       # sam's best and rank
+#   python leaderboard.py --submit rec.json --player sam
+#
+# A submission is a SeasonRecording (seed + keypresses), replayed here to
+# get its score, so stats cannot simply be typed in.
+#
+# The store is one SQLite file. `best` keeps each player's best season
+# per day, with an index on (day, score) so top-k is an index walk.
+# `counts` keeps how many players hold each score per day; scores are
+# small bounded integers, so a rank is a sum over the few thousand
+# possible scores above it at most, never a scan of every player. A
+# submission is a couple of indexed lookups and writes, O(log n).
+# ==========================================
+
+DEFAULT_DB = ".leaderboard.sqlite3"
+
+# Endings from best to worst; a season's score is its ending tier
+# followed by its stats, so any better ending outranks any stats.
+ENDING_ORDER = [
+    "ENDING: THE BIG LEAP",
+    "ENDING: WORKING PRO",
+    "ENDING: THE MENTOR'S LINEAGE",
+    "ENDING: CULT FAVORITE",
+    "ENDING: WALK AWAY HEALTHY",
+    "ENDING: RESET SEASON",
+    "ENDING: QUIET EXIT",
+    "ENDING: TOO MUCH TOO SOON",
+    "ENDING: HEADLINE SEASON",
+    "ENDING: CAREER HALTED",
+]
+TIER = 1000   # stat_score() is always below this
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS best (
+    day TEXT NOT NULL,
+    player TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    ending TEXT NOT NULL,
+    stats TEXT NOT NULL,
+    keys TEXT NOT NULL,
+    submitted REAL NOT NULL,
+    PRIMARY KEY (day, player)
+);
+CREATE INDEX IF NOT EXISTS best_by_score ON best (day, score DESC, submitted);
+CREATE TABLE IF NOT EXISTS counts (
+    day TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    n INTEGER NOT NULL,
+    PRIMARY KEY (day, score)
+) WITHOUT ROWID;
+"""
+
+
+class Entry(NamedTuple):
+    rank: int
+    player: str
+    score: int
+    ending: str
+    stats: dict
+    submitted: float
+
+
+def today() -> str:
+    return datetime.date.today().isoformat()
+
+
+def daily_seed(day: Optional[str] = None) -> int:
+    """The season seed shared by everyone playing on day (YYYY-MM-DD, default today)."""
+    digest = hashlib.sha256(f"last-rep-daily:{day or today()}".encode()).digest()
+    return int.from_bytes(digest[:4], "big")
+
+
+def stat_score(gs: GameState) -> int:
+    s = gs.stats
+    return 2 * s.reputation + s.confidence + (100 - s.injury) + s.stamina   # 0-500
+
+
+def score(gs: GameState) -> int:
+    if gs.ending_title not in ENDING_ORDER:
+        return stat_score(gs)   # unfinished seasons rank below every ending
+    return (len(ENDING_ORDER) - ENDING_ORDER.index(gs.ending_title)) * TIER + stat_score(gs)
+
+
+class Leaderboard:
+    def __init__(self, path: str = DEFAULT_DB):
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.db.close()
+
+    # ---- writing ----
+
+    def _submit(self, day: str, player: str, rec: SeasonRecording, now: float) -> Tuple[int, bool]:
+        if rec.seed != daily_seed(day):
+            raise ValueError(f"recording seed {rec.seed} is not the seed for {day}")
+        gs = replay(rec)
+        new = score(gs)
+        row = self.db.execute("SELECT score FROM best WHERE day = ? AND player = ?",
+                              (day, player)).fetchone()
+        if row is not None and row[0] >= new:
+            return new, False
+        if row is not None:
+            self.db.execute("UPDATE counts SET n = n - 1 WHERE day = ? AND score = ?", (day, row[0]))
+        self.db.execute("INSERT INTO counts VALUES (?, ?, 1) "
+                        "ON CONFLICT (day, score) DO UPDATE SET n = n + 1", (day, new))
+        self.db.execute("INSERT OR REPLACE INTO best VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (day, player, new, gs.ending_title, json.dumps(asdict(gs.stats)),
+                         "".join(rec.keys), now))
+        return new, True
+
+    def submit(self, player: str, rec: SeasonRecording, day: Optional[str] = None) -> Tuple[int, bool]:
+        """Score rec for player. Returns (score, whether it is the player's new best)."""
+        with self.db:
+            return self._submit(day or today(), player, rec, time.time())
+
+    def submit_many(self, entries: Iterable[Tuple[str, SeasonRecording]], day: Optional[str] = None) -> int:
+        """Submit (player, recording) pairs in one transaction. Returns how many were new bests."""
+        day = day or today()
+        with self.db:
+            return sum(self._submit(day, p, rec, time.time())[1] for p, rec in entries)
+
+    # ---- reading ----
+
+    def rank_of_score(self, value: int, day: Optional[str] = None) -> int:
+        """1 + the number of players with a better best score (ties share a rank)."""
+        (above,) = self.db.execute("SELECT COALESCE(SUM(n), 0) FROM counts WHERE day = ? AND score > ?",
+                                   (day or today(), value)).fetchone()
+        return above + 1
+
+    def players(self, day: Optional[str] = None) -> int:
+        (n,) = self.db.execute("SELECT COALESCE(SUM(n), 0) FROM counts WHERE day = ?",
+                               (day or today(),)).fetchone()
+        return n
+
+    def best(self, player: str, day: Optional[str] = None) -> Optional[Entry]:
+        day = day or today()
+        row = self.db.execute("SELECT player, score, ending, stats, submitted FROM best "
+                              "WHERE day = ? AND player = ?", (day, player)).fetchone()
+        if row is None:
+            return None
+        return Entry(self.rank_of_score(row[1], day), row[0], row[1], row[2], json.loads(row[3]), row[4])
+
+    def top(self, k: int = 10, day: Optional[str] = None) -> List[Entry]:
+        """The k best players, ties in order of submission."""
+        day = day or today()
+        rows = self.db.execute("SELECT player, score, ending, stats, submitted FROM best "
+                               "WHERE day = ? ORDER BY score DESC, submitted LIMIT ?", (day, k)).fetchall()
+        entries, rank, last = [], 0, None
+        for i, (player, value, ending, stats, submitted) in enumerate(rows, 1):
+            if value != last:
+                rank, last = i, value
+            entries.append(Entry(rank, player, value, ending, json.loads(stats), submitted))
+        return entries
+
+
+def print_entries(entries: List[Entry]) -> None:
+    for e in entries:
+        print(f"{e.rank:5d}  {e.player:20s} {e.score:6d}  {e.ending.replace('ENDING: ', '')}")
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Last Rep, Last Lap daily challenge leaderboard.")
+    ap.add_argument("--day", help="YYYY-MM-DD (default today)")
+    ap.add_argument("--db", default=DEFAULT_DB)
+    ap.add_argument("--top", type=int, default=10)
+    ap.add_argument("--player", help="show this player's best, or submit as them")
+    ap.add_argument("--submit", nargs="+", metavar="FILE", help="recordings to submit for --player")
+    args = ap.parse_args(argv)
+    day = args.day or today()
+
+    board = Leaderboard(args.db)
+    try:
+        if args.submit:
+            if not args.player:
+                ap.error("--submit needs --player")
+            for path in args.submit:
+                try:
+                    value, improved = board.submit(args.player, load_recording(path), day)
+                except ValueError as e:
+                    print(f"{path}: {e}")
+                    continue
+                print(f"{path}: {value}{' (new best)' if improved else ''}")
+
+        print(f"Daily season {day} (seed {daily_seed(day)}), {board.players(day)} players")
+        print_entries(board.top(args.top, day))
+        if args.player:
+            mine = board.best(args.player, day)
+            if mine is None:
+                print(f"{args.player} has no season for {day}.")
+            else:
+                print("...")
+                print_entries([mine])
+    finally:
+        board.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,55 @@
+from typing import Dict, List, Optional
+
+# ==========================================
+# ITEM / NPC LOCATOR
+# Reverse index from an item or NPC to where it currently is, so
+# `where <thing>` and solvers don't scan every room.
+#
+# The index is built the first time it is queried and kept up to date
+# from then on by the games' take/gift code. Games that never ask pay
+# nothing, which matters for the very large generated worlds.
+# ==========================================
+
+INVENTORY = "inventory"
+
+
+class Locator:
+    def __init__(self, game):
+        self.game = game
+        self.places: Optional[Dict[str, List[str]]] = None   # thing -> room names / INVENTORY
+
+    def _build(self) -> Dict[str, List[str]]:
+        places: Dict[str, List[str]] = {}
+        for room in self.game.rooms.values():
+            for thing in room.items:
+                places.setdefault(thing, []).append(room.name)
+            for thing in getattr(room, "npcs", ()):
+                places.setdefault(thing, []).append(room.name)
+            for thing in getattr(room, "characters", ()):
+                places.setdefault(thing, []).append(room.name)
+        for thing in self.game.inventory:
+            places.setdefault(thing, []).append(INVENTORY)
+        return places
+
+    def where(self, thing: str) -> List[str]:
+        """Every place thing is right now (usually one); empty if it is nowhere."""
+        if self.places is None:
+            self.places = self._build()
+        return self.places.get(thing, [])
+
+    def add(self, thing: str, place: str) -> None:
+        if self.places is not None:
+            self.places.setdefault(thing, []).append(place)
+
+    def remove(self, thing: str, place: str) -> None:
+        if self.places is None:
+            return
+        found = self.places.get(thing)
+        if found and place in found:
+            found.remove(place)
+            if not found:
+                del self.places[thing]
+
+    def move(self, thing: str, src: str, dst: str) -> None:
+        self.remove(thing, src)
+        self.add(thing, dst)
@@ -0,0 +1,72 @@
+from functools import lru_cache
+from typing import FrozenSet, Iterable, List, Tuple
+
+# ==========================================
+# FUZZY NOUN RESOLUTION
+# Lets `take wick`, `use oil` or `talk clock` find "dry wick", "oil flask"
+# and "clockmaker", and forgives small typos like `take kettel`.
+#
+# Each noun's words and trigrams are computed once and cached for the
+# whole process (every session of every world shares them). A lookup
+# only scores the handful of nouns the player can currently see, so it
+# costs the same in a 15-room world as in a million-room one.
+# ==========================================
+
+# Minimum Dice similarity between trigram sets for a typo match.
+MIN_SIMILARITY = 0.45
+# Typo matches scoring within this of the best are treated as ambiguous.
+TIE_MARGIN = 0.1
+
+
+def _grams(text: str) -> FrozenSet[str]:
+    padded = f" {text} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+@lru_cache(maxsize=1 << 16)
+def features(noun: str) -> Tuple[Tuple[str, ...], FrozenSet[str]]:
+    return tuple(noun.split()), _grams(noun)
+
+
+def _prefixes_words(query_words, noun_words) -> bool:
+    """Every query word starts a different word of the noun."""
+    free = list(noun_words)
+    for q in query_words:
+        for i, w in enumerate(free):
+            if w.startswith(q):
+                del free[i]
+                break
+        else:
+            return False
+    return True
+
+
+def resolve(query: str, candidates: Iterable[str]) -> List[str]:
+    """Candidates query could mean: one for a clear match, several if ambiguous, none if nothing fits."""
+    candidates = list(dict.fromkeys(candidates))
+    query = " ".join(query.split())
+    if not query:
+        return []
+    if query in candidates:
+        return [query]
+
+    words = query.split()
+    hits = [c for c in candidates if _prefixes_words(words, features(c)[0])]
+    if hits:
+        return hits
+
+    grams = _grams(query)
+    scored = []
+    for c in candidates:
+        other = features(c)[1]
+        scored.append((2 * len(grams & other) / (len(grams) + len(other)), c))
+    best = max((s for s, _ in scored), default=0.0)
+    if best < MIN_SIMILARITY:
+        return []
+    return [c for s, c in scored if s >= best - TIE_MARGIN]
+
+
+def either(names: List[str]) -> str:
+    """'the a, the b or the c'"""
+    names = [f"the {n}" for n in names]
+    return names[0] if len(names) == 1 else ", ".join(names[:-1]) + " or " + names[-1]
@@ -0,0 +1,92 @@
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+# ==========================================
+# ROUTE INDEX
+# Shortest paths between rooms over usable exits (exits that are not
+# also in locked_exits), for the parser games' `travel` command.
+#
+# The all-pairs table is filled in one source row at a time, on the first
+# travel from that room, and patched in place when an exit opens. After
+# that a route query only walks back along the stored predecessors, so it
+# costs O(path length) however large the world is. Rows are keyed by room
+# name so they don't pin Room objects that a paged world wants to evict.
+# ==========================================
+
+
+def open_exits(room):
+    locked = room.locked_exits
+    for d, target in room.exits.items():
+        if d not in locked:
+            yield d, target
+
+
+class RouteIndex:
+    def __init__(self, rooms):
+        self.rooms = rooms
+        # source name -> {room name: (distance, previous room name, direction taken)}
+        self.rows: Dict[str, Dict[str, Tuple[int, Optional[str], Optional[str]]]] = {}
+        self._by_lower_name: Optional[Dict[str, object]] = None
+
+    def find(self, name: str):
+        """Room called name, ignoring case, or None."""
+        search = getattr(self.rooms, "find", None)
+        if search is not None:
+            # Stores too big to scan (worldstore.MappedWorld) index names themselves.
+            return search(name)
+        room = self.rooms.get(name)
+        if room is not None:
+            return room
+        if self._by_lower_name is None:
+            self._by_lower_name = {n.lower(): r for n, r in self.rooms.items()}
+        return self._by_lower_name.get(name.lower())
+
+    def _row(self, src):
+        row = self.rows.get(src.name)
+        if row is None:
+            row = {src.name: (0, None, None)}
+            self._spread(row, deque([src]))
+            self.rows[src.name] = row
+        return row
+
+    @staticmethod
+    def _spread(row, queue) -> None:
+        while queue:
+            room = queue.popleft()
+            dist = row[room.name][0] + 1
+            for d, target in open_exits(room):
+                known = row.get(target.name)
+                if known is None or known[0] > dist:
+                    row[target.name] = (dist, room.name, d)
+                    queue.append(target)
+
+    def route(self, src, dst) -> Optional[List[str]]:
+        """Directions leading from src to dst, or None if dst can't be reached."""
+        row = self._row(src)
+        if dst.name not in row:
+            return None
+        path = []
+        name = dst.name
+        while name != src.name:
+            _, name, d = row[name]
+            path.append(d)
+        path.reverse()
+        return path
+
+    def exit_opened(self, room, direction: str) -> None:
+        """room's exit in direction just became usable: shorten every cached row it helps."""
+        target = room.exits.get(direction)
+        if target is None or direction in room.locked_exits:
+            return
+        for row in self.rows.values():
+            if room.name not in row:
+                continue
+            dist = row[room.name][0] + 1
+            known = row.get(target.name)
+            if known is None or known[0] > dist:
+                row[target.name] = (dist, room.name, direction)
+                self._spread(row, deque([target]))
+
+    def clear(self) -> None:
+        """Forget every cached row (for changes that close or redirect an exit)."""
+        self.rows.clear()
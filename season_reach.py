@@ -0,0 +1,408 @@
+import argparse
+import sys
+import time
+from collections import deque
+from dataclasses import dataclass, field, fields
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+from last_rep_last_lap import BALANCE, CLAMPED, Stats, make_scenes
+
+# ==========================================
+# LAST REP, LAST LAP — SCENE REACHABILITY
+# Which (week, scene) pairs a season can reach, the range of every stat
+# on arrival, and where each choice can lead, worked out without playing.
+#
+# Each pair holds a Box: an interval per number stat and a set of possible
+# values per flag. Choices move boxes through the same deltas, weekly
+# upkeep and routing rules as the game (read from BALANCE), splitting
+# where a rule branches and joining where paths meet, until nothing grows.
+# A choice made with weekly() is just its delta; the few others are
+# modelled here by name, and analyze() refuses to run if the game has a
+# choice it doesn't recognise.
+# The ranges over-approximate: every real season lies inside them, but
+# not every point inside is reachable.
+#
+#   python season_reach.py [--dot season.dot]
+# ==========================================
+
+INTS = [f.name for f in fields(Stats) if f.type in (int, "int") and f.name != "week"]
+BOOLS = [f.name for f in fields(Stats) if f.type in (bool, "bool")] + ["agent_offer_good"]
+SHOWCASE = "showcase"
+
+Node = Tuple[int, str]   # (week, scene id)
+
+
+@dataclass
+class Box:
+    ints: Dict[str, Tuple[int, int]]
+    bools: Dict[str, FrozenSet[bool]]
+
+    @classmethod
+    def start(cls) -> "Box":
+        s = Stats()
+        return cls({k: (getattr(s, k),) * 2 for k in INTS},
+                   {k: frozenset([bool(getattr(s, k, False))]) for k in BOOLS})
+
+    def copy(self) -> "Box":
+        return Box(dict(self.ints), dict(self.bools))
+
+    def join(self, other: "Box") -> "Box":
+        return Box({k: (min(lo, other.ints[k][0]), max(hi, other.ints[k][1])) for k, (lo, hi) in self.ints.items()},
+                   {k: v | other.bools[k] for k, v in self.bools.items()})
+
+    def lo(self, k: str) -> int:
+        return self.ints[k][0]
+
+    def hi(self, k: str) -> int:
+        return self.ints[k][1]
+
+    def can(self, k: str, value: bool) -> bool:
+        return value in self.bools[k]
+
+    def add(self, **delta: int) -> "Box":
+        b = self.copy()
+        for k, v in delta.items():
+            lo, hi = b.ints[k]
+            b.ints[k] = (lo + v, hi + v)
+        for k in CLAMPED:
+            lo, hi = b.ints[k]
+            b.ints[k] = (max(0, min(100, lo)), max(0, min(100, hi)))
+        return b
+
+    def with_ints(self, **ranges: Tuple[int, int]) -> "Box":
+        b = self.copy()
+        b.ints.update(ranges)
+        return b
+
+    def with_bools(self, **values) -> "Box":
+        b = self.copy()
+        b.bools.update({k: frozenset(v) for k, v in values.items()})
+        return b
+
+
+def _hull(*ranges: Tuple[int, int]) -> Tuple[int, int]:
+    return min(r[0] for r in ranges), max(r[1] for r in ranges)
+
+
+# --------------------------
+# Game rules on boxes
+# --------------------------
+
+def fatigue_tick(b: Box, p) -> Box:
+    sd_options = []
+    if b.lo("stamina") < p["sleep_debt_below_stamina"]:
+        step = p["sleep_debt_step"]
+        sd_options.append((b.lo("sleep_debt") + step, b.hi("sleep_debt") + step))
+    if b.hi("stamina") >= p["sleep_debt_below_stamina"]:
+        step = p["sleep_debt_step"]
+        sd_options.append((max(0, b.lo("sleep_debt") - step), max(0, b.hi("sleep_debt") - step)))
+    b = b.with_ints(sleep_debt=_hull(*sd_options))
+
+    if b.can("injury_flag", False) and b.hi("injury") >= p["flare_min_injury"]:
+        b = b.with_bools(injury_flag=b.bools["injury_flag"] | {True})
+
+    def drift(c):
+        return c - 1 if c > p["confidence_drift_above"] else c + 1 if c < p["confidence_drift_below"] else c
+    b = b.with_ints(confidence=(drift(b.lo("confidence")), drift(b.hi("confidence"))))
+
+    b = b.add(cash=-p["weekly_cost"])
+    if b.lo("cash") < 0:
+        broke = b.add(**p["broke"])
+        b = broke if b.hi("cash") < 0 else b.join(broke)
+    return b
+
+
+def check_for_endings(b: Box, p, endings: Set[str]) -> Optional[Box]:
+    """Add the endings b could hit; return the part of b that carries on, if any."""
+    if b.hi("injury") >= p["halt_injury"]:
+        endings.add("ENDING: CAREER HALTED")
+        if b.lo("injury") >= p["halt_injury"]:
+            return None
+        b = b.with_ints(injury=(b.lo("injury"), p["halt_injury"] - 1))
+    if b.lo("confidence") <= p["quit_confidence"] and b.lo("reputation") < p["quit_reputation"]:
+        endings.add("ENDING: QUIET EXIT")
+        if b.hi("confidence") <= p["quit_confidence"] and b.hi("reputation") < p["quit_reputation"]:
+            return None
+    if b.can("scandal_flag", True):
+        endings.add("ENDING: HEADLINE SEASON")
+        if not b.can("scandal_flag", False):
+            return None
+        b = b.with_bools(scandal_flag={False})
+    return b
+
+
+def route_week(b: Box, week: int, p, endings: Set[str]) -> List[Tuple[str, Box]]:
+    b = check_for_endings(b, p, endings)
+    if b is None:
+        return []
+    if week == 3:
+        return [("mentor", b)]
+    if week == 5:
+        return [("agent", b)]
+    out = []
+    if week == 8:
+        if b.can("injury_flag", True) or b.hi("injury") >= p["clinic_injury"]:
+            out.append(("clinic", b))
+        if not (b.can("injury_flag", False) and b.lo("injury") < p["clinic_injury"]):
+            return out
+        b = b.with_bools(injury_flag={False}).with_ints(injury=(b.lo("injury"), min(b.hi("injury"), p["clinic_injury"] - 1)))
+    if week >= 10:
+        return out + [(SHOWCASE, b)]
+
+    if b.lo("stamina") < p["locker_stamina"] or b.hi("injury") >= p["locker_injury"]:
+        out.append(("locker", b))
+    if b.hi("stamina") >= p["locker_stamina"] and b.lo("injury") < p["locker_injury"]:
+        rest = b.with_ints(stamina=(max(b.lo("stamina"), p["locker_stamina"]), b.hi("stamina")),
+                           injury=(b.lo("injury"), min(b.hi("injury"), p["locker_injury"] - 1)))
+        if p["gym_chance"] > 0:
+            out.append(("gym", rest))
+        if p["gym_chance"] < 1:
+            out.append(("track", rest))
+    return out
+
+
+def _recovery_day(b: Box, p) -> List[Box]:
+    b = b.add(**p["recovery_day"])
+    sleep = p["recovery_sleep"]
+    return [b.with_ints(sleep_debt=(max(0, b.lo("sleep_debt") - sleep), max(0, b.hi("sleep_debt") - sleep)))]
+
+
+def _risky_supplement(b: Box, p) -> List[Box]:
+    b = b.add(**p["risky_supplement"])
+    if p["scandal_chance"] > 0:
+        b = b.with_bools(scandal_flag=b.bools["scandal_flag"] | {True})
+    return [b]
+
+
+def _visit_physio(b: Box, p) -> List[Box]:
+    return [b.add(**p["visit_physio"]).with_bools(injury_flag={False})]
+
+
+def _meet_agent(b: Box, p) -> List[Box]:
+    rep, interest = p["good_offer_reputation"], p["good_offer_interest"]
+    offer = set()
+    if b.hi("reputation") >= rep and b.hi("agent_interest") >= interest:
+        offer.add(True)
+    if b.lo("reputation") < rep or b.lo("agent_interest") < interest:
+        offer.add(False)
+    return [b.with_bools(agent_offer_good=offer)]
+
+
+def _sign_deal(b: Box, p) -> List[Box]:
+    out = []
+    if b.can("agent_offer_good", True):
+        out.append(b.add(**p["good_deal"]).with_bools(signed_good_deal={True}))
+    if b.can("agent_offer_good", False):
+        out.append(b.add(**p["bad_deal"]).with_bools(signed_bad_deal={True}))
+    return out
+
+
+# Weekly choices that do more than apply a BALANCE delta (those carry
+# .delta, see weekly() in the game), by function name.
+CHOICES = {
+    "recovery_day": _recovery_day,
+    "risky_supplement": _risky_supplement,
+    "visit_physio": _visit_physio,
+    "meet_agent": _meet_agent,
+    "sign_deal": _sign_deal,
+}
+SHOWCASE_CHOICES = {"resolve_showcase", "withdraw", "breathe_then_compete", "chase_headlines"}
+
+
+def check_choices(scenes) -> None:
+    """ValueError naming every choice this module can't model, before any work is done."""
+    unknown = []
+    for sid, scene in scenes.items():
+        for ch in scene.choices:
+            fn = ch.apply_fn
+            if hasattr(fn, "target") or hasattr(fn, "delta"):
+                continue
+            if fn.__name__ not in (SHOWCASE_CHOICES if sid == SHOWCASE else CHOICES):
+                unknown.append(f"{sid}:{ch.key} ({fn.__name__})")
+    if unknown:
+        raise ValueError(f"season_reach.py doesn't know what these choices do: {', '.join(unknown)}")
+
+
+def choice_effects(fn, b: Box, p) -> List[Box]:
+    """Boxes after a weekly choice's own effect, before the week advances."""
+    delta = getattr(fn, "delta", None)
+    if delta is not None:
+        return [b.add(**p[delta])]
+    return CHOICES[fn.__name__](b, p)
+
+
+def showcase_endings(name: str, b: Box, p) -> Set[str]:
+    if name not in SHOWCASE_CHOICES:
+        raise ValueError(f"season_reach.py doesn't know what {name} does")
+    if name == "withdraw":
+        return {"ENDING: WALK AWAY HEALTHY"}
+    if name == "breathe_then_compete":
+        b = b.add(**p["breathe"])
+    elif name == "chase_headlines":
+        chance = p["headline_scandal_chance"]
+        b = b.with_bools(scandal_flag={v for v, ok in ((True, chance > 0), (False, chance < 1)) if ok})
+
+    endings: Set[str] = set()
+    if b.can("scandal_flag", True):
+        check_for_endings(b.with_bools(scandal_flag={True}), p, endings)
+    if not b.can("scandal_flag", False):
+        return endings
+
+    def perf(pick):
+        return (int(pick("stamina") / p["stamina_divisor"]) + int(pick("confidence") / p["confidence_divisor"])
+                + int(pick("reputation") / p["reputation_divisor"]) + int(pick("tape_study") / p["tape_divisor"]))
+    lo = perf(b.lo) - int(b.hi("injury") / p["injury_divisor"]) - b.hi("sleep_debt") - p["luck"]
+    hi = perf(b.hi) - int(b.lo("injury") / p["injury_divisor"]) - b.lo("sleep_debt") + p["luck"]
+
+    if hi >= p["big_leap_score"] and b.lo("injury") < p["big_leap_max_injury"]:
+        endings.add("ENDING: THE BIG LEAP")
+    if hi >= p["pro_score"] and b.lo("injury") < p["pro_max_injury"]:
+        endings.add("ENDING: WORKING PRO")
+    if hi >= p["placing_score"]:
+        if b.hi("mentor_trust") >= p["lineage_trust"]:
+            endings.add("ENDING: THE MENTOR'S LINEAGE")
+        if b.lo("mentor_trust") < p["lineage_trust"]:
+            endings.add("ENDING: CULT FAVORITE")
+    if lo < p["placing_score"]:
+        if b.hi("injury") >= p["too_soon_injury"]:
+            endings.add("ENDING: TOO MUCH TOO SOON")
+        if b.lo("injury") < p["too_soon_injury"]:
+            endings.add("ENDING: RESET SEASON")
+    return endings
+
+
+# --------------------------
+# Propagation
+# --------------------------
+
+@dataclass
+class Reach:
+    boxes: Dict[Node, Box] = field(default_factory=dict)
+    # node -> choice key -> successor nodes and ending titles
+    edges: Dict[Node, Dict[str, Set[object]]] = field(default_factory=dict)
+
+    def unreached_scenes(self) -> List[str]:
+        seen = {scene for _, scene in self.boxes}
+        return [sid for sid in make_scenes() if sid not in seen]
+
+
+def analyze(params=BALANCE) -> Reach:
+    scenes = make_scenes()
+    check_choices(scenes)
+    reach = Reach()
+    start = (1, "intro")
+    reach.boxes[start] = Box.start()
+    work = deque([start])
+
+    def arrive(node: Node, box: Box) -> None:
+        old = reach.boxes.get(node)
+        new = box if old is None else old.join(box)
+        if old is None or new != old:
+            reach.boxes[node] = new
+            work.append(node)
+
+    while work:
+        node = work.popleft()
+        week, sid = node
+        box = reach.boxes[node]
+        out = reach.edges.setdefault(node, {})
+        for ch in scenes[sid].choices:
+            fn = ch.apply_fn
+            targets = out.setdefault(ch.key, set())
+            target = getattr(fn, "target", None)
+            if target is not None:
+                targets.add((week, target))
+                arrive((week, target), box)
+                continue
+            if sid == SHOWCASE:
+                targets.update(showcase_endings(fn.__name__, box, params))
+                continue
+            endings: Set[str] = set()
+            for after in choice_effects(fn, box, params):
+                after = fatigue_tick(after, params)
+                for next_sid, next_box in route_week(after, week + 1, params, endings):
+                    targets.add((week + 1, next_sid))
+                    arrive((week + 1, next_sid), next_box)
+            targets.update(endings)
+    return reach
+
+
+# --------------------------
+# Output
+# --------------------------
+
+SHORT = {"stamina": "STA", "injury": "INJ", "confidence": "CON", "reputation": "REP", "cash": "$",
+         "sleep_debt": "DEBT", "mentor_trust": "TRUST", "agent_interest": "AGENT", "tape_study": "TAPE"}
+
+
+def _ranges(box: Box) -> str:
+    parts = []
+    for k, short in SHORT.items():
+        lo, hi = box.ints[k]
+        parts.append(f"{short} {lo}" if lo == hi else f"{short} {lo}..{hi}")
+    return "  ".join(parts)
+
+
+def _order(reach: Reach) -> List[Node]:
+    scene_order = {sid: i for i, sid in enumerate(make_scenes())}
+    return sorted(reach.boxes, key=lambda n: (n[0], scene_order[n[1]]))
+
+
+def _label(target) -> str:
+    if isinstance(target, tuple):
+        return f"w{target[0]:02d} {target[1]}"
+    return target.replace("ENDING: ", "")
+
+
+def print_table(reach: Reach) -> None:
+    scenes = make_scenes()
+    for node in _order(reach):
+        print(f"w{node[0]:02d} {node[1]:10s}  {_ranges(reach.boxes[node])}")
+        for ch in scenes[node[1]].choices:
+            targets = sorted(reach.edges[node][ch.key], key=lambda t: (not isinstance(t, tuple), str(t)))
+            print(f"      [{ch.key}] {ch.label[:40]:40s} -> {', '.join(_label(t) for t in targets)}")
+    unreached = reach.unreached_scenes()
+    print("\nScenes never reached (their choices are dead):", ", ".join(unreached) if unreached else "none")
+
+
+def to_dot(reach: Reach) -> str:
+    lines = ["digraph season {", "  rankdir=LR;", "  node [shape=box, fontname=monospace];"]
+    ids = {n: f"w{n[0]}_{n[1]}" for n in reach.boxes}
+    endings = sorted({t for out in reach.edges.values() for ts in out.values() for t in ts if not isinstance(t, tuple)})
+    for node in _order(reach):
+        ranges = _ranges(reach.boxes[node]).replace("  ", "\\n")
+        lines.append(f'  {ids[node]} [label="week {node[0]} {node[1]}\\n{ranges}"];')
+    for i, title in enumerate(endings):
+        lines.append(f'  end{i} [label="{_label(title)}", shape=doubleoctagon];')
+    end_ids = {t: f"end{i}" for i, t in enumerate(endings)}
+    for node in _order(reach):
+        by_target: Dict[object, List[str]] = {}
+        for key, targets in reach.edges[node].items():
+            for t in targets:
+                by_target.setdefault(t, []).append(key)
+        for t, keys in by_target.items():
+            dest = ids[t] if isinstance(t, tuple) else end_ids[t]
+            lines.append(f'  {ids[node]} -> {dest} [label="{",".join(sorted(keys))}"];')
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Reachable (week, scene) pairs and stat ranges in Last Rep, Last Lap.")
+    ap.add_argument("--dot", metavar="FILE", help="also write the transition graph as Graphviz DOT")
+    args = ap.parse_args(argv)
+
+    t = time.perf_counter()
+    reach = analyze()
+    elapsed = time.perf_counter() - t
+
+    print_table(reach)
+    print(f"\n{len(reach.boxes)} (week, scene) pairs in {elapsed * 1000:.1f} ms")
+    if args.dot:
+        with open(args.dot, "w", encoding="utf-8") as f:
+            f.write(to_dot(reach))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
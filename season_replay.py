@@ -0,0 +1,80 @@
+import argparse
+import glob
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from typing import Iterator, List, Optional, Tuple
+
+from last_rep_last_lap import (GameState, SeasonRecording, choice_for_key,
+                               make_scenes)
+
+# ==========================================
+# LAST REP, LAST LAP — HEADLESS REPLAY
+# Re-runs recordings made with `last_rep_last_lap.py --record DIR` and
+# checks the final stats and ending against what was recorded.
+#
+#   python season_replay.py DIR [--workers N]
+# ==========================================
+
+
+def load_recording(path: str) -> SeasonRecording:
+    with open(path, encoding="utf-8") as f:
+        return SeasonRecording.from_json(f.read())
+
+
+def replay(rec: SeasonRecording) -> GameState:
+    scenes = make_scenes()
+    gs = GameState(seed=rec.seed)
+    for k in rec.keys:
+        if gs.ended:
+            break
+        chosen = choice_for_key(scenes[gs.current_scene_id], ord(k))
+        if chosen is not None:
+            chosen.apply_fn(gs)
+    return gs
+
+
+def verify(rec: SeasonRecording) -> List[str]:
+    """Replay rec and describe every way the result differs from the recording."""
+    gs = replay(rec)
+    problems = []
+    if gs.ending_title != rec.ending:
+        problems.append(f"ending {gs.ending_title!r} != recorded {rec.ending!r}")
+    for name, value in asdict(gs.stats).items():
+        if name in rec.stats and rec.stats[name] != value:
+            problems.append(f"{name} {value!r} != recorded {rec.stats[name]!r}")
+    return problems
+
+
+def verify_path(path: str) -> Tuple[str, List[str]]:
+    return path, verify(load_recording(path))
+
+
+def verify_dir(directory: str, workers: Optional[int] = None) -> Iterator[Tuple[str, List[str]]]:
+    paths = sorted(glob.glob(os.path.join(directory, "*.json")))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(verify_path, paths, chunksize=64)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Replay Last Rep, Last Lap recordings.")
+    ap.add_argument("directory")
+    ap.add_argument("--workers", type=int, help="process pool size (default: CPU count)")
+    args = ap.parse_args(argv)
+
+    total = failed = 0
+    for path, problems in verify_dir(args.directory, args.workers):
+        total += 1
+        if problems:
+            failed += 1
+            print(f"FAIL {path}")
+            for p in problems:
+                print(f"  {p}")
+
+    print(f"{total - failed}/{total} recordings replayed identically.")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
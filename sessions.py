@@ -0,0 +1,316 @@
+import contextlib
+import io
+import pickle
+import sqlite3
+import sys
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+import spectate
+import transcript
+from games import PARSER_GAMES
+
+# ==========================================
+# SESSION MANAGER
+# Hosts many parser game sessions at once while keeping only the recently
+# active ones in memory:
+#
+#   mgr = SessionManager("sessions.sqlite3", capacity=1000, ttl=600)
+#   sid = mgr.create("vault")
+#   text, over = mgr.handle(sid, "take void lens")
+#
+# Resident games sit in an OrderedDict in least-recently-used order. When
+# there are more than `capacity` of them, or the oldest has been idle for
+# `ttl` seconds, it is pickled into a SQLite table and dropped. The next
+# command for an evicted session loads it back first; a Game unpickles in
+# about a tenth of a millisecond. Because the dict is in use order, the
+# idle check only ever looks at its front.
+#
+# Per-instance wrappers (transcript.attach, softlock.watch, ...) are
+# closures and cannot be pickled, so they are removed before a game is
+# stored, along with the tab completer. Transcripts and spectators are
+# built in: pass recorder= and spectators=True. A stored session keeps
+# its transcript id in its row and carries on the same transcript when
+# loaded. Its Broadcast stays in memory only while someone is watching;
+# an unwatched one is dropped on eviction (or, once its last watcher
+# leaves, by sweep()) and a fresh one is made when the game is loaded.
+# Pass on_load to put any other hooks back whenever a game is created or
+# loaded.
+# ==========================================
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    game TEXT NOT NULL,
+    state BLOB NOT NULL,
+    saved REAL NOT NULL,
+    transcript TEXT
+)
+"""
+
+WRAPPED = ("handle", "command", "resolve")   # methods the tools replace per instance
+UNSTORED = WRAPPED + ("completer",)          # left out of stored games
+
+
+class Resident:
+    __slots__ = ("name", "game", "last_used", "transcript")
+
+    def __init__(self, name: str, game, last_used: float, session: Optional[transcript.Session] = None):
+        self.name = name
+        self.game = game
+        self.last_used = last_used
+        self.transcript = session
+
+
+class SessionManager:
+    def __init__(self, path: str = ":memory:", capacity: int = 1000, ttl: Optional[float] = 600.0,
+                 recorder: Optional[transcript.Recorder] = None, spectators: bool = False,
+                 on_load: Optional[Callable[[str, object], None]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.capacity = capacity
+        self.ttl = ttl
+        self.recorder = recorder
+        self.on_load = on_load
+        self.clock = clock
+        self.resident: "OrderedDict[str, Resident]" = OrderedDict()
+        # Resident sessions, and stored ones that someone is still watching.
+        self.broadcasts: Optional[Dict[str, spectate.Broadcast]] = {} if spectators else None
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(SCHEMA)
+        self._lock = threading.RLock()   # games print to the shared sys.stdout, so one command at a time
+        self.evictions = 0
+        self.loads = 0
+        self.load_seconds = 0.0
+
+    # ---- sessions ----
+
+    def create(self, name: str) -> str:
+        sid = uuid.uuid4().hex
+        with self._lock:
+            game = PARSER_GAMES[name].Game()
+            session = None
+            if self.recorder is not None:
+                session = transcript.attach(game, self.recorder, name)
+            if self.broadcasts is not None:
+                self.broadcasts[sid] = spectate.attach(game)
+            if self.on_load is not None:
+                self.on_load(sid, game)
+            self.resident[sid] = Resident(name, game, self.clock(), session)
+            self._evict()
+        return sid
+
+    def get(self, sid: str):
+        """The session's Game, loaded back into memory if it was evicted. KeyError if unknown."""
+        with self._lock:
+            r = self._touch(sid)
+            self._evict()
+            return r.game
+
+    def broadcast(self, sid: str) -> spectate.Broadcast:
+        """The session's Broadcast, loading the session back if it was stored
+        unwatched. KeyError if unknown; needs spectators=True."""
+        if self.broadcasts is None:
+            raise ValueError("SessionManager was created without spectators=True")
+        with self._lock:
+            bc = self.broadcasts.get(sid)
+            if bc is None:
+                self._touch(sid)
+                bc = self.broadcasts[sid]
+                self._evict()
+            return bc
+
+    def handle(self, sid: str, line: str) -> Tuple[str, bool]:
+        """Run line in the session. Returns (what it printed, whether the session is over).
+
+        A session that ends is removed. So is one whose game raised, since
+        its state can no longer be trusted: the traceback goes to stderr
+        and whatever the line printed first is still returned.
+        """
+        with self._lock:
+            r = self._touch(sid)
+            out = io.StringIO()
+            ending = None
+            try:
+                with contextlib.redirect_stdout(out):
+                    r.game.handle(line)
+            except SystemExit:
+                ending = r.game.ending or "QUIT"
+            except Exception:
+                traceback.print_exc()
+                ending = "ERROR"
+            if ending is not None:
+                self.close(sid, ending)
+            self._evict()
+            return out.getvalue(), ending is not None
+
+    def close(self, sid: str, ending: str = "QUIT") -> None:
+        """Forget the session, ending its transcript and broadcast (if they haven't ended)."""
+        with self._lock:
+            r = self.resident.pop(sid, None)
+            session = r.transcript if r is not None else None
+            if r is None and self.recorder is not None:
+                row = self.db.execute("SELECT transcript FROM sessions WHERE id = ?", (sid,)).fetchone()
+                if row is not None and row[0] is not None:
+                    session = transcript.Session(self.recorder, row[0])
+            with self.db:
+                self.db.execute("DELETE FROM sessions WHERE id = ?", (sid,))
+            if session is not None:
+                session.end(ending)
+            if self.broadcasts is not None:
+                bc = self.broadcasts.pop(sid, None)
+                if bc is not None:
+                    bc.end()
+
+    def __contains__(self, sid: str) -> bool:
+        with self._lock:
+            return sid in self.resident or self._stored(sid) is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            (stored,) = self.db.execute("SELECT COUNT(*) FROM sessions").fetchone()
+            return stored + len(self.resident)
+
+    # ---- eviction ----
+
+    def _touch(self, sid: str) -> Resident:
+        r = self.resident.get(sid)
+        if r is None:
+            r = self._load(sid)
+            self.resident[sid] = r
+        else:
+            self.resident.move_to_end(sid)
+        r.last_used = self.clock()
+        return r
+
+    def _evict(self) -> None:
+        """Store least recently used games while there are too many or they have sat idle too long."""
+        now = self.clock()
+        while self.resident:
+            sid, r = next(iter(self.resident.items()))
+            over_capacity = len(self.resident) > self.capacity
+            idle = self.ttl is not None and now - r.last_used >= self.ttl
+            if not (over_capacity or idle):
+                break
+            self._store(sid, r)
+            del self.resident[sid]
+            self.evictions += 1
+
+    def sweep(self) -> None:
+        """Evict idle sessions now, and drop the broadcasts of stored sessions
+        nobody watches any more. handle() evicts too; call this when no
+        commands are arriving, and now and then anyway."""
+        with self._lock:
+            self._evict()
+            if self.broadcasts is not None:
+                for sid in [sid for sid, bc in self.broadcasts.items()
+                            if sid not in self.resident and not bc.watched()]:
+                    del self.broadcasts[sid]
+
+    def evict_all(self) -> None:
+        """Store every resident session, e.g. before shutting down."""
+        with self._lock:
+            while self.resident:
+                sid, r = self.resident.popitem(last=False)
+                self._store(sid, r)
+
+    # ---- store ----
+
+    def _store(self, sid: str, r: Resident) -> None:
+        game = r.game
+        kept = {k: game.__dict__.pop(k) for k in UNSTORED if k in game.__dict__}
+        try:
+            blob = pickle.dumps(game, pickle.HIGHEST_PROTOCOL)
+        finally:
+            game.__dict__.update(kept)
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?)",
+                            (sid, r.name, blob, time.time(),
+                             r.transcript.id if r.transcript is not None else None))
+        if self.broadcasts is not None:
+            bc = self.broadcasts.get(sid)
+            if bc is not None and not bc.watched():
+                del self.broadcasts[sid]   # a fresh one is made when the game is loaded
+
+    def _stored(self, sid: str):
+        return self.db.execute("SELECT game, state, transcript FROM sessions WHERE id = ?", (sid,)).fetchone()
+
+    def _load(self, sid: str) -> Resident:
+        t = time.perf_counter()
+        row = self._stored(sid)
+        if row is None:
+            raise KeyError(sid)
+        name, blob, tid = row
+        game = pickle.loads(blob)
+        session = bc = None
+        if tid is not None and self.recorder is not None:
+            session = transcript.attach(game, session=transcript.Session(self.recorder, tid))
+        if self.broadcasts is not None:
+            bc = spectate.attach(game, self.broadcasts.get(sid))
+        if self.on_load is not None:
+            self.on_load(sid, game)
+        # A session is either resident or stored, never both. Only drop the
+        # row once the hooks are on, so one that raises leaves it stored.
+        with self.db:
+            self.db.execute("DELETE FROM sessions WHERE id = ?", (sid,))
+        if bc is not None:
+            self.broadcasts[sid] = bc
+        self.loads += 1
+        self.load_seconds += time.perf_counter() - t
+        return Resident(name, game, self.clock(), session)
+
+
+def main(argv=None) -> int:
+    import argparse
+    import random
+    import tracemalloc
+
+    from games import WALKTHROUGHS
+
+    ap = argparse.ArgumentParser(description="Simulate many players sharing one SessionManager.")
+    ap.add_argument("game", choices=sorted(PARSER_GAMES))
+    ap.add_argument("--players", type=int, default=20000)
+    ap.add_argument("--commands", type=int, default=100000)
+    ap.add_argument("--capacity", type=int, default=500)
+    ap.add_argument("--db", default=":memory:")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    script = WALKTHROUGHS[args.game]
+    tracemalloc.start()
+    mgr = SessionManager(args.db, capacity=args.capacity, ttl=None)
+    players = [[mgr.create(args.game), 0] for _ in range(args.players)]
+
+    # A few players are busy and most are idle: pick players on a power law.
+    hot, cold = [], []
+    for _ in range(args.commands):
+        p = players[min(int(rng.paretovariate(1.2)) - 1, len(players) - 1)]
+        if p[1] >= len(script):
+            p[0], p[1] = mgr.create(args.game), 0
+        loads = mgr.loads
+        t = time.perf_counter()
+        _, over = mgr.handle(p[0], script[p[1]])
+        (cold if mgr.loads > loads else hot).append(time.perf_counter() - t)
+        p[1] = len(script) if over else p[1] + 1
+    current, peak = tracemalloc.get_traced_memory()
+
+    def pct(xs, q):
+        xs = sorted(xs)
+        return xs[min(len(xs) - 1, int(q / 100 * len(xs)))] * 1e6 if xs else 0.0
+
+    print(f"{len(mgr)} sessions, {len(mgr.resident)} resident, "
+          f"{mgr.evictions} evictions, {mgr.loads} loads")
+    print(f"memory now {current / 1e6:.1f} MB, peak {peak / 1e6:.1f} MB")
+    print(f"resident command p50 {pct(hot, 50):.0f} us, p99 {pct(hot, 99):.0f} us ({len(hot)})")
+    print(f"rehydrating command p50 {pct(cold, 50):.0f} us, p99 {pct(cold, 99):.0f} us ({len(cold)})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
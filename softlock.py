@@ -0,0 +1,157 @@
+import argparse
+import hashlib
+import os
+import pickle
+import sys
+import types
+from typing import Callable, Dict, FrozenSet, Optional
+
+import games
+import statespace
+from games import PARSER_GAMES, game_name, unwrap, wrap
+from statespace import Signature, StateSpace, signature
+
+# ==========================================
+# LIVE SOFTLOCK DETECTION
+# Notices the moment a parser game can no longer reach any ending:
+#
+#   softlock.watch(game)
+#
+# The dead states of each game (reachable, but with no path to an
+# ending) come from statespace.py. Working them out takes seconds, so
+# the set of their signatures is cached in .softlock_cache/ next to this
+# file, keyed by the source of every module the game and the state
+# search import, and reused until one of them changes. During play each
+# successful move, take, use, talk or unlock costs one signature and one
+# set lookup (about 12 us).
+#
+# A game that starts out dead (Hearthlight Hollow has no reachable
+# ending at all) never warns: only a move from a live state to a dead
+# one counts as the player's softlock.
+# ==========================================
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(HERE, ".softlock_cache")
+
+# Verbs that can change the state. Moving counts too: walking into a
+# room with no way out is a softlock just like using up a key item.
+CHECKED = {"go", "move", "travel", "take", "get", "use", "talk", "unlock"}
+
+WARNING = ("\n(Something has gone quiet for good: from here, no ending can be reached. "
+           "You may want to start again.)")
+
+_tables = {}
+
+
+def local_imports(*roots) -> Dict[str, str]:
+    """Module name -> file for roots and every module of this package they import, directly or not."""
+    found: Dict[str, str] = {}
+    todo = list(roots)
+    while todo:
+        m = todo.pop()
+        path = getattr(m, "__file__", None)
+        if m.__name__ in found or not path or os.path.dirname(os.path.abspath(path)) != HERE:
+            continue
+        found[m.__name__] = path
+        for v in vars(m).values():
+            if isinstance(v, types.ModuleType):
+                todo.append(v)
+            elif isinstance(getattr(v, "__module__", None), str) and v.__module__ in sys.modules:
+                todo.append(sys.modules[v.__module__])   # from x import y
+    return found
+
+
+def source_key(name: str) -> str:
+    """Changes whenever the game or anything the state search runs does."""
+    h = hashlib.sha1()
+    for module, path in sorted(local_imports(PARSER_GAMES[name], games, statespace).items()):
+        h.update(module.encode())
+        with open(path, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()[:16]
+
+
+def dead_table(name: str, cache_dir: Optional[str] = CACHE_DIR) -> FrozenSet[Signature]:
+    """Signatures of every dead state of game name, from memory, disk or a fresh search."""
+    table = _tables.get(name)
+    if table is not None:
+        return table
+    path = os.path.join(cache_dir, f"{name}-{source_key(name)}.pickle") if cache_dir else None
+    if path and os.path.exists(path):
+        try:
+            with open(path, "rb") as f:
+                table = pickle.load(f)
+        except Exception:   # a truncated or foreign file can fail in many ways
+            table = None
+        if not isinstance(table, frozenset):   # unreadable or not ours: search again
+            table = None
+    if table is None:
+        table = frozenset(StateSpace(name).dead())
+        if path:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp = path + ".tmp"
+            with open(tmp, "wb") as f:
+                pickle.dump(table, f, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+    _tables[name] = table
+    return table
+
+
+def watch(game, name: Optional[str] = None, warn: bool = True,
+          on_softlock: Optional[Callable[[object, str], None]] = None):
+    """Check game after every state-changing command. Only this instance is affected.
+
+    On the first move from a live state into a dead one, game.softlocked
+    is set to the command that did it, the player is warned (unless
+    warn is False) and on_softlock(game, command) is called.
+    """
+    dead = dead_table(name or game_name(game))
+    game.softlocked = None
+    live = signature(game) not in dead
+    command = game.command
+
+    def checked_command(cmd):
+        nonlocal live
+        game.failed = False
+        result = command(cmd)
+        words = cmd.split()
+        # A command that failed changed nothing, so only successes are looked up.
+        if live and not game.failed and words and words[0] in CHECKED and signature(game) in dead:
+            live = False
+            game.softlocked = cmd
+            if warn:
+                print(WARNING)
+            if on_softlock is not None:
+                on_softlock(game, cmd)
+        return result
+
+    wrap(game, "command", checked_command, "softlock")
+    return game
+
+
+def unwatch(game) -> None:
+    unwrap(game, "command", "softlock")
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Build the dead-state tables used by softlock.watch().")
+    ap.add_argument("names", nargs="*", metavar="game", help=f"{', '.join(sorted(PARSER_GAMES))} (default: all)")
+    ap.add_argument("--play", action="store_true", help="then play the (single) game with detection on")
+    args = ap.parse_args(argv)
+    names = args.names or sorted(PARSER_GAMES)
+    for name in names:
+        if name not in PARSER_GAMES:
+            ap.error(f"unknown game {name!r}")
+
+    for name in names:
+        table = dead_table(name)
+        print(f"{name}: {len(table)} dead states")
+    if args.play:
+        if len(names) != 1:
+            ap.error("--play needs exactly one game")
+        watch(PARSER_GAMES[names[0]].Game(), names[0]).play()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
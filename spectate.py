@@ -0,0 +1,237 @@
+import io
+import threading
+import weakref
+from collections import deque, namedtuple
+from typing import Callable, List, Optional
+
+from games import unwrap, wrap_output
+
+# ==========================================
+# SPECTATORS
+# Lets any number of read-only watchers follow one session:
+#
+#   bc = spectate.attach(game)                  # a parser game
+#   run_game(stdscr, spectators=Broadcast())    # Last Rep, Last Lap
+#   watcher = bc.subscribe()
+#   while watcher.wait():
+#       for frame in watcher.poll(): sock.send(frame.data)
+#
+# Each piece of output is encoded once into an immutable Frame and
+# appended to the session's ring of recent frames; publishing costs the
+# same however many watchers there are. A watcher is only a cursor into
+# that ring, and its bounded queue is the frames between its cursor and
+# the newest one, at most maxlen of them. Watchers read from their own
+# threads or event loops (wait() blocks, listeners are told about every
+# frame), so the player never waits on a socket. A watcher that falls
+# more than maxlen frames behind is dropped at its next poll or, with
+# policy="resync", skips its backlog and gets a snapshot of the session
+# as it is now. A new watcher starts with a snapshot too.
+#
+# A snapshot is the view the player's side handed over with its latest
+# frame (or the frame itself, for full-screen frames). Watchers never
+# call into the game, so nothing they do touches sys.stdout or game
+# state while the player is mid-command.
+# ==========================================
+
+# kind is "out" (output since the last frame), "snapshot" (the whole
+# current view) or "end"; data is UTF-8 text.
+Frame = namedtuple("Frame", "seq kind data")
+
+DROP, RESYNC = "drop", "resync"
+
+
+class Subscriber:
+    def __init__(self, broadcast: "Broadcast", maxlen: int, policy: str):
+        self.broadcast = broadcast
+        self.maxlen = maxlen
+        self.policy = policy
+        # seq of the last frame seen; late joiners still get "end"
+        self.cursor = broadcast.seq - 1 if broadcast.ended else broadcast.seq
+        self.first: Optional[Frame] = broadcast.snapshot()   # what it saw on joining, not yet polled
+        self.closed = False
+        self.resyncs = 0
+
+    def pending(self) -> int:
+        waiting = self.broadcast.seq - self.cursor
+        if self.first is not None:
+            waiting += 1
+        return waiting
+
+    def poll(self, limit: Optional[int] = None) -> List[Frame]:
+        """Take up to limit waiting frames (all of them by default)."""
+        return self.broadcast._read(self, limit)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until there is something to poll. False on timeout, or once
+        the watcher is closed or has read the end of the session."""
+        return self.broadcast._wait(self, timeout)
+
+    def close(self) -> None:
+        with self.broadcast._cond:
+            self.closed = True
+            self.broadcast._cond.notify_all()   # wake a wait() on another thread
+
+
+class Broadcast:
+    """One session's output, fanned out to subscribers."""
+
+    def __init__(self, view: str = "", maxlen: int = 256, policy: str = DROP):
+        self.maxlen = maxlen
+        self.policy = policy
+        self.frames: deque = deque(maxlen=maxlen)   # the most recent frames, shared by all watchers
+        self._view = view                            # the whole view as of the newest frame
+        self.seq = 0
+        self.ended = False
+        self.dropped = 0
+        self.listeners: List[Callable[[], None]] = []   # called after every frame
+        self._snapshot: Optional[Frame] = None
+        self._subscribers: "weakref.WeakSet[Subscriber]" = weakref.WeakSet()
+        self._cond = threading.Condition()
+
+    def snapshot(self) -> Frame:
+        if self._snapshot is None or self._snapshot.seq != self.seq:
+            self._snapshot = Frame(self.seq, "snapshot", self._view.encode("utf-8"))
+        return self._snapshot
+
+    def subscribe(self, maxlen: Optional[int] = None, policy: Optional[str] = None) -> Subscriber:
+        with self._cond:
+            sub = Subscriber(self, min(maxlen or self.maxlen, self.maxlen), policy or self.policy)
+            self._subscribers.add(sub)
+            return sub
+
+    def watched(self) -> bool:
+        """Whether any subscriber is still open."""
+        with self._cond:
+            return any(not sub.closed for sub in self._subscribers)
+
+    def publish(self, text: str, kind: str = "out", view: Optional[str] = None) -> None:
+        """Send a frame. view is the whole view after it, for watchers who join
+        later; a "snapshot" frame is its own view."""
+        with self._cond:
+            if self.ended:
+                return
+            self.seq += 1
+            self.frames.append(Frame(self.seq, kind, text.encode("utf-8")))
+            if kind == "end":
+                self.ended = True
+            elif kind == "snapshot":
+                self._view = text
+            elif view is not None:
+                self._view = view
+            self._cond.notify_all()
+        for fn in self.listeners:
+            fn()
+
+    def end(self) -> None:
+        """Tell every watcher the session is over."""
+        self.publish("", "end")
+
+    # ---- used by Subscriber ----
+
+    def _read(self, sub: Subscriber, limit: Optional[int]) -> List[Frame]:
+        with self._cond:
+            if sub.closed:
+                return []
+            behind = self.seq - sub.cursor
+            if behind > sub.maxlen:
+                if sub.policy != RESYNC:
+                    sub.closed = True
+                    self.dropped += 1
+                    return []
+                sub.resyncs += 1
+                sub.cursor = self.seq - 1 if self.ended else self.seq
+                sub.first = self.snapshot()
+                behind = self.seq - sub.cursor
+            out: List[Frame] = []
+            if sub.first is not None and limit != 0:
+                out.append(sub.first)
+                sub.first = None
+            if limit is not None:
+                behind = min(behind, limit - len(out))
+            new: List[Frame] = []
+            for frame in reversed(self.frames):
+                if frame.seq <= sub.cursor:
+                    break
+                new.append(frame)
+            new.reverse()
+            new = new[:behind]
+            if new:
+                sub.cursor = new[-1].seq
+            return out + new
+
+    def _wait(self, sub: Subscriber, timeout: Optional[float]) -> bool:
+        with self._cond:
+            self._cond.wait_for(lambda: sub.closed or self.ended or sub.pending() > 0, timeout)
+            return not sub.closed and sub.pending() > 0
+
+
+# --------------------------
+# Parser games
+# --------------------------
+
+def room_view(game) -> str:
+    """What a watcher joining now should see: the current room."""
+    out = io.StringIO()
+    game.current.describe(out)
+    return out.getvalue()
+
+
+def attach(game, broadcast: Optional[Broadcast] = None, **kwargs) -> Broadcast:
+    """Publish every line game.handle runs, with its output. Only this instance is affected.
+
+    Call it from the thread that plays the game: the room view watchers
+    join with is taken there, after each line.
+    """
+    bc = broadcast or Broadcast(room_view(game), **kwargs)
+
+    def report(line, output, ending):
+        bc.publish(f"> {line}\n{output}", view=room_view(game))
+        if ending is not None:
+            bc.end()
+
+    wrap_output(game, "spectate", report)
+    return bc
+
+
+def detach(game) -> None:
+    unwrap(game, "handle", "spectate")
+
+
+# --------------------------
+# Last Rep, Last Lap
+# --------------------------
+
+class ScreenTee:
+    """Curses window proxy that keeps a text copy of the screen and publishes it on refresh.
+
+    Every frame is the whole screen, and so also the snapshot for
+    watchers who join later. Unchanged screens are not published again.
+    """
+
+    def __init__(self, stdscr, broadcast: Broadcast):
+        self.stdscr = stdscr
+        self.broadcast = broadcast
+        self.rows: List[str] = []
+        self.last = ""
+
+    def erase(self) -> None:
+        self.rows = []
+        self.stdscr.erase()
+
+    def addstr(self, y, x, s) -> None:
+        self.stdscr.addstr(y, x, s)
+        rows = self.rows
+        while len(rows) <= y:
+            rows.append("")
+        row = rows[y].ljust(x)
+        rows[y] = row[:x] + s + row[x + len(s):]
+
+    def refresh(self) -> None:
+        self.stdscr.refresh()
+        text = "\n".join(r.rstrip() for r in self.rows)
+        if text != self.last:
+            self.last = text
+            self.broadcast.publish(text, "snapshot")
+
+    def __getattr__(self, name):
+        return getattr(self.stdscr, name)
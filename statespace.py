@@ -0,0 +1,117 @@
+import pickle
+from collections import deque
+from typing import Dict, List, Optional, Set, Tuple
+
+from games import EXTRA_COMMANDS, PARSER_GAMES, quiet
+
+# ==========================================
+# PARSER GAME STATE SPACE
+# Enumerates every state a parser game can reach and works out which of
+# them can still lead to an ending. Metrics and the journal are left out
+# of the state: they decide which ending you get, not whether you get one.
+# ==========================================
+
+Signature = tuple
+
+
+def signature(game) -> Signature:
+    rooms = game.rooms.values()
+    return (
+        game.current.name,
+        tuple(sorted(game.inventory)),
+        tuple(sorted(game.flags.items())),
+        tuple(sorted((r.name, d) for r in rooms for d in r.locked_exits)),
+        tuple(sorted((r.name, d, t.name) for r in rooms for d, t in r.exits.items())),
+        tuple(sorted((r.name, i) for r in rooms for i in r.items)),
+    )
+
+
+def all_npcs(game) -> List[str]:
+    names = set()
+    for r in game.rooms.values():
+        names.update(getattr(r, "npcs", ()))
+        names.update(getattr(r, "characters", ()))
+    return sorted(names)
+
+
+def state_commands(name: str, game, npcs: List[str]) -> List[str]:
+    """Every command that could change game's state right now."""
+    cur = game.current
+    cmds = [f"go {d}" for d in list(cur.exits) + list(cur.locked_exits)]
+    cmds += [f"take {i}" for i in cur.items]
+    cmds += [f"use {i}" for i in dict.fromkeys(game.inventory)]
+    # Some NPCs answer from anywhere, so try them all.
+    cmds += [f"talk {n}" for n in npcs]
+    cmds += EXTRA_COMMANDS[name]
+    return cmds
+
+
+class StateSpace:
+    """Reachable states of one parser game, explored breadth-first from the start.
+
+    Each state is kept as a pickled Game so it can be expanded without
+    replaying the commands that led to it.
+    """
+
+    def __init__(self, name: str, max_states: int = 500_000):
+        self.name = name
+        self.max_states = max_states
+        self.edges: Dict[Signature, List[Tuple[str, Optional[Signature]]]] = {}
+        self.endings: Dict[Signature, Set[str]] = {}
+        self.live: Set[Signature] = set()
+        self.truncated = False
+
+        game = PARSER_GAMES[name].Game()
+        self.npcs = all_npcs(game)
+        self.start = signature(game)
+        self._explore(game)
+
+    def _explore(self, game) -> None:
+        blobs = {self.start: pickle.dumps(game, pickle.HIGHEST_PROTOCOL)}
+        queue = deque([self.start])
+
+        with quiet():
+            while queue:
+                sig = queue.popleft()
+                blob = blobs.pop(sig)
+                out = self.edges[sig] = []
+                for cmd in state_commands(self.name, pickle.loads(blob), self.npcs):
+                    g = pickle.loads(blob)
+                    try:
+                        g.handle(cmd)
+                    except SystemExit:
+                        out.append((cmd, None))
+                        self.endings.setdefault(sig, set()).add(g.ending or "QUIT")
+                        continue
+                    nxt = signature(g)
+                    out.append((cmd, nxt))
+                    if nxt not in self.edges and nxt not in blobs:
+                        if len(self.edges) + len(blobs) >= self.max_states:
+                            self.truncated = True
+                            continue
+                        blobs[nxt] = pickle.dumps(g, pickle.HIGHEST_PROTOCOL)
+                        queue.append(nxt)
+
+        self._mark_live()
+
+    def _mark_live(self) -> None:
+        back: Dict[Signature, List[Signature]] = {}
+        for sig, out in self.edges.items():
+            for _, nxt in out:
+                if nxt is not None:
+                    back.setdefault(nxt, []).append(sig)
+
+        queue = deque(self.endings)
+        self.live = set(self.endings)
+        while queue:
+            for prev in back.get(queue.popleft(), ()):
+                if prev not in self.live:
+                    self.live.add(prev)
+                    queue.append(prev)
+
+    def dead(self) -> Set[Signature]:
+        return set(self.edges) - self.live
+
+    def is_dead(self, game) -> bool:
+        sig = signature(game)
+        return sig in self.edges and sig not in self.live
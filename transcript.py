@@ -0,0 +1,227 @@
+import atexit
+import gzip
+import json
+import os
+import queue
+import threading
+import time
+from typing import List, Optional
+
+from games import game_name, unwrap, wrap_output
+
+# ==========================================
+# SESSION TRANSCRIPTS
+# Records every command and the text it printed, for any number of
+# sessions at once, into gzip-compressed JSON-lines files:
+#
+#   rec = Recorder("transcripts/")
+#   attach(game, rec)                        # a parser game
+#   run_game(stdscr, transcript=rec)         # Last Rep, Last Lap
+#   rec.close()
+#
+# Each line is one event, [time, session, kind, a, b]:
+#   "start"  a = game name, b = seed (Last Rep) or null
+#   "cmd"    a = command (Last Rep: "scene:key"), b = what it printed
+#   "end"    a = ending, b = null
+#
+# Recording a command only appends a tuple to a shared buffer. Full
+# buffers are handed to a writer thread, which encodes and compresses
+# them in one go and starts a new file once the current one holds
+# max_bytes of uncompressed text, keeping the newest `keep` files. The
+# writer also takes whatever is buffered once nothing has been handed to
+# it for `interval` seconds, so a quiet recorder still writes within
+# `interval` of each event.
+#
+# If writing fails (a full disk, say), the writer keeps running but drops
+# events, and the error is raised from the next flush() or close().
+# Recording or flushing after close() raises ValueError.
+# ==========================================
+
+SUFFIX = ".jsonl.gz"
+
+
+class Recorder:
+    def __init__(self, directory: str, prefix: str = "transcript", max_bytes: int = 64 << 20,
+                 keep: Optional[int] = None, batch: int = 2048, interval: float = 5.0,
+                 compresslevel: int = 6):
+        self.directory = directory
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self.keep = keep
+        self.batch = batch
+        self.interval = interval
+        self.compresslevel = compresslevel
+        os.makedirs(directory, exist_ok=True)
+
+        self.run = f"{int(time.time()):x}-{os.getpid():x}"   # session ids are unique per run
+        self._sessions = 0
+        self._buffer: List[tuple] = []
+        self._oldest = 0.0
+        self._lock = threading.Lock()
+
+        self._file = None
+        self._written = 0
+        self._seq = 0
+        self.files: List[str] = []
+        self.error: Optional[BaseException] = None   # the first write that failed
+
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._writer = threading.Thread(target=self._write_loop, name="transcript-writer", daemon=True)
+        self._writer.start()
+        self._closed = False
+        atexit.register(self.close)
+
+    # ---- recording ----
+
+    def session(self, game: str, seed: Optional[int] = None) -> "Session":
+        with self._lock:
+            self._sessions += 1
+            sid = f"{self.run}-{self._sessions}"
+        self.event(sid, "start", game, seed)
+        return Session(self, sid)
+
+    def event(self, session: str, kind: str, a=None, b=None) -> None:
+        now = time.time()
+        with self._lock:
+            if self._closed:
+                raise ValueError("recorder is closed")
+            if not self._buffer:
+                self._oldest = now
+            self._buffer.append((now, session, kind, a, b))
+            if len(self._buffer) < self.batch and now - self._oldest < self.interval:
+                return
+            full, self._buffer = self._buffer, []
+        self._queue.put(full)
+
+    def flush(self) -> None:
+        """Hand everything buffered to the writer and wait until it is on disk."""
+        if self._closed:
+            raise ValueError("recorder is closed")
+        self._flush()
+
+    def _flush(self) -> None:
+        with self._lock:
+            full, self._buffer = self._buffer, []
+        if full:
+            self._queue.put(full)
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait()
+        if self.error is not None:
+            raise self.error
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        atexit.unregister(self.close)
+        try:
+            self._flush()
+        finally:
+            self._queue.put(None)
+            self._writer.join()
+        if self.error is not None:
+            raise self.error
+
+    # ---- writer thread ----
+
+    def _write_loop(self) -> None:
+        while True:
+            try:
+                item = self._queue.get(timeout=self.interval)
+            except queue.Empty:
+                with self._lock:
+                    idle, self._buffer = self._buffer, []
+                if idle and self.error is None:
+                    self._guarded(self._write, idle)
+                    self._guarded(self._flush_file)
+                continue
+            if isinstance(item, threading.Event):
+                self._guarded(self._flush_file)
+                item.set()
+            elif item is None:
+                self._guarded(self._close_file)
+                return
+            elif self.error is None:
+                self._guarded(self._write, item)
+
+    def _guarded(self, fn, *args) -> None:
+        # The writer must outlive a failed write: flush() and close() wait on it.
+        try:
+            fn(*args)
+        except Exception as e:
+            if self.error is None:
+                self.error = e
+
+    def _write(self, events: List[tuple]) -> None:
+        text = "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in events).encode("utf-8")
+        if self._file is None or self._written >= self.max_bytes:
+            self._rotate()
+        self._file.write(text)
+        self._written += len(text)
+
+    def _flush_file(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+
+    def _rotate(self) -> None:
+        self._close_file()
+        self._seq += 1
+        path = os.path.join(self.directory, f"{self.prefix}-{self.run}-{self._seq:05d}{SUFFIX}")
+        self._file = gzip.open(path, "wb", compresslevel=self.compresslevel)
+        self._written = 0
+        self.files.append(path)
+        if self.keep is not None:
+            while len(self.files) > self.keep:
+                os.remove(self.files.pop(0))
+
+    def _close_file(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class Session:
+    """One game's view of a Recorder."""
+    __slots__ = ("recorder", "id", "ended")
+
+    def __init__(self, recorder: Recorder, sid: str):
+        self.recorder = recorder
+        self.id = sid
+        self.ended = False
+
+    def command(self, cmd: str, output: str) -> None:
+        self.recorder.event(self.id, "cmd", cmd, output)
+
+    def end(self, ending: Optional[str]) -> None:
+        if not self.ended:
+            self.ended = True
+            self.recorder.event(self.id, "end", ending)
+
+
+# --------------------------
+# Parser games
+# --------------------------
+
+def attach(game, recorder: Optional[Recorder] = None, name: Optional[str] = None,
+           session: Optional[Session] = None) -> Session:
+    """Record every line game.handle runs. Only this instance is affected.
+
+    Pass session to carry on an existing transcript (for a game that was
+    saved and loaded again) instead of starting a new one.
+    """
+    if session is None:
+        session = recorder.session(name or game_name(game))
+
+    def report(line, output, ending):
+        session.command(line, output)
+        if ending is not None:
+            session.end(ending)
+
+    wrap_output(game, "transcript", report)
+    return session
+
+
+def detach(game) -> None:
+    unwrap(game, "handle", "transcript")
@@ -0,0 +1,356 @@
+import argparse
+import glob
+import gzip
+import json
+import os
+import re
+import sys
+from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from commands import split
+
+# ==========================================
+# TRANSCRIPT ANALYTICS
+# Where players get stuck, from transcript.py recordings:
+#
+#   python transcript_stats.py transcripts/ [--workers N] [--json out.json]
+#
+# For each game: how sessions end, how long they take to get there, which
+# verbs and commands are used, and a funnel of puzzle milestones (how
+# many sessions lit the River Dock, found the void lens, ...).
+#
+# Every file is read as a stream of events by its own worker process:
+#   read_events -> sessions -> fold into Totals
+# Only sessions still open are held while reading, so memory does not
+# grow with file size. Sessions cut in two by file rotation come back as
+# partial summaries, which the parent merges before folding them in. A
+# partial that has not reappeared within --window files (an abandoned
+# session, usually) is folded in as it stands, so the parent holds at
+# most the sessions open across that many files. A session silent for
+# longer than that is counted as two: its first half, and an orphan.
+# ==========================================
+
+# A milestone is reached by a line whose command matches `command` (any
+# command if None) and whose output contains `marker`. Lines with several
+# `;`-separated commands are checked as a whole.
+Milestone = namedtuple("Milestone", "name command marker")
+
+FUNNELS = {
+    "hearthlight": [
+        Milestone("take kettle", r"\btake\b.*\bkettle", "You pick it up gently"),
+        Milestone("take dry wick", r"\btake\b.*\bwick", "You pick it up gently"),
+        Milestone("light the River Dock", None, "Lanterns blaze across the water."),
+        Milestone("light the oven", None, "The oven glows warmly."),
+        Milestone("turn the windmill", None, "The sails begin turning."),
+    ],
+    "vault": [
+        Milestone("take void lens", r"\btake\b.*\blens", "Taken."),
+        Milestone("use void lens", None, "False skies collapse into one."),
+        Milestone("awaken the engine", None, "The rings awaken, humming."),
+        Milestone("take star shard", r"\btake\b.*\bshard", "Taken."),
+        Milestone("use star shard at the core", None, "The shard resonates with the imprisoned star."),
+    ],
+    "clockwork": [
+        Milestone("start the generator", None, "The generator roars to life."),
+        Milestone("fix the clock tower", None, "A deep, steady ticking returns"),
+        Milestone("unlock vault", None, "You unlock the vault door."),
+        Milestone("talk automaton", None, "The automaton's eyes brighten."),
+        Milestone("unlock exit", None, "A passage reveals itself to the east."),
+        Milestone("use energy cell", None, "You seat the energy cell"),
+    ],
+    "lastrep": [
+        Milestone(f"reach {scene}", rf"^{scene}:", None)
+        for scene in ("mentor", "agent", "clinic", "showcase")
+    ],
+}
+
+_COMPILED = {game: [(re.compile(m.command) if m.command else None, m.marker) for m in ms]
+             for game, ms in FUNNELS.items()}
+
+# Time-to-ending histogram bucket upper bounds, in seconds.
+TIME_BUCKETS = (10, 30, 60, 120, 300, 600, 1200, 1800, 3600, 7200, 14400, 28800, 86400)
+COMMAND_TABLE = 5000   # distinct commands kept per game; rarer ones are dropped when it fills
+UNFINISHED = "(unfinished)"
+
+
+# --------------------------
+# Sessions
+# --------------------------
+
+class Summary:
+    """What one session did, possibly only the part of it in one file."""
+    __slots__ = ("id", "game", "start", "end", "ending", "reached", "commands")
+
+    def __init__(self, sid: str):
+        self.id = sid
+        self.game: Optional[str] = None
+        self.start: Optional[float] = None
+        self.end: Optional[float] = None
+        self.ending: Optional[str] = None
+        self.reached: Dict[str, int] = {}   # game -> bitmask over FUNNELS[game]
+        self.commands: Counter = Counter()
+
+    @property
+    def complete(self) -> bool:
+        return self.start is not None and self.end is not None
+
+    def merge(self, other: "Summary") -> None:
+        self.game = self.game or other.game
+        self.start = self.start if self.start is not None else other.start
+        self.end = self.end if self.end is not None else other.end
+        self.ending = self.ending or other.ending
+        for game, mask in other.reached.items():
+            self.reached[game] = self.reached.get(game, 0) | mask
+        self.commands += other.commands
+
+
+def read_events(path: str) -> Iterator[list]:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def sessions(events: Iterable[list]) -> Iterator[Summary]:
+    """Summaries of the sessions in events: each one as it ends, then the ones left open."""
+    open_: Dict[str, Summary] = {}
+    for t, sid, kind, a, b in events:
+        s = open_.get(sid)
+        if s is None:
+            s = open_[sid] = Summary(sid)
+        if kind == "cmd":
+            s.commands.update(split(a))
+            # Until the start event is seen (it may be in an earlier file)
+            # the game is unknown, so every funnel is checked.
+            for game in ((s.game,) if s.game else _COMPILED):
+                mask = s.reached.get(game, 0)
+                for i, (pattern, marker) in enumerate(_COMPILED.get(game, ())):
+                    if mask >> i & 1:
+                        continue
+                    if (marker is None or (b and marker in b)) and (pattern is None or pattern.search(a)):
+                        mask |= 1 << i
+                if mask:
+                    s.reached[game] = mask
+        elif kind == "start":
+            s.game, s.start = a, t
+        elif kind == "end":
+            s.end, s.ending = t, a
+            del open_[sid]
+            yield s
+    yield from open_.values()
+
+
+# --------------------------
+# Totals
+# --------------------------
+
+class GameTotals:
+    def __init__(self, game: str):
+        self.game = game
+        self.sessions = 0
+        self.endings: Counter = Counter()
+        self.reached = [0] * len(FUNNELS.get(game, ()))   # sessions reaching each milestone
+        self.funnel = [0] * len(self.reached)              # ... and every milestone before it
+        self.verbs: Counter = Counter()
+        self.commands: Counter = Counter()
+        self.times: Dict[str, List[int]] = {}              # ending -> TIME_BUCKETS counts (+ overflow)
+        self.seconds: Counter = Counter()                  # ending -> total seconds
+        self.lengths: Counter = Counter()                  # ending -> total commands
+
+    def add(self, s: Summary) -> None:
+        self.sessions += 1
+        ending = s.ending or UNFINISHED
+        self.endings[ending] += 1
+        prefix = True
+        mask = s.reached.get(self.game, 0)
+        for i in range(len(self.reached)):
+            hit = bool(mask >> i & 1)
+            self.reached[i] += hit
+            prefix = prefix and hit
+            self.funnel[i] += prefix
+        for cmd, n in s.commands.items():
+            self.verbs[cmd.split()[0].split(":")[0]] += n   # Last Rep: the scene
+        self.commands.update(s.commands)
+        if len(self.commands) > 2 * COMMAND_TABLE:
+            self.commands = Counter(dict(self.commands.most_common(COMMAND_TABLE)))
+        self.lengths[ending] += sum(s.commands.values())
+        if s.complete:
+            seconds = s.end - s.start
+            self.seconds[ending] += seconds
+            bucket = self.times.setdefault(ending, [0] * (len(TIME_BUCKETS) + 1))
+            bucket[next((i for i, b in enumerate(TIME_BUCKETS) if seconds <= b), len(TIME_BUCKETS))] += 1
+
+    def merge(self, other: "GameTotals") -> None:
+        self.sessions += other.sessions
+        self.endings += other.endings
+        self.reached = [a + b for a, b in zip(self.reached, other.reached)]
+        self.funnel = [a + b for a, b in zip(self.funnel, other.funnel)]
+        self.verbs += other.verbs
+        self.commands += other.commands
+        if len(self.commands) > 2 * COMMAND_TABLE:
+            self.commands = Counter(dict(self.commands.most_common(COMMAND_TABLE)))
+        for ending, counts in other.times.items():
+            mine = self.times.setdefault(ending, [0] * len(counts))
+            self.times[ending] = [a + b for a, b in zip(mine, counts)]
+        self.seconds += other.seconds
+        self.lengths += other.lengths
+
+    def time_percentile(self, ending: str, p: float) -> float:
+        """Upper bound (seconds) of the bucket holding the p-th percentile."""
+        counts = self.times.get(ending)
+        if not counts:
+            return 0.0
+        rank = p / 100.0 * sum(counts)
+        seen = 0
+        for i, c in enumerate(counts):
+            seen += c
+            if seen >= rank and c:
+                return float(TIME_BUCKETS[i]) if i < len(TIME_BUCKETS) else float("inf")
+        return float("inf")
+
+    def as_dict(self, top: int = 20) -> dict:
+        milestones = FUNNELS.get(self.game, [])
+        return {
+            "sessions": self.sessions,
+            "endings": {
+                e: {"sessions": n,
+                    "mean_commands": self.lengths[e] / n,
+                    "mean_seconds": self.seconds[e] / sum(self.times[e]) if e in self.times else None,
+                    "p50_seconds": self.time_percentile(e, 50),
+                    "p90_seconds": self.time_percentile(e, 90)}
+                for e, n in self.endings.most_common()
+            },
+            "funnel": [{"milestone": m.name, "reached": r, "in_order": f}
+                       for m, r, f in zip(milestones, self.reached, self.funnel)],
+            "verbs": dict(self.verbs.most_common(top)),
+            "commands": dict(self.commands.most_common(top)),
+        }
+
+
+class Totals:
+    def __init__(self):
+        self.games: Dict[str, GameTotals] = {}
+        self.orphans = 0   # sessions whose start was in no file read
+
+    def add(self, s: Summary) -> None:
+        if s.game is None:
+            self.orphans += 1
+            return
+        g = self.games.get(s.game)
+        if g is None:
+            g = self.games[s.game] = GameTotals(s.game)
+        g.add(s)
+
+    def merge(self, other: "Totals") -> None:
+        self.orphans += other.orphans
+        for name, g in other.games.items():
+            if name in self.games:
+                self.games[name].merge(g)
+            else:
+                self.games[name] = g
+
+
+# --------------------------
+# Files
+# --------------------------
+
+def summarize_file(path: str) -> Tuple[Totals, List[Summary]]:
+    """Totals for the sessions that start and end in path, plus summaries of the rest."""
+    totals = Totals()
+    partial = []
+    for s in sessions(read_events(path)):
+        if s.complete:
+            totals.add(s)
+        else:
+            partial.append(s)
+    return totals, partial
+
+
+def transcript_files(paths: Iterable[str]) -> List[str]:
+    found = []
+    for p in paths:
+        if os.path.isdir(p):
+            found += sorted(glob.glob(os.path.join(p, "*.jsonl.gz")))
+        else:
+            found.append(p)
+    return found
+
+
+def analyze(paths: Iterable[str], workers: Optional[int] = None, window: int = 16) -> Totals:
+    totals = Totals()
+    pending: Dict[str, Summary] = {}
+    last_seen: Dict[str, int] = {}   # session id -> index of the last file it was in
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for i, (file_totals, partial) in enumerate(pool.map(summarize_file, transcript_files(paths))):
+            totals.merge(file_totals)
+            for s in partial:
+                last_seen[s.id] = i
+                mine = pending.get(s.id)
+                if mine is None:
+                    mine = pending[s.id] = s
+                else:
+                    mine.merge(s)
+                if mine.complete:
+                    totals.add(pending.pop(s.id))
+                    del last_seen[s.id]
+            for sid in [sid for sid, last in last_seen.items() if last < i - window]:
+                del last_seen[sid]
+                totals.add(pending.pop(sid))
+    for s in pending.values():   # never ended, or their end is in a file we were not given
+        totals.add(s)
+    return totals
+
+
+# --------------------------
+# Report
+# --------------------------
+
+def _seconds(s: Optional[float]) -> str:
+    if s is None:
+        return "-"
+    if s == float("inf"):
+        return f">{TIME_BUCKETS[-1] // 3600}h"
+    return f"{s:.0f}s" if s < 120 else f"{s / 60:.0f}m"
+
+
+def print_report(totals: Totals, top: int = 10) -> None:
+    for name, g in sorted(totals.games.items()):
+        d = g.as_dict(top)
+        print(f"\n== {name}: {g.sessions} sessions ==")
+        print("Endings                                 sessions   share  commands     p50     p90")
+        for ending, e in d["endings"].items():
+            print(f"  {ending:38s} {e['sessions']:8d} {100 * e['sessions'] / g.sessions:6.1f}% "
+                  f"{e['mean_commands']:9.1f} {_seconds(e['p50_seconds'] if ending in g.times else None):>7s} "
+                  f"{_seconds(e['p90_seconds'] if ending in g.times else None):>7s}")
+        if d["funnel"]:
+            print("Funnel                                   reached          in order")
+            for f in d["funnel"]:
+                print(f"  {f['milestone']:38s} {f['reached']:8d} {100 * f['reached'] / g.sessions:6.1f}% "
+                      f"{f['in_order']:8d} {100 * f['in_order'] / g.sessions:6.1f}%")
+        print("Verbs:    " + ", ".join(f"{v} {n}" for v, n in d["verbs"].items()))
+        print("Commands: " + ", ".join(f"{c} {n}" for c, n in d["commands"].items()))
+    if totals.orphans:
+        print(f"\n({totals.orphans} sessions had no start event and were skipped)")
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Endings, funnels and command counts from session transcripts.")
+    ap.add_argument("paths", nargs="+", help="transcript files or directories of them")
+    ap.add_argument("--workers", type=int, help="process pool size (default: CPU count)")
+    ap.add_argument("--window", type=int, default=16,
+                    help="files a session may go unseen before it is counted as abandoned")
+    ap.add_argument("--top", type=int, default=10, help="verbs and commands to list per game")
+    ap.add_argument("--json", metavar="PATH", help="also write the report as JSON")
+    args = ap.parse_args(argv)
+
+    totals = analyze(args.paths, args.workers, args.window)
+    print_report(totals, args.top)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({name: g.as_dict(args.top) for name, g in totals.games.items()}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,49 @@
 import sys
+from functools import lru_cache
+
+import commands
+import completion
+import nouns
+from actions import Tracker, rule
+from locator import INVENTORY, Locator
+from routes import RouteIndex
 
 # ==========================================
 # THE VAULT OF SILENT STARS (v1.1)
 # Multi-ending mythic science-fantasy
 # ==========================================
 
+@lru_cache(maxsize=4096)
+def render_room(name, desc, items, npcs, exits, locked):
+    """A room's description. Shared by every room (and session) in the same state."""
+    out = [f"\n{name.upper()}", "-" * len(name), desc]
+
+    if items:
+        out.append("\nYou see:")
+        out += [f" - {i}" for i in items]
+
+    if npcs:
+        out.append("\nPresent:")
+        out += [f" - {n}" for n in npcs]
+
+    if exits or locked:
+        out.append("\nPaths:")
+        out += [f" - {e}" for e in exits]
+        out += [f" - {e} (sealed)" for e in locked]
+    return "\n".join(out)
+
+
+# Puzzle actions shown by `commands` (see actions.py).
+ACTIONS = [
+    rule("Broken Skybridge", "use gravity seed", {"gravity seed"}, bridge=False),
+    rule("Astral Engine", "use resonant rod", {"resonant rod"}, engine=False),
+    rule("Mirror Gallery", "use void lens", {"void lens"}, mirror=False),
+    rule("Inner Sanctum", "use alignment chart", {"alignment chart"}, core_open=False),
+    rule("Star Core", "use star shard", {"star shard"}),
+    rule("Fracture Maw", "use star shard", {"star shard"}),
+]
+
+
 class Room:
     def __init__(self, name, desc):
         self.name = name
@@ -13,31 +52,22 @@ class Room:
         self.locked_exits = {} # direction -> Room (sealed)
         self.items = []
         self.npcs = []
+        self._text = None      # cached render_room() output
 
-    def describe(self):
-        print(f"\n{self.name.upper()}")
-        print("-" * len(self.name))
-        print(self.desc)
-
-        if self.items:
-            print("\nYou see:")
-            for i in self.items:
-                print(" -", i)
-
-        if self.npcs:
-            print("\nPresent:")
-            for n in self.npcs:
-                print(" -", n)
+    def touch(self):
+        """Call after changing items, npcs, exits or locked_exits."""
+        self._text = None
 
-        if self.exits or self.locked_exits:
-            print("\nPaths:")
-            for e in self.exits:
-                print(" -", e)
-            for e in self.locked_exits:
-                print(" -", f"{e} (sealed)")
+    def describe(self, file=None):
+        if self._text is None:
+            self._text = render_room(self.name, self.desc, tuple(self.items), tuple(self.npcs),
+                                     tuple(self.exits), tuple(self.locked_exits))
+        print(self._text, file=file)
 
 
 class Game:
+    ACTIONS = ACTIONS   # GeneratedGame swaps in its own (empty) list
+
     def __init__(self):
         self.rooms = {}
         self.current = None
@@ -49,7 +79,12 @@ class Game:
             "oracle_spoken": False,
             "core_open": False,  # Drift Gate unlocked from Sanctum
         }
+        self.ending = None  # set just before the game exits
+        self.failed = False  # set by fail() while a command runs
         self.build_world()
+        self.routes = RouteIndex(self.rooms)
+        self.locator = Locator(self)
+        self.actions = Tracker(self, self.ACTIONS)
 
     # -----------------------------
     # WORLD BUILD
@@ -182,6 +217,7 @@ class Game:
     # -----------------------------
 
     def play(self):
+        completion.install(self)
         print("\n🌌 THE VAULT OF SILENT STARS 🌌\n")
         print("You awaken in a structure older than calendars.\n")
         self.current.describe()
@@ -193,13 +229,27 @@ class Game:
     # COMMAND HANDLER
     # -----------------------------
 
-    def handle(self, cmd):
+    def handle(self, line):
+        """Run one or more `;`-separated commands (see commands.py)."""
+        return commands.run_line(self, line)
+
+    def fail(self, msg):
+        print(msg)
+        self.failed = True
+
+    def command(self, cmd):
         if not cmd:
             return
 
         words = cmd.split()
         verb = words[0]
 
+        if verb in ("take", "use", "talk"):
+            noun = self.resolve(verb, " ".join(words[1:]))
+            if noun is None:
+                return
+            words = [verb] + noun.split()
+
         if verb in ("quit", "exit"):
             sys.exit()
 
@@ -215,14 +265,26 @@ class Game:
             self.help()
             return
 
+        if verb == "commands":
+            self.show_commands()
+            return
+
         if verb == "go":
             self.move(words[1] if len(words) > 1 else "")
             return
 
+        if verb == "travel":
+            self.travel(" ".join(words[1:]))
+            return
+
         if verb == "take":
             self.take(" ".join(words[1:]))
             return
 
+        if verb == "where":
+            self.where(" ".join(words[1:]))
+            return
+
         if verb == "use":
             self.use(" ".join(words[1:]))
             return
@@ -231,7 +293,16 @@ class Game:
             self.talk(" ".join(words[1:]))
             return
 
-        print("The structure does not respond.")
+        self.fail("The structure does not respond.")
+
+    def resolve(self, verb, noun):
+        """Expand a partial or misspelled noun. None means the player was asked to pick."""
+        pool = {"take": self.current.items, "use": self.inventory, "talk": self.current.npcs}[verb]
+        found = nouns.resolve(noun, pool)
+        if len(found) > 1:
+            self.fail(f"Which do you mean: {nouns.either(found)}?")
+            return None
+        return found[0] if found else noun
 
     # -----------------------------
     # UI
@@ -241,15 +312,25 @@ class Game:
         print("""
 Commands:
  go <direction>
+ travel <place>
  look
  take <item>
  use <item>
  talk <npc>
+ where <thing>
  inventory
+ commands
  help
  quit
 """)
 
+    def show_commands(self):
+        print("You could:")
+        for a in self.actions.valid_actions():
+            print(" -", a)
+        for a in self.actions.locked_actions():
+            print(" -", f"{a} (sealed)")
+
     def show_inventory(self):
         if not self.inventory:
             print("You carry nothing.")
@@ -264,7 +345,7 @@ Commands:
 
     def move(self, d):
         if d in self.current.locked_exits:
-            print("A stellar seal blocks that path.")
+            self.fail("A stellar seal blocks that path.")
             return
 
         if d in self.current.exits:
@@ -272,7 +353,39 @@ Commands:
             self.current.describe()
             return
 
-        print("You cannot move that way.")
+        self.fail("You cannot move that way.")
+
+    def travel(self, dest):
+        room = self.routes.find(dest)
+        if room is None:
+            self.fail("No such place is known to you.")
+            return
+        if room is self.current:
+            print("You are already there.")
+            return
+
+        path = self.routes.route(self.current, room)
+        if path is None:
+            self.fail("No open path leads there.")
+            return
+
+        for d in path:
+            self.current = self.current.exits[d]
+        print(f"You pass {', '.join(path)}.")
+        self.current.describe()
+
+    def _unlock_direction(self, room, direction, room_obj=None):
+        """Remove a lock barrier on a direction and (optionally) add the exit."""
+        redirected = (room_obj is not None and direction not in room.locked_exits
+                      and room.exits.get(direction, room_obj) is not room_obj)
+        room.locked_exits.pop(direction, None)
+        if room_obj is not None:
+            room.exits[direction] = room_obj
+        room.touch()
+        if redirected:
+            self.routes.clear()
+        else:
+            self.routes.exit_opened(room, direction)
 
     # -----------------------------
     # INTERACTION
@@ -281,10 +394,25 @@ Commands:
     def take(self, item):
         if item in self.current.items:
             self.current.items.remove(item)
+            self.current.touch()
             self.inventory.append(item)
+            self.actions.gained(item)
+            self.locator.move(item, self.current.name, INVENTORY)
             print("Taken.")
         else:
-            print("That is not here.")
+            self.fail("That is not here.")
+
+    def _set_flag(self, flag, value=True):
+        old = self.flags[flag]
+        self.flags[flag] = value
+        self.actions.flag_changed(flag, old, value)
+
+    def where(self, thing):
+        places = self.locator.where(thing)
+        if not places:
+            print("The stars hold no record of that.")
+        for p in places:
+            print("You carry it." if p == INVENTORY else f"It rests in the {p}.")
 
     def talk(self, npc):
         if npc == "oracle" and self.current.name == "Oracle Chamber":
@@ -292,7 +420,7 @@ Commands:
                 print("The oracle whispers:")
                 print("“Three endings spiral: flee, mend, or unmake.”")
                 print("“But beware: the star may also break loose and choose for you.”")
-                self.flags["oracle_spoken"] = True
+                self._set_flag("oracle_spoken")
             else:
                 print("“The stars already wait.”")
         else:
@@ -306,37 +434,34 @@ Commands:
         room = self.current.name
 
         if item not in self.inventory:
-            print("You do not possess that.")
+            self.fail("You do not possess that.")
             return
 
         # Bridge stabilization -> unlock Fracture Maw route (and keep it reversible)
         if item == "gravity seed" and room == "Broken Skybridge" and not self.flags["bridge"]:
             print("Roots spiral outward, knitting the void.")
-            self.flags["bridge"] = True
-            self.rooms["Broken Skybridge"].locked_exits.pop("north", None)
-            self.rooms["Broken Skybridge"].exits["north"] = self.rooms["Fracture Maw"]
+            self._set_flag("bridge")
+            self._unlock_direction(self.rooms["Broken Skybridge"], "north", self.rooms["Fracture Maw"])
             return
 
         # Engine awakening -> open core
         if item == "resonant rod" and room == "Astral Engine" and not self.flags["engine"]:
             print("The rings awaken, humming.")
-            self.flags["engine"] = True
-            self.rooms["Astral Engine"].locked_exits.pop("north", None)
-            self.rooms["Astral Engine"].exits["north"] = self.rooms["Star Core"]
+            self._set_flag("engine")
+            self._unlock_direction(self.rooms["Astral Engine"], "north", self.rooms["Star Core"])
             return
 
         # Mirror truth -> sets flag for RESTORATION ending
         if item == "void lens" and room == "Mirror Gallery" and not self.flags["mirror"]:
             print("False skies collapse into one.")
-            self.flags["mirror"] = True
+            self._set_flag("mirror")
             return
 
         # Alignment chart reveals escape in Sanctum
         if item == "alignment chart" and room == "Inner Sanctum" and not self.flags["core_open"]:
             print("Glyphs rotate. A portal forms to the east.")
-            self.flags["core_open"] = True
-            self.rooms["Inner Sanctum"].locked_exits.pop("east", None)
-            self.rooms["Inner Sanctum"].exits["east"] = self.rooms["Drift Gate"]
+            self._set_flag("core_open")
+            self._unlock_direction(self.rooms["Inner Sanctum"], "east", self.rooms["Drift Gate"])
             return
 
         # Star shard used at Star Core -> endings (RESTORE / ESCAPE / CATASTROPHE)
@@ -349,7 +474,7 @@ Commands:
             self.ending_unmaking()
             return
 
-        print("Nothing changes.")
+        self.fail("Nothing changes.")
 
     # -----------------------------
     # ENDINGS
@@ -362,6 +487,7 @@ Commands:
         if self.flags["engine"] and self.flags["mirror"]:
             print("You stabilize the stellar lattice.")
             print("The structure exhales and falls quiet.")
+            self.ending = "RESTORATION"
             print("\nENDING: RESTORATION\n")
             sys.exit()
 
@@ -369,12 +495,14 @@ Commands:
         if self.flags["core_open"]:
             print("You hurl the shard into the core and flee.")
             print("The vault collapses behind you, but you remain whole.")
+            self.ending = "ESCAPE"
             print("\nENDING: ESCAPE\n")
             sys.exit()
 
         # CATASTROPHE: awaken engine, but do neither mirror-truth nor escape alignment
         print("The star erupts unchecked.")
         print("Reality folds inward.\n")
+        self.ending = "CATASTROPHE"
         print("ENDING: CATASTROPHE\n")
         sys.exit()
 
@@ -385,6 +513,7 @@ Commands:
         print("For a moment, you can hear the architecture thinking.")
         print("Then it stops.\n")
         print("Everything unthreads gently, like a story allowed to end.\n")
+        self.ending = "UNMAKING"
         print("ENDING: UNMAKING\n")
         sys.exit()
 
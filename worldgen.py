@@ -0,0 +1,136 @@
+import random
+import sys
+
+import vault_of_silent_stars as engine
+
+# ==========================================
+# PROCEDURAL WORLDS
+# Builds large connected worlds on the Vault of Silent Stars Room/Game
+# model: sealed passages opened by using the right item in the right
+# room, decorative items and wanderers, and a final room where the
+# star shard ends the game.
+#
+#   GeneratedGame(size=10_000, seed=7).play()
+# ==========================================
+
+ADJECTIVES = ["Amber", "Silent", "Hollow", "Gilded", "Drowned", "Shattered", "Veiled",
+              "Frozen", "Humming", "Sunken", "Ashen", "Crystal", "Woven", "Quiet"]
+PLACES = ["Gallery", "Vault", "Atrium", "Stair", "Observatory", "Cistern", "Cloister",
+          "Archive", "Bridge", "Garden", "Forge", "Chapel", "Well", "Landing"]
+SIGHTS = ["Dust turns slowly in a shaft of starlight.",
+          "Glyphs crawl along the walls like patient insects.",
+          "The floor is warm, as if something sleeps beneath it.",
+          "Old instruments point at a sky that is no longer there.",
+          "Water drips upward into a crack in the ceiling.",
+          "A faint chord hangs in the air and never resolves."]
+MATERIALS = ["brass", "glass", "bone", "iron", "copper", "jade", "obsidian", "silver"]
+KEYS = ["sigil", "key", "lens", "rod", "prism", "seal", "token"]
+TRINKETS = ["dusty tablet", "cracked lantern", "bent compass", "folded map", "silk ribbon"]
+WANDERERS = ["archivist", "pilgrim", "cartographer", "keeper", "moth-priest"]
+
+# Direction -> its reverse. Rooms link through matching pairs, like the hand-built worlds.
+DIRECTIONS = {
+    "north": "south", "south": "north", "east": "west", "west": "east",
+    "up": "down", "down": "up",
+    "northeast": "southwest", "southwest": "northeast",
+    "northwest": "southeast", "southeast": "northwest",
+}
+
+GOAL_ITEM = "star shard"
+
+
+class GeneratedGame(engine.Game):
+    ACTIONS = ()
+
+    def __init__(self, size=1000, seed=0, lock_rate=0.08, loop_rate=0.1):
+        self.size = size
+        self.seed = seed
+        self.lock_rate = lock_rate
+        self.loop_rate = loop_rate
+        self.puzzles = {}   # (room name, item) -> (direction, target room name), or None for the goal
+        super().__init__()
+
+    def build_world(self):
+        generate(self, self.size, random.Random(self.seed), self.lock_rate, self.loop_rate)
+
+    def use(self, item):
+        if item not in self.inventory:
+            self.fail("You do not possess that.")
+            return
+
+        key = (self.current.name, item)
+        if key not in self.puzzles:
+            self.fail("Nothing changes.")
+            return
+
+        puzzle = self.puzzles.pop(key)
+        if puzzle is None:
+            print("\nThe shard finds its place. The structure exhales and falls quiet.")
+            self.ending = "RESTORATION"
+            print("\nENDING: RESTORATION\n")
+            sys.exit()
+
+        direction, target = puzzle
+        print(f"The {item} hums. A seal to the {direction} dissolves.")
+        self._unlock_direction(self.current, direction, self.rooms[target])
+
+
+def generate(game, size, rng, lock_rate=0.08, loop_rate=0.1):
+    """Fill game.rooms with size connected rooms.
+
+    Room i hangs off an earlier room, and the item opening a sealed link
+    into room i always lies in an earlier room. By induction every room,
+    and so the goal, can be reached from room 0.
+    """
+    rooms = []
+    free = []   # per room: directions not used yet
+
+    for i in range(size):
+        name = f"{rng.choice(ADJECTIVES)} {rng.choice(PLACES)} {i}"
+        room = engine.Room(name, " ".join(rng.sample(SIGHTS, 2)))
+        rooms.append(room)
+        free.append(list(DIRECTIONS))
+        if i == 0:
+            continue
+
+        # Attach to a recent room so the world grows long corridors, not a star.
+        # Loops can use up every direction of the recent rooms; then any room will do.
+        candidates = [j for j in range(max(0, i - 64), i) if free[j]]
+        if not candidates:
+            candidates = [j for j in range(i) if free[j]]
+        parent = rng.choice(candidates)
+        d = free[parent].pop(rng.randrange(len(free[parent])))
+        back = DIRECTIONS[d]
+        free[i].remove(back)
+        room.exits[back] = rooms[parent]
+
+        if rng.random() < lock_rate:
+            item = f"{rng.choice(MATERIALS)} {rng.choice(KEYS)} {i}"
+            rooms[rng.randrange(i)].items.append(item)
+            rooms[parent].locked_exits[d] = room
+            game.puzzles[(rooms[parent].name, item)] = (d, name)
+        else:
+            rooms[parent].exits[d] = room
+
+        if rng.random() < loop_rate:
+            other = rng.randrange(i)
+            pairs = [d for d in free[i] if DIRECTIONS[d] in free[other]]
+            if pairs:
+                d = rng.choice(pairs)
+                free[i].remove(d)
+                free[other].remove(DIRECTIONS[d])
+                room.exits[d] = rooms[other]
+                rooms[other].exits[DIRECTIONS[d]] = room
+
+        if rng.random() < 0.2:
+            room.items.append(rng.choice(TRINKETS))
+        if rng.random() < 0.05:
+            room.npcs.append(rng.choice(WANDERERS))
+
+    rooms[rng.randrange(size)].items.append(GOAL_ITEM)
+    goal = rooms[-1]
+    game.puzzles[(goal.name, GOAL_ITEM)] = None
+
+    for r in rooms:
+        game.rooms[r.name] = r
+    game.current = rooms[0]
@@ -0,0 +1,238 @@
+import json
+import mmap
+import struct
+import weakref
+from array import array
+from collections import OrderedDict
+from collections.abc import Mapping, MutableMapping
+from typing import Dict, Iterator, Optional
+
+import vault_of_silent_stars as engine
+from worldgen import GeneratedGame
+
+# ==========================================
+# MEMORY-MAPPED WORLD STORAGE
+# Writes a world to one file and reads rooms back on demand, keeping at
+# most `budget` of them resident. Rooms are ordinary engine Rooms, so
+# describe/move/take behave exactly as they do in memory.
+#
+# File layout (little-endian):
+#   header   magic, room count, offsets of the sections below
+#   records  one JSON object per room: name, desc, exits, locked, items, npcs
+#            (exits refer to other rooms by id)
+#   offsets  count+1 uint64 record offsets
+#   names    count uint32 room ids, sorted by lower-cased name
+#   meta     JSON: start room, puzzles
+# ==========================================
+
+MAGIC = b"TAWORLD1"
+HEADER = struct.Struct("<8sQQQQQ")   # magic, count, offsets, names, meta, meta length
+
+
+def write_world(game, path: str) -> None:
+    rooms = list(game.rooms.values())
+    ids = {id(r): i for i, r in enumerate(rooms)}
+    offsets = array("Q")
+
+    with open(path, "wb") as f:
+        f.write(b"\0" * HEADER.size)
+        for r in rooms:
+            offsets.append(f.tell())
+            f.write(json.dumps({
+                "n": r.name,
+                "d": r.desc,
+                "e": {d: ids[id(t)] for d, t in r.exits.items()},
+                "l": {d: ids[id(t)] for d, t in r.locked_exits.items()},
+                "i": r.items,
+                "p": r.npcs,
+            }, separators=(",", ":")).encode("utf-8"))
+        offsets.append(f.tell())
+
+        offsets_at = f.tell()
+        f.write(offsets.tobytes())
+
+        names_at = f.tell()
+        order = sorted(range(len(rooms)), key=lambda i: rooms[i].name.lower())
+        f.write(array("I", order).tobytes())
+
+        meta_at = f.tell()
+        meta = json.dumps({
+            "start": ids[id(game.current)],
+            "puzzles": [[room, item] + (list(p) if p else [None, None])
+                        for (room, item), p in getattr(game, "puzzles", {}).items()],
+        }).encode("utf-8")
+        f.write(meta)
+
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, len(rooms), offsets_at, names_at, meta_at, len(meta)))
+
+
+class RoomLinks(MutableMapping):
+    """direction -> Room, stored as room ids and resolved through the world on access."""
+
+    def __init__(self, world: "MappedWorld", ids: Dict[str, int]):
+        self.world = world
+        self.ids = ids
+
+    def __getitem__(self, d):
+        return self.world.room(self.ids[d])
+
+    def __setitem__(self, d, room):
+        self.ids[d] = room._rid
+
+    def __delitem__(self, d):
+        del self.ids[d]
+
+    def __contains__(self, d):
+        return d in self.ids
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def __len__(self):
+        return len(self.ids)
+
+
+class MappedWorld(Mapping):
+    """Room name -> Room over a world file, with an LRU budget of resident rooms.
+
+    An evicted room that is still referenced elsewhere (the player's current
+    room, say) stays the same object until it is really gone;
+    its items, NPCs and exits are saved then and restored on the next load.
+    """
+
+    def __init__(self, path: str, budget: int = 10_000):
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, offsets_at, names_at, meta_at, meta_len = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a world file")
+
+        self._offsets = memoryview(self._mm)[offsets_at:offsets_at + 8 * (self.count + 1)].cast("Q")
+        self._names = memoryview(self._mm)[names_at:names_at + 4 * self.count].cast("I")
+        self.meta = json.loads(self._mm[meta_at:meta_at + meta_len])
+
+        self.budget = budget
+        self._resident: "OrderedDict[int, engine.Room]" = OrderedDict()
+        self._alive: "weakref.WeakValueDictionary[int, engine.Room]" = weakref.WeakValueDictionary()
+        self._overlay: Dict[int, tuple] = {}   # id -> (items, npcs, exits, locked) of changed rooms
+
+    # ---- records ----
+
+    def _record(self, rid: int) -> dict:
+        return json.loads(self._mm[self._offsets[rid]:self._offsets[rid + 1]])
+
+    def _name(self, rid: int) -> str:
+        return self._record(rid)["n"]
+
+    def _load(self, rid: int) -> engine.Room:
+        rec = self._record(rid)
+        items, npcs, exits, locked = self._overlay.pop(rid, (rec["i"], rec["p"], rec["e"], rec["l"]))
+        room = engine.Room(rec["n"], rec["d"])
+        room._rid = rid
+        room.items = items
+        room.npcs = npcs
+        room.exits = RoomLinks(self, exits)
+        room.locked_exits = RoomLinks(self, locked)
+        weakref.finalize(room, self._retire, rid, items, npcs, room.exits.ids, room.locked_exits.ids)
+        return room
+
+    def _retire(self, rid, items, npcs, exits, locked) -> None:
+        rec = self._record(rid)
+        if (items, npcs, exits, locked) != (rec["i"], rec["p"], rec["e"], rec["l"]):
+            self._overlay[rid] = (items, npcs, exits, locked)
+
+    # ---- rooms ----
+
+    def room(self, rid: int) -> engine.Room:
+        room = self._resident.get(rid)
+        if room is not None:
+            self._resident.move_to_end(rid)
+            return room
+
+        room = self._alive.get(rid)
+        if room is None:
+            room = self._load(rid)
+            self._alive[rid] = room
+        self._resident[rid] = room
+        if len(self._resident) > self.budget:
+            self._resident.popitem(last=False)
+        return room
+
+    def start(self) -> engine.Room:
+        return self.room(self.meta["start"])
+
+    def _search(self, lower: str) -> int:
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._name(self._names[mid]).lower() < lower:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def find(self, name: str) -> Optional[engine.Room]:
+        """Room called name, ignoring case."""
+        i = self._search(name.lower())
+        if i < self.count and self._name(self._names[i]).lower() == name.lower():
+            return self.room(self._names[i])
+        return None
+
+    def __getitem__(self, name: str) -> engine.Room:
+        lower = name.lower()
+        i = self._search(lower)
+        while i < self.count:
+            rid = self._names[i]
+            found = self._name(rid)
+            if found.lower() != lower:
+                break
+            if found == name:
+                return self.room(rid)
+            i += 1
+        raise KeyError(name)
+
+    def __iter__(self) -> Iterator[str]:
+        for rid in range(self.count):
+            yield self._name(rid)
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def resident(self) -> int:
+        return len(self._resident)
+
+    def close(self) -> None:
+        self._resident.clear()
+        self._offsets.release()
+        self._names.release()
+        self._mm.close()
+        self._file.close()
+
+
+class MappedGame(GeneratedGame):
+    """A GeneratedGame world played straight from a file written by write_world."""
+
+    def __init__(self, path: str, budget: int = 10_000):
+        self.path = path
+        self.budget = budget
+        self.puzzles = {}
+        engine.Game.__init__(self)
+
+    def build_world(self):
+        self.rooms = MappedWorld(self.path, self.budget)
+        for room, item, direction, target in self.rooms.meta["puzzles"]:
+            self.puzzles[(room, item)] = (direction, target) if direction else None
+        self.current = self.rooms.start()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Generate a world and write it to a world file.")
+    ap.add_argument("size", type=int)
+    ap.add_argument("path")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+    write_world(GeneratedGame(size=args.size, seed=args.seed), args.path)